@@ -0,0 +1,223 @@
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from main import procesar_pdf
+from worker import workers_por_defecto
+from utils.metricas import serializar
+from utils.logs import log_info
+
+TIMEOUT_POR_DEFECTO = 300
+
+# === Entrada ===
+def listar_pdfs(entrada: str) -> list:
+    """
+    Acepta un directorio (todos los .pdf, recursivo), un patrón glob o un
+    manifiesto de texto con una ruta por línea (relativa al manifiesto).
+    """
+    if os.path.isdir(entrada):
+        rutas = glob.glob(os.path.join(entrada, "**", "*.pdf"), recursive=True)
+        rutas += glob.glob(os.path.join(entrada, "**", "*.PDF"), recursive=True)
+    elif any(c in entrada for c in "*?["):
+        rutas = glob.glob(entrada, recursive=True)
+    else:
+        base = os.path.dirname(os.path.abspath(entrada))
+        rutas = []
+        with open(entrada, encoding="utf-8") as f:
+            for linea in f:
+                linea = linea.strip()
+                if linea and not linea.startswith("#"):
+                    rutas.append(linea if os.path.isabs(linea) else os.path.join(base, linea))
+    return sorted(set(os.path.abspath(r) for r in rutas))
+
+
+# === Ejecución con timeout ===
+def _ejecutar_hijo(conexion, pdf_path: str, tipo: str):
+    conexion.send(procesar_pdf(pdf_path, tipo))
+    conexion.close()
+
+
+def procesar_con_timeout(pdf_path: str, tipo: str, timeout: float) -> dict:
+    """Procesa el PDF en un proceso aparte que se termina si supera el timeout"""
+    receptor, emisor = multiprocessing.Pipe(duplex=False)
+    proceso = multiprocessing.Process(target=_ejecutar_hijo, args=(emisor, pdf_path, tipo), daemon=True)
+    proceso.start()
+    emisor.close()
+
+    try:
+        if receptor.poll(timeout):
+            resultado = receptor.recv()
+        else:
+            proceso.terminate()
+            resultado = {"success": False, "error": f"Tiempo agotado ({timeout}s)", "timeout": True}
+    except EOFError:
+        resultado = {"success": False, "error": f"El proceso terminó sin responder (código {proceso.exitcode})"}
+    finally:
+        receptor.close()
+        proceso.join()
+
+    return resultado
+
+
+# === Salida ===
+class SalidaDirectorio:
+    """
+    Un JSON por archivo y resumen.json en el directorio de salida.
+    progreso.txt lista los archivos terminados con éxito para poder reanudar.
+    """
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self.progreso = os.path.join(directorio, "progreso.txt")
+        # Los hilos del lote agregan a progreso.txt a la vez
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, pdf_path: str) -> str:
+        nombre = os.path.splitext(os.path.basename(pdf_path))[0]
+        sufijo = hashlib.sha1(pdf_path.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.directorio, f"{nombre}-{sufijo}.json")
+
+    def hechos(self) -> set:
+        if not os.path.exists(self.progreso):
+            return set()
+        with open(self.progreso, encoding="utf-8") as f:
+            return {linea.rstrip("\n") for linea in f if linea.strip()}
+
+    def guardar(self, registro: dict):
+        ruta = self._ruta(registro["archivo"])
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(registro, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+        if registro.get("success"):
+            with self._lock, open(self.progreso, "a", encoding="utf-8") as f:
+                f.write(registro["archivo"] + "\n")
+
+    def ruta_resumen(self) -> str:
+        return os.path.join(self.directorio, "resumen.json")
+
+
+class SalidaNdjson:
+    """Una línea por archivo en un único .ndjson; si se repite un archivo vale la última"""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        # Los hilos del lote escriben a la vez: sin lock, las líneas grandes se pueden intercalar
+        self._lock = threading.Lock()
+        carpeta = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(carpeta, exist_ok=True)
+
+    def hechos(self) -> set:
+        hechos = set()
+        if not os.path.exists(self.ruta):
+            return hechos
+        with open(self.ruta, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    # Última línea cortada por una interrupción
+                    continue
+                if registro.get("success"):
+                    hechos.add(registro["archivo"])
+        return hechos
+
+    def guardar(self, registro: dict):
+        linea = serializar(registro) + "\n"
+        with self._lock, open(self.ruta, "a", encoding="utf-8") as f:
+            f.write(linea)
+            f.flush()
+
+    def ruta_resumen(self) -> str:
+        return os.path.splitext(self.ruta)[0] + ".resumen.json"
+
+
+# === Lote ===
+def procesar_lote(entrada: str, salida: str, tipo: str = "todo", workers: int | None = None, timeout: float = TIMEOUT_POR_DEFECTO) -> dict:
+    """
+    Procesa muchos PDFs en paralelo. Los archivos que ya tienen un resultado
+    exitoso en la salida se omiten, así el lote se puede reanudar.
+    """
+    workers = workers or workers_por_defecto()
+    destino = SalidaNdjson(salida) if salida.endswith(".ndjson") else SalidaDirectorio(salida)
+
+    archivos = listar_pdfs(entrada)
+    hechos = destino.hechos()
+    pendientes = [a for a in archivos if a not in hechos]
+    log_info(f"Lote: {len(archivos)} archivos, {len(archivos) - len(pendientes)} ya procesados, {len(pendientes)} pendientes")
+
+    resumen = {
+        "total": len(archivos),
+        "omitidos": len(archivos) - len(pendientes),
+        "exitosos": 0,
+        "fallidos": 0,
+        "tiempo_agotado": 0,
+        "fallos": [],
+    }
+    inicio_lote = time.perf_counter()
+
+    def procesar(indice_archivo):
+        indice, pdf_path = indice_archivo
+        inicio = time.perf_counter()
+        resultado = procesar_con_timeout(pdf_path, tipo, timeout)
+        segundos = round(time.perf_counter() - inicio, 3)
+
+        registro = {"archivo": pdf_path, "tipo": tipo, "segundos": segundos, **resultado}
+        destino.guardar(registro)
+
+        estado = "OK" if resultado.get("success") else "ERROR"
+        log_info(f"[{indice}/{len(pendientes)}] {estado} {os.path.basename(pdf_path)} ({segundos}s)")
+        return registro
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for registro in executor.map(procesar, enumerate(pendientes, 1)):
+            if registro.get("success"):
+                resumen["exitosos"] += 1
+            else:
+                resumen["fallidos"] += 1
+                if registro.get("timeout"):
+                    resumen["tiempo_agotado"] += 1
+                resumen["fallos"].append({"archivo": registro["archivo"], "error": registro.get("error")})
+
+    resumen["segundos"] = round(time.perf_counter() - inicio_lote, 3)
+
+    with open(destino.ruta_resumen(), "w", encoding="utf-8") as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+
+    return resumen
+
+
+def ejecutar_batch(args: list):
+    """
+    Uso: python main.py --batch <directorio|glob|manifiesto> --salida <directorio|archivo.ndjson>
+         [--tipo todo] [--workers N] [--timeout SEGUNDOS]
+    """
+    def opcion(nombre, defecto=None):
+        return args[args.index(nombre) + 1] if nombre in args else defecto
+
+    entrada = opcion("--batch")
+    salida = opcion("--salida")
+    if not entrada or not salida:
+        print(json.dumps({"success": False, "error": ejecutar_batch.__doc__.strip()}, ensure_ascii=False))
+        sys.exit(1)
+
+    # Los archivos ya corren en paralelo; por defecto cada uno extrae sus páginas en serie
+    os.environ.setdefault("EXTRACTOR_PAGINAS_WORKERS", "1")
+
+    workers = opcion("--workers")
+    resumen = procesar_lote(
+        entrada,
+        salida,
+        tipo=opcion("--tipo", "todo"),
+        workers=int(workers) if workers else None,
+        timeout=float(opcion("--timeout", TIMEOUT_POR_DEFECTO)),
+    )
+    print(json.dumps({"success": True, "data": resumen}, ensure_ascii=False, indent=2))
@@ -0,0 +1,282 @@
+"""
+Benchmark de los extractores sobre PDFs sintéticos (y opcionalmente reales).
+
+Uso (desde Backend/Python):
+    python -m benchmark.medir [--competencias 20] [--raps 5] [--lineas 6] [--actividades 40]
+                              [--paginas-relleno 2] [--repeticiones 3] [--pdf RUTA ...]
+                              [--salida resultado.json] [--comparar base.json] [--tolerancia 0.25]
+                              [--memoria 20,80,160]
+
+El resultado es un JSON que se puede guardar y comparar entre ejecuciones:
+con --comparar se listan los tiempos que empeoraron más que la tolerancia y
+el proceso termina con código 1 si hay alguno.
+
+Con --memoria se genera un programa sintético por cada cantidad de
+competencias y se mide el pico de RSS de procesar_pdf(todo) en un proceso
+nuevo para cada uno: debería mantenerse plano aunque crezcan las páginas.
+"""
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# La cache de resultados haría que solo se midiera la primera repetición
+os.environ["EXTRACTOR_CACHE"] = "0"
+
+import pdfplumber
+
+from main import EXTRACTORES, TIPOS, procesar_pdf
+from extractors.programa_extractor import extraer_programa
+from extractors.competencias_extractor import extraer_competencias
+from extractors.raps_extractor import extraer_raps
+from extractors.proyecto_extractor import extraer_proyecto, extraer_fases_proyecto, extraer_actividades_proyecto
+from utils.documento_pdf import escanear_pdf
+from utils.secciones import SECCIONES, indice_secciones
+from utils.logs import log_info, log_warning
+from benchmark.pdf_sintetico import generar_programa, generar_proyecto
+
+try:
+    import resource
+except ImportError:
+    # Windows no tiene el módulo resource
+    resource = None
+
+FUNCIONES_EXTRAER = [
+    extraer_programa,
+    extraer_competencias,
+    extraer_raps,
+    extraer_proyecto,
+    extraer_fases_proyecto,
+    extraer_actividades_proyecto,
+]
+
+@contextlib.contextmanager
+def silenciar():
+    """Los extractores escriben mucho a stderr; se descarta para no medir la consola"""
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stderr(nulo):
+        yield
+
+
+def cronometrar(funcion, repeticiones: int):
+    """Mejor tiempo de varias repeticiones y el resultado de la última"""
+    mejor = None
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        with silenciar():
+            resultado = funcion()
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    return round(mejor, 4), resultado
+
+
+def rss_pico_mb() -> float | None:
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo reporta en KB, macOS en bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(maximo / divisor, 1)
+
+
+def abrir_pdf(pdf_path: str) -> int:
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def medir_documento(pdf_path: str, repeticiones: int) -> dict:
+    """Tiempos por etapa, por extractor y de procesar_pdf para cada tipo"""
+    etapas = {}
+    etapas["apertura"], total_paginas = cronometrar(lambda: abrir_pdf(pdf_path), repeticiones)
+    etapas["indice_secciones"], _ = cronometrar(lambda: indice_secciones(pdf_path), repeticiones)
+
+    # Detección de tablas sobre todas las páginas que alguna sección necesita
+    secciones = list(SECCIONES)
+    etapas["deteccion_tablas"], documento = cronometrar(
+        lambda: escanear_pdf(pdf_path, secciones=secciones), repeticiones
+    )
+    paginas = len(documento.numeros)
+    filas = sum(len(tabla) for pagina in documento.paginas for tabla in pagina.tablas)
+
+    # Clasificación de filas: los extractores sobre el documento ya escaneado
+    clasificacion = {}
+    resultado = {}
+    for clave, _, iterar in EXTRACTORES:
+        clasificacion[clave], resultado[clave] = cronometrar(
+            lambda: list(iterar(pdf_path, documento)), repeticiones
+        )
+    etapas["clasificacion"] = clasificacion
+    total_clasificacion = sum(clasificacion.values())
+
+    etapas["serializacion"], salida = cronometrar(
+        lambda: json.dumps({"success": True, "data": resultado}, ensure_ascii=False, indent=2), repeticiones
+    )
+
+    extractores = {}
+    for funcion in FUNCIONES_EXTRAER:
+        segundos, registros = cronometrar(lambda: funcion(pdf_path), repeticiones)
+        extractores[funcion.__name__] = {"segundos": segundos, "registros": len(registros)}
+
+    procesar = {}
+    for tipo in TIPOS:
+        segundos, respuesta = cronometrar(lambda: procesar_pdf(pdf_path, tipo), repeticiones)
+        if not respuesta.get("success"):
+            log_warning(f"procesar_pdf({tipo}) falló en {pdf_path}: {respuesta.get('error')}")
+        procesar[tipo] = segundos
+
+    return {
+        "archivo": os.path.basename(pdf_path),
+        "paginas_totales": total_paginas,
+        "paginas_escaneadas": paginas,
+        "filas": filas,
+        "registros": {clave: len(registros) for clave, registros in resultado.items()},
+        "bytes_json": len(salida.encode("utf-8")),
+        "paginas_por_segundo": round(paginas / etapas["deteccion_tablas"], 2) if etapas["deteccion_tablas"] else None,
+        "filas_por_segundo": round(filas / total_clasificacion, 1) if total_clasificacion else None,
+        "etapas": etapas,
+        "extractores": extractores,
+        "procesar_pdf": procesar,
+    }
+
+
+def rss_procesar(pdf_path: str, tipo: str) -> float | None:
+    """Pico de RSS de procesar_pdf en un proceso nuevo (el pico del actual no baja)"""
+    directorio = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    salida = subprocess.run(
+        [sys.executable, "-m", "benchmark.medir", "--rss-procesar", pdf_path, tipo],
+        cwd=directorio, capture_output=True, text=True,
+        env={**os.environ, "EXTRACTOR_CACHE": "0", "EXTRACTOR_PAGINAS_WORKERS": "1"},
+    )
+    try:
+        return float(salida.stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        log_warning(f"No se pudo medir la memoria de {pdf_path}: {salida.stderr.strip()[-200:]}")
+        return None
+
+
+def medir_memoria(directorio: str, tamanos: list, raps: int, lineas: int) -> list:
+    """Pico de RSS según la cantidad de páginas del documento"""
+    medidas = []
+    for competencias in tamanos:
+        ruta = os.path.join(directorio, f"programa_memoria_{competencias}.pdf")
+        generar_programa(ruta, competencias, raps, lineas, 0)
+        medidas.append({
+            "competencias": competencias,
+            "paginas": abrir_pdf(ruta),
+            "rss_pico_mb": rss_procesar(ruta, "todo"),
+        })
+    return medidas
+
+
+# === Comparación entre ejecuciones ===
+def tiempos_planos(resultado: dict) -> dict:
+    """{"programa.etapas.apertura": 0.01, ...} con todos los tiempos en segundos"""
+    planos = {}
+
+    def recorrer(prefijo, valor):
+        if isinstance(valor, dict):
+            for clave, interno in valor.items():
+                recorrer(f"{prefijo}.{clave}" if prefijo else clave, interno)
+        elif isinstance(valor, (int, float)) and (".etapas." in prefijo or ".procesar_pdf." in prefijo or prefijo.endswith(".segundos")):
+            planos[prefijo] = valor
+
+    recorrer("", resultado["documentos"])
+    return planos
+
+
+def comparar(actual: dict, base: dict, tolerancia: float) -> list:
+    """Tiempos que empeoraron más que la tolerancia (0.25 = 25 % más lentos)"""
+    tiempos_base = tiempos_planos(base)
+    regresiones = []
+    for clave, segundos in tiempos_planos(actual).items():
+        anterior = tiempos_base.get(clave)
+        # Por debajo de 5 ms el ruido domina
+        if not anterior or max(anterior, segundos) < 0.005:
+            continue
+        cambio = segundos / anterior - 1
+        if cambio > tolerancia:
+            regresiones.append({"medida": clave, "base": anterior, "actual": segundos, "cambio": round(cambio, 3)})
+    return regresiones
+
+
+def ejecutar(args: list):
+    def opcion(nombre, defecto=None):
+        return args[args.index(nombre) + 1] if nombre in args else defecto
+
+    # Proceso hijo de rss_procesar: solo imprime su pico de RSS
+    if "--rss-procesar" in args:
+        indice = args.index("--rss-procesar")
+        with silenciar():
+            procesar_pdf(args[indice + 1], args[indice + 2])
+        print(rss_pico_mb())
+        return
+
+    parametros = {
+        "competencias": int(opcion("--competencias", 20)),
+        "raps": int(opcion("--raps", 5)),
+        "lineas": int(opcion("--lineas", 6)),
+        "actividades": int(opcion("--actividades", 40)),
+        "paginas_relleno": int(opcion("--paginas-relleno", 2)),
+        "repeticiones": int(opcion("--repeticiones", 3)),
+    }
+    reales = [args[i + 1] for i, a in enumerate(args) if a == "--pdf"]
+
+    documentos = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_programa = os.path.join(directorio, "programa_sintetico.pdf")
+        ruta_proyecto = os.path.join(directorio, "proyecto_sintetico.pdf")
+        generar_programa(ruta_programa, parametros["competencias"], parametros["raps"],
+                         parametros["lineas"], parametros["paginas_relleno"])
+        generar_proyecto(ruta_proyecto, parametros["actividades"], 3, parametros["paginas_relleno"])
+
+        for nombre, ruta in [("programa", ruta_programa), ("proyecto", ruta_proyecto)]:
+            log_info(f"Midiendo {nombre} sintético...")
+            documentos[nombre] = medir_documento(ruta, parametros["repeticiones"])
+
+        memoria = None
+        if "--memoria" in args:
+            tamanos = [int(n) for n in opcion("--memoria").split(",") if n.strip()]
+            log_info(f"Midiendo memoria con {tamanos} competencias...")
+            memoria = medir_memoria(directorio, tamanos, parametros["raps"], parametros["lineas"])
+
+    for ruta in reales:
+        log_info(f"Midiendo {ruta}...")
+        documentos[os.path.splitext(os.path.basename(ruta))[0]] = medir_documento(ruta, parametros["repeticiones"])
+
+    resultado = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parametros": parametros,
+        "documentos": documentos,
+        "rss_pico_mb": rss_pico_mb(),
+    }
+    if memoria is not None:
+        resultado["memoria"] = memoria
+
+    ruta_base = opcion("--comparar")
+    if ruta_base:
+        with open(ruta_base, encoding="utf-8") as f:
+            base = json.load(f)
+        resultado["regresiones"] = comparar(resultado, base, float(opcion("--tolerancia", 0.25)))
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    salida = opcion("--salida")
+    if salida:
+        with open(salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    print(texto)
+
+    if resultado.get("regresiones"):
+        log_warning(f"{len(resultado['regresiones'])} medidas empeoraron más de lo tolerado")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    ejecutar(sys.argv[1:])
@@ -0,0 +1,276 @@
+import random
+import textwrap
+
+# === Escritor PDF mínimo ===
+# Solo texto Helvetica y líneas: suficiente para que pdfplumber detecte las
+# tablas por sus bordes y pdfium lea el texto, sin dependencias extra.
+
+TAMANO_FUENTE = 7
+INTERLINEADO = 9
+RELLENO_CELDA = 3
+MARGEN = 36
+
+
+def escapar(texto: str) -> bytes:
+    datos = texto.encode("cp1252", errors="replace")
+    return datos.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class PdfSintetico:
+    """Páginas con texto y líneas que se escriben a disco con guardar()"""
+
+    def __init__(self, ancho: float = 612, alto: float = 792):
+        self.ancho = ancho
+        self.alto = alto
+        self.paginas = []
+
+    def nueva_pagina(self):
+        self.paginas.append([])
+
+    def texto(self, x: float, y: float, texto: str):
+        self.paginas[-1].append(
+            b"BT /F1 %d Tf %.2f %.2f Td (%s) Tj ET" % (TAMANO_FUENTE, x, y, escapar(texto))
+        )
+
+    def linea(self, x1: float, y1: float, x2: float, y2: float):
+        self.paginas[-1].append(b"%.2f %.2f m %.2f %.2f l S" % (x1, y1, x2, y2))
+
+    def guardar(self, ruta: str):
+        objetos = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            None,  # Pages, se completa cuando se conocen los hijos
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        ]
+        hijos = []
+        for contenido in self.paginas:
+            flujo = b"0.5 w\n" + b"\n".join(contenido)
+            objetos.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(flujo), flujo))
+            objetos.append(
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+                % (self.ancho, self.alto, len(objetos))
+            )
+            hijos.append(b"%d 0 R" % len(objetos))
+        objetos[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(hijos), len(hijos))
+
+        salida = bytearray(b"%PDF-1.4\n")
+        posiciones = []
+        for numero, objeto in enumerate(objetos, 1):
+            posiciones.append(len(salida))
+            salida += b"%d 0 obj\n%s\nendobj\n" % (numero, objeto)
+
+        inicio_xref = len(salida)
+        salida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+        for posicion in posiciones:
+            salida += b"%010d 00000 n \n" % posicion
+        salida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+
+        with open(ruta, "wb") as f:
+            f.write(salida)
+
+
+class Maquetador:
+    """
+    Dibuja tablas con bordes de arriba hacia abajo y abre páginas nuevas
+    cuando una fila no cabe. Cada página lleva el encabezado institucional.
+
+    Una fila es una lista de celdas; None en una celda la combina con la anterior
+    (igual a como pdfplumber devuelve las celdas combinadas).
+    """
+
+    def __init__(self, pdf: PdfSintetico, encabezado: list):
+        self.pdf = pdf
+        self.encabezado = encabezado
+        self.y = 0
+        self.nueva_pagina()
+
+    @property
+    def ancho_util(self) -> float:
+        return self.pdf.ancho - 2 * MARGEN
+
+    def nueva_pagina(self):
+        self.pdf.nueva_pagina()
+        self.y = self.pdf.alto - MARGEN
+        self._dibujar_tabla([self.encabezado], [0.3, 0.7])
+
+    def tabla(self, filas: list, proporciones: list):
+        for fila in filas:
+            if self.y - self._alto_fila(fila, proporciones) < MARGEN:
+                self.nueva_pagina()
+            self._dibujar_tabla([fila], proporciones, separar=False)
+        self.y -= 10
+
+    def _spans(self, fila: list, proporciones: list) -> list:
+        """[(texto, x, ancho)] uniendo las celdas combinadas"""
+        spans = []
+        x = MARGEN
+        for celda, proporcion in zip(fila, proporciones):
+            ancho = proporcion * self.ancho_util
+            if celda is None and spans:
+                texto, x0, ancho_previo = spans[-1]
+                spans[-1] = (texto, x0, ancho_previo + ancho)
+            else:
+                spans.append((celda or "", x, ancho))
+            x += ancho
+        return spans
+
+    def _lineas(self, texto: str, ancho: float) -> list:
+        caracteres = max(8, int((ancho - 2 * RELLENO_CELDA) / (TAMANO_FUENTE * 0.6)))
+        lineas = []
+        for parrafo in texto.split("\n"):
+            lineas.extend(textwrap.wrap(parrafo, caracteres) or [""])
+        return lineas
+
+    def _alto_fila(self, fila: list, proporciones: list) -> float:
+        mayor = max(len(self._lineas(texto, ancho)) for texto, _, ancho in self._spans(fila, proporciones))
+        return mayor * INTERLINEADO + 2 * RELLENO_CELDA
+
+    def _dibujar_tabla(self, filas: list, proporciones: list, separar: bool = True):
+        derecha = MARGEN + self.ancho_util
+        for fila in filas:
+            alto = self._alto_fila(fila, proporciones)
+            arriba, abajo = self.y, self.y - alto
+            self.pdf.linea(MARGEN, arriba, derecha, arriba)
+            self.pdf.linea(MARGEN, abajo, derecha, abajo)
+            for texto, x, ancho in self._spans(fila, proporciones):
+                self.pdf.linea(x, arriba, x, abajo)
+                for i, linea in enumerate(self._lineas(texto, ancho)):
+                    self.pdf.texto(x + RELLENO_CELDA, arriba - RELLENO_CELDA - (i + 1) * INTERLINEADO + 2, linea)
+            self.pdf.linea(derecha, arriba, derecha, abajo)
+            self.y = abajo
+        if separar:
+            self.y -= 10
+
+
+# === Contenido sintético ===
+PALABRAS = [
+    "ANALIZAR", "DESARROLLAR", "SOFTWARE", "REQUISITOS", "CALIDAD", "MÓDULOS", "DISEÑO",
+    "INFORMACIÓN", "SEGÚN", "NORMATIVA", "TÉCNICA", "PROCESOS", "GESTIÓN", "DATOS",
+    "COMUNICACIÓN", "APLICACIÓN", "EVALUACIÓN", "ESTRATEGIAS", "ORGANIZACIÓN", "SISTEMA",
+    "METODOLOGÍA", "PRUEBAS", "SEGURIDAD", "AMBIENTE", "PLATAFORMA", "ARQUITECTURA",
+]
+VERBOS = ["IDENTIFICAR", "APLICAR", "CONSTRUIR", "VERIFICAR", "PROPONER", "IMPLEMENTAR", "REALIZAR"]
+FASES = ["ANÁLISIS", "PLANEACIÓN", "EJECUCIÓN", "EVALUACIÓN"]
+
+
+def frase(rng: random.Random, palabras: int) -> str:
+    return " ".join([rng.choice(VERBOS)] + [rng.choice(PALABRAS) for _ in range(palabras - 1)])
+
+
+def lista(rng: random.Random, elementos: int) -> str:
+    return "\n".join(f"* {frase(rng, rng.randint(4, 10))}." for _ in range(elementos))
+
+
+def rellenar(maquetador: Maquetador, rng: random.Random, paginas: int, titulo: str):
+    """Páginas de texto que no pertenecen a ninguna sección que lean los extractores"""
+    for _ in range(paginas):
+        inicio = len(maquetador.pdf.paginas)
+        maquetador.tabla([[titulo, None]], [0.3, 0.7])
+        while len(maquetador.pdf.paginas) == inicio:
+            maquetador.tabla([[frase(rng, 4), frase(rng, 30)]], [0.3, 0.7])
+
+
+def generar_programa(ruta: str, competencias: int = 20, raps: int = 5, lineas: int = 6,
+                     paginas_relleno: int = 2, semilla: int = 1) -> dict:
+    """
+    PDF de programa de formación con el formato de tablas del SENA.
+    Retorna los conteos esperados para validar la extracción.
+    """
+    rng = random.Random(semilla)
+    pdf = PdfSintetico(612, 792)
+    maquetador = Maquetador(pdf, ["", "LÍNEA TECNOLÓGICA: TECNOLOGÍAS DE LA INFORMACIÓN Y LAS COMUNICACIONES"])
+
+    maquetador.tabla([
+        ["1. INFORMACIÓN BÁSICA DEL PROGRAMA DE FORMACIÓN TITULADA", None, None],
+        ["1.1 Denominación del Programa:", "ANÁLISIS Y DESARROLLO DE SOFTWARE.", None],
+        ["1.2. Código Programa:", "228118", None],
+        ["1.3. Versión Programa:", "1", None],
+        ["1.4. Vigencia del Programa:", "Fecha inicio programa: 10/09/2021", None],
+        ["1.5 Duración máxima estimada del aprendizaje (horas)", "Etapa Lectiva:", "3120 horas"],
+        ["", "Etapa Productiva:", "864 horas"],
+        ["", "Total:", "3984 horas"],
+        ["1.6 Tipo de programa", "TITULADO", None],
+        ["1.7 Título o certificado que obtendrá", "TECNÓLOGO EN ANÁLISIS Y DESARROLLO DE SOFTWARE.", None],
+    ], [0.3, 0.45, 0.25])
+
+    rellenar(maquetador, rng, paginas_relleno, "2. PERFIL IDÓNEO DE EGRESO")
+
+    for n in range(competencias):
+        filas = [
+            ["4. CONTENIDOS CURRICULARES DE LA COMPETENCIA", None, None],
+            ["4.1 NORMA / UNIDAD DE COMPETENCIA", frase(rng, 14), None],
+            ["4.2 CÓDIGO NORMA DE COMPETENCIA LABORAL", str(220201500 + n), None],
+            ["4.3 NOMBRE DE LA COMPETENCIA", frase(rng, 5), None],
+            ["4.4 DURACIÓN MÁXIMA ESTIMADA PARA EL LOGRO DEL APRENDIZAJE", None, f"{rng.randint(2, 40) * 12} horas"],
+            ["4.5 RESULTADOS DE APRENDIZAJE", None, None],
+            ["DENOMINACIÓN", None, None],
+        ]
+        filas += [[f"{r + 1:02d} {frase(rng, 12)}", None, None] for r in range(raps)]
+        filas += [
+            ["4.6 CONOCIMIENTOS", None, None],
+            ["4.6.1 CONOCIMIENTOS DE PROCESO", None, None],
+            [lista(rng, lineas), None, None],
+            ["4.6.2 CONOCIMIENTOS DEL SABER", None, None],
+            [lista(rng, lineas), None, None],
+            ["4.7 CRITERIOS DE EVALUACIÓN", None, None],
+            [lista(rng, lineas), None, None],
+            ["4.8 PERFIL DEL INSTRUCTOR", None, None],
+            ["4.8.1 Requisitos Académicos:", None, None],
+            [frase(rng, 20), None, None],
+        ]
+        maquetador.tabla(filas, [0.4, 0.4, 0.2])
+
+    maquetador.tabla([["CONTROL DEL DOCUMENTO", None, None, None]] + [
+        ["Autor", frase(rng, 3), "EQUIPO DE DISEÑO CURRICULAR", "27/11/2019"] for _ in range(6)
+    ], [0.15, 0.35, 0.3, 0.2])
+
+    pdf.guardar(ruta)
+    return {"paginas": len(pdf.paginas), "competencias": competencias, "raps": competencias * raps}
+
+
+def generar_proyecto(ruta: str, actividades: int = 40, raps: int = 3, paginas_relleno: int = 2,
+                     semilla: int = 1) -> dict:
+    """
+    PDF de proyecto formativo con el formato de tablas del SENA.
+    Retorna los conteos esperados para validar la extracción.
+    """
+    rng = random.Random(semilla)
+    pdf = PdfSintetico(792, 612)
+    maquetador = Maquetador(pdf, ["Modelo de Mejora", "SERVICIO NACIONAL DE APRENDIZAJE SENA"])
+
+    maquetador.tabla([
+        ["1. Información básica del proyecto", None, None, None, None, None],
+        ["Código Proyecto SOFIA:", "2537295", "Código del Programa SOFIA:", "228118", "Versión del Programa:", "1"],
+        ["1.1 Centro de Formación:", "CENTRO DE BIOTECNOLOGÍA INDUSTRIAL", None, "1.2 Regional:", "REGIONAL VALLE", None],
+        ["1.3 Nombre del proyecto:", frase(rng, 12), None, None, None, None],
+        ["1.4 Programa de Formación al que da respuesta:", "ANÁLISIS Y DESARROLLO DE SOFTWARE.", None, None, None, None],
+    ], [0.2, 0.2, 0.15, 0.15, 0.15, 0.15])
+    maquetador.tabla([["2. Estructura del proyecto", None]], [0.3, 0.7])
+
+    rellenar(maquetador, rng, paginas_relleno, "2.1 Planteamiento del problema o necesidad")
+
+    filas = [
+        ["3. Planeación del proyecto", None, None, None],
+        ["Fase", "Actividad de proyecto", "Resultado de aprendizaje", "Competencia"],
+    ]
+    for a in range(actividades):
+        fase = FASES[a * len(FASES) // max(1, actividades)]
+        actividad = frase(rng, 6)
+        for r in range(raps):
+            rap = f"{593000 + a * raps + r} - {r + 1:02d} {frase(rng, 8)}"
+            filas.append([fase, actividad, rap, f"{220201500 + a} - {frase(rng, 6)}"])
+    maquetador.tabla(filas, [0.12, 0.28, 0.35, 0.25])
+
+    maquetador.tabla([
+        ["4. Rubros presupuestales", None, None, None],
+        ["Recurso", "Cantidad", "Valor Unitario", "Valor Total"],
+        ["Equipos", "30", "$ 1.500.000", "$ 45.000.000"],
+    ], [0.4, 0.2, 0.2, 0.2])
+    maquetador.tabla([
+        ["5. Equipo que participó en la formulación", None, None],
+        ["Nombre", "Especialidad", "Regional"],
+        [frase(rng, 3), "INSTRUCTOR", "REGIONAL VALLE"],
+    ], [0.4, 0.4, 0.2])
+
+    pdf.guardar(ruta)
+    return {"paginas": len(pdf.paginas), "actividades": actividades}
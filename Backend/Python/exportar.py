@@ -0,0 +1,257 @@
+import json
+import math
+import os
+
+from extractors.raps_extractor import estructurar_raps
+from utils.pdf_helpers import norm
+from utils.patrones import PATRON_ENTERO
+from utils.logs import log_info, log_warning
+
+# === Exportación a tablas planas ===
+# Una tabla por cada tabla de DB_Alistamiento.sql que llena pdf.controller.js,
+# con claves locales (1..n) que relacionan las filas entre sí. cargar.sql las
+# carga con un LOAD DATA por tabla, sumando a cada clave el MAX actual de su tabla.
+
+FORMATOS = ["tsv", "csv"]
+
+# (tabla, columnas del archivo, {columna: tabla referenciada}); la primera columna es la clave
+TABLAS = [
+    ("programa_formacion", ["id_programa", "codigo_programa", "nombre_programa", "vigencia", "tipo_programa",
+                            "version_programa", "horas_totales", "horas_etapa_lectiva", "horas_etapa_productiva"], {}),
+    ("competencias", ["id_competencia", "id_programa", "codigo_norma", "duracion_maxima", "nombre_competencia",
+                      "unidad_competencia"], {"id_programa": "programa_formacion"}),
+    ("raps", ["id_rap", "id_competencia", "codigo", "denominacion", "duracion"], {"id_competencia": "competencias"}),
+    ("conocimiento_proceso", ["id_conocimiento_proceso", "id_rap", "nombre"], {"id_rap": "raps"}),
+    ("conocimiento_saber", ["id_conocimiento_saber", "id_rap", "nombre"], {"id_rap": "raps"}),
+    ("criterios_evaluacion", ["id_criterio_evaluacion", "id_rap", "nombre"], {"id_rap": "raps"}),
+    ("proyectos", ["id_proyecto", "id_programa", "codigo_proyecto", "nombre_proyecto", "codigo_programa",
+                   "centro_formacion", "regional"], {"id_programa": "programa_formacion"}),
+    ("fases", ["id_fase", "nombre"], {}),
+    ("actividades_proyecto", ["id_actividad", "fase", "nombre_actividad"], {}),
+    # id_rap queda vacío si el RAP no está en la exportación; cargar.sql lo busca
+    # en la base por codigo_rap y denominacion_rap, igual que pdf.controller.js
+    ("actividad_rap", ["id_actividad", "id_rap", "codigo_rap", "denominacion_rap"],
+     {"id_actividad": "actividades_proyecto", "id_rap": "raps"}),
+]
+
+
+def numero_horas(texto) -> int | None:
+    """Primer número del texto ("3120 horas" -> 3120)"""
+    coincidencia = PATRON_ENTERO.search(str(texto or ""))
+    return int(coincidencia.group()) if coincidencia else None
+
+
+def construir_tablas(datos: dict) -> dict:
+    """{tabla: [filas]} a partir del "data" de procesar_pdf, con el mismo criterio que pdf.controller.js"""
+    tablas = {tabla: [] for tabla, _, _ in TABLAS}
+
+    id_programa = None
+    for programa in datos.get("programa", [])[:1]:
+        id_programa = 1
+        tablas["programa_formacion"].append([
+            id_programa,
+            programa.get("codigo_programa") or None,
+            programa.get("nombre_programa") or None,
+            programa.get("vigencia") or None,
+            programa.get("tipo") or None,
+            programa.get("version_programa") or None,
+            numero_horas(programa.get("horas_totales")),
+            numero_horas(programa.get("horas_etapa_lectiva")),
+            numero_horas(programa.get("horas_etapa_productiva")),
+        ])
+
+    # codigo_norma -> (id_competencia, duracion_maxima); vale la primera, como el SELECT del controlador
+    competencias = {}
+    for comp in datos.get("competencias", []):
+        id_competencia = len(tablas["competencias"]) + 1
+        duracion = numero_horas(comp.get("duracion_maxima"))
+        tablas["competencias"].append([
+            id_competencia,
+            id_programa,
+            comp.get("codigo_norma") or None,
+            duracion,
+            comp.get("nombre_competencia") or None,
+            comp.get("unidad_competencia") or None,
+        ])
+        competencias.setdefault(comp.get("codigo_norma"), (id_competencia, duracion))
+
+    # (codigo, denominacion normalizada, id) de cada RAP exportado, para resolver actividad_rap localmente
+    raps = []
+    for unidad in datos.get("unidadRaps", []):
+        estructurados = unidad["raps"] if "raps" in unidad else estructurar_raps(unidad)
+        codigo_competencia = unidad.get("codigo_competencia")
+        if not estructurados:
+            continue
+        if codigo_competencia not in competencias:
+            log_warning(f"Competencia {codigo_competencia} no está en la exportación, se omiten sus RAPs")
+            continue
+
+        id_competencia, duracion_maxima = competencias[codigo_competencia]
+        # Math.round de JS: .5 redondea hacia arriba
+        duracion = math.floor(duracion_maxima / len(estructurados) + 0.5) if duracion_maxima else None
+        for rap in estructurados:
+            id_rap = len(tablas["raps"]) + 1
+            tablas["raps"].append([id_rap, id_competencia, rap["codigo"], rap["denominacion"], duracion])
+            raps.append((rap["codigo"], norm(rap["denominacion"]), id_rap))
+            for campo, tabla in [("conocimientos_proceso", "conocimiento_proceso"),
+                                 ("conocimientos_saber", "conocimiento_saber"),
+                                 ("criterios_evaluacion", "criterios_evaluacion")]:
+                # Un solo registro por RAP con los ítems en líneas, como el controlador
+                nombre = "\n".join(rap[campo])
+                if nombre.strip():
+                    tablas[tabla].append([len(tablas[tabla]) + 1, id_rap, nombre])
+
+    for proyecto in datos.get("proyecto", [])[:1]:
+        codigo_programa = proyecto.get("codigo_programa") or None
+        local = id_programa if codigo_programa and tablas["programa_formacion"] and \
+            tablas["programa_formacion"][0][1] == codigo_programa else None
+        tablas["proyectos"].append([
+            1,
+            local,
+            proyecto.get("codigo_proyecto") or None,
+            proyecto.get("nombre_proyecto") or None,
+            codigo_programa,
+            proyecto.get("centro_formacion") or None,
+            proyecto.get("regional") or None,
+        ])
+
+    for fase in datos.get("fases", []):
+        tablas["fases"].append([len(tablas["fases"]) + 1, fase.get("nombre")])
+
+    for actividad in datos.get("actividades", []):
+        id_actividad = len(tablas["actividades_proyecto"]) + 1
+        tablas["actividades_proyecto"].append([id_actividad, actividad.get("fase"), actividad.get("nombre_actividad")])
+        relacionados = set()
+        for codigo_rap, denominacion in actividad.get("raps", []):
+            prefijo = denominacion[:30]
+            # Como el LIKE del controlador, que compara sin distinguir mayúsculas ni tildes
+            buscado = norm(prefijo)
+            id_rap = next((i for codigo, nombre, i in raps if codigo == codigo_rap and buscado in nombre), None)
+            if id_rap is not None and id_rap in relacionados:
+                continue
+            relacionados.add(id_rap)
+            tablas["actividad_rap"].append([id_actividad, id_rap, codigo_rap, prefijo])
+
+    return tablas
+
+
+# === Escritura ===
+def celda_tsv(valor) -> str:
+    """Formato por defecto de LOAD DATA: \\N es NULL y se escapan \\, tabulador y saltos de línea"""
+    if valor is None:
+        return "\\N"
+    texto = str(valor)
+    return (texto.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+            .replace("\r", "\\r").replace("\0", "\\0"))
+
+
+def celda_csv(valor) -> str:
+    """Texto entre comillas (dobladas si aparecen), números sin comillas y NULL sin comillas"""
+    if valor is None:
+        return "NULL"
+    if isinstance(valor, int):
+        return str(valor)
+    return '"' + str(valor).replace('"', '""') + '"'
+
+
+def escribir_tabla(ruta: str, columnas: list, filas: list, formato: str):
+    separador, celda = ("\t", celda_tsv) if formato == "tsv" else (",", celda_csv)
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        f.write(separador.join(columnas) + "\n")
+        for fila in filas:
+            f.write(separador.join(celda(valor) for valor in fila) + "\n")
+
+
+def sql_carga(tablas: dict, formato: str) -> str:
+    """Script con un LOAD DATA por tabla; las claves locales se desplazan al MAX actual de cada tabla"""
+    campos = ("FIELDS TERMINATED BY '\\t'" if formato == "tsv"
+              else "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY ''")
+    opciones = f"CHARACTER SET utf8mb4 {campos} LINES TERMINATED BY '\\n' IGNORE 1 LINES"
+
+    lineas = [
+        "-- Generado por main.py --exportar. Ejecutar desde este directorio:",
+        "--   mysql --local-infile=1 <base> < cargar.sql",
+        f"-- Filas: {', '.join(f'{tabla}={len(filas)}' for tabla, filas in tablas.items())}",
+        "LOCK TABLES " + ", ".join(f"{tabla} WRITE" for tabla, _, _ in TABLAS) + ";",
+    ]
+    for tabla, columnas, _ in TABLAS:
+        if tabla != "actividad_rap":
+            lineas.append(f"SELECT COALESCE(MAX({columnas[0]}), 0) INTO @base_{tabla} FROM {tabla};")
+
+    for tabla, columnas, referencias in TABLAS:
+        archivo = f"{tabla}.{formato}"
+        if tabla == "actividad_rap":
+            # Las relaciones con RAPs de otra carga se resuelven en la base
+            lineas += [
+                "CREATE TEMPORARY TABLE tmp_actividad_rap (id_actividad INT, id_rap INT, codigo_rap VARCHAR(20), denominacion_rap TEXT);",
+                f"LOAD DATA LOCAL INFILE '{archivo}' INTO TABLE tmp_actividad_rap {opciones};",
+                "INSERT IGNORE INTO actividad_rap (id_actividad, id_rap)",
+                "SELECT id_actividad, id_rap FROM (",
+                "  SELECT t.id_actividad + @base_actividades_proyecto AS id_actividad,",
+                "         COALESCE(t.id_rap + @base_raps, (SELECT id_rap FROM raps WHERE codigo = t.codigo_rap",
+                "                  AND denominacion LIKE CONCAT('%', t.denominacion_rap, '%') LIMIT 1)) AS id_rap",
+                "  FROM tmp_actividad_rap t",
+                ") resueltas WHERE id_rap IS NOT NULL;",
+                "DROP TEMPORARY TABLE tmp_actividad_rap;",
+            ]
+            continue
+
+        variables = [f"@{c}" if c == columnas[0] or c in referencias or (tabla, c) == ("proyectos", "codigo_programa")
+                     else c for c in columnas]
+        asignaciones = [f"{columnas[0]} = @{columnas[0]} + @base_{tabla}"]
+        for columna, referida in referencias.items():
+            expresion = f"@{columna} + @base_{referida}"
+            if tabla == "proyectos":
+                # Proyecto de un programa cargado antes: se busca por código, como el controlador
+                expresion = (f"COALESCE({expresion}, (SELECT id_programa FROM programa_formacion "
+                             f"WHERE codigo_programa = @codigo_programa LIMIT 1))")
+            asignaciones.append(f"{columna} = {expresion}")
+        if tabla == "proyectos":
+            asignaciones.append("codigo_programa = @codigo_programa")
+
+        lineas.append(f"LOAD DATA LOCAL INFILE '{archivo}' INTO TABLE {tabla} {opciones}\n"
+                      f"  ({', '.join(variables)})\n"
+                      f"  SET {', '.join(asignaciones)};")
+
+    lineas.append("UNLOCK TABLES;")
+    return "\n".join(lineas) + "\n"
+
+
+def exportar_tablas(datos: dict, directorio: str, formato: str = "tsv") -> dict:
+    """Escribe <tabla>.<formato> por tabla y cargar.sql; devuelve las filas por tabla"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato} (usar {' o '.join(FORMATOS)})")
+
+    os.makedirs(directorio, exist_ok=True)
+    tablas = construir_tablas(datos)
+    for tabla, columnas, _ in TABLAS:
+        escribir_tabla(os.path.join(directorio, f"{tabla}.{formato}"), columnas, tablas[tabla], formato)
+    with open(os.path.join(directorio, "cargar.sql"), "w", encoding="utf-8") as f:
+        f.write(sql_carga(tablas, formato))
+
+    conteo = {tabla: len(filas) for tabla, filas in tablas.items()}
+    log_info(f"Exportación en {directorio}: {sum(conteo.values())} filas en {len(conteo)} tablas")
+    return conteo
+
+
+def ejecutar_exportacion(pdf_path: str, tipo: str, directorio: str, formato: str = "tsv") -> dict:
+    """Extrae el PDF y lo exporta; la respuesta lleva el directorio y las filas por tabla"""
+    from main import procesar_pdf
+
+    resultado = procesar_pdf(pdf_path, tipo, por_rap=True)
+    if not resultado.get("success"):
+        return resultado
+    try:
+        conteo = exportar_tablas(resultado["data"], directorio, formato)
+    except (OSError, ValueError) as e:
+        return {"success": False, "error": str(e)}
+    return {"success": True, "data": {"directorio": os.path.abspath(directorio), "formato": formato, "tablas": conteo}}
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 4:
+        print("Uso: python exportar.py <ruta_pdf> <tipo> <directorio> [tsv|csv]", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(ejecutar_exportacion(*sys.argv[1:5]), ensure_ascii=False, indent=2))
@@ -1,78 +1,86 @@
-import pdfplumber
-import re
-import sys
-from utils.pdf_helpers import norm
+from utils.pdf_helpers import Clasificador, norm
+from utils.patrones import PATRON_HORAS_COMPETENCIA
+from utils.documento_pdf import DocumentoEscaneado, obtener_documento
+from utils.registros import Competencia
+from utils.logs import log_debug
 
-def log_debug(mensaje):
-    """Enviar logs a stderr para no contaminar stdout"""
-    print(mensaje, file=sys.stderr, flush=True)
+def extraer_competencias(pdf_path: str, documento: DocumentoEscaneado | None = None) -> list:
+    return list(iterar_competencias(pdf_path, documento))
 
-def extraer_competencias(pdf_path: str) -> list:
+def iterar_competencias(pdf_path: str, documento: DocumentoEscaneado | None = None):
+    """Genera cada competencia en cuanto queda completa"""
     TARGET_COMPETENCIA = "UNIDAD DE COMPETENCIA"
     TARGET_CODIGO = "CODIGO NORMA DE COMPETENCIA LABORAL"
     TARGET_NOMBRE = "NOMBRE DE LA COMPETENCIA"
     TARGET_HORA = "DURACION MAXIMA ESTIMADA"
+
+    # Una sola clasificación de la celda izquierda por fila, en el orden de los elif
+    clasificador = Clasificador({
+        TARGET_COMPETENCIA: "competencia",
+        TARGET_CODIGO: "codigo",
+        TARGET_NOMBRE: "nombre",
+        TARGET_HORA: "hora",
+    })
     
-    HORA_RE = re.compile(r"\b(\d{1,4})\s*(HORA|HORAS)\b", re.IGNORECASE)
-    
-    registros = []
-    registro_actual = {}
+    registro_actual = Competencia()
     dentro_de_etapa_practica = False
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            tablas = page.extract_tables()
-            for tabla in tablas:
-                for fila in tabla:
-                    if fila and len(fila) >= 2:
-                        celda_izq = norm(fila[0] or "")
-                        texto_fila = "".join([c for c in fila if c]).strip()
-                        texto_norm = norm(texto_fila)
-                        
-                        # Detectar etapa práctica
-                        if "ETAPA PRACTICA" in texto_norm or "999999999" in texto_fila:
-                            dentro_de_etapa_practica = True
-                            if registro_actual:
-                                registros.append(registro_actual)
-                                registro_actual = {}
+    documento = obtener_documento(pdf_path, documento, "competencias")
+
+    for page in documento.paginas_seccion("competencias"):
+        for tabla in page.tablas:
+            for fila_tabla in tabla:
+                fila = fila_tabla.celdas
+                if fila and len(fila) >= 2:
+                    celda_izq = fila_tabla.celda_izq
+                    # Textos de la fila ya calculados en el escaneo
+                    texto_fila = fila_tabla.texto
+                    texto_norm = fila_tabla.texto_norm
+                    
+                    # Detectar etapa práctica
+                    if "ETAPA PRACTICA" in texto_norm or "999999999" in texto_fila:
+                        dentro_de_etapa_practica = True
+                        if registro_actual:
+                            yield registro_actual.finalizar()
+                            registro_actual = Competencia()
+                        continue
+                    
+                    if dentro_de_etapa_practica:
+                        if TARGET_CODIGO in celda_izq and "999999999" not in texto_fila:
+                            dentro_de_etapa_practica = False
+                        else:
                             continue
-                        
-                        if dentro_de_etapa_practica:
-                            if TARGET_CODIGO in celda_izq and "999999999" not in texto_fila:
-                                dentro_de_etapa_practica = False
-                            else:
-                                continue
 
-                        # Competencia
-                        if TARGET_COMPETENCIA in celda_izq:
-                            if registro_actual:
-                                registros.append(registro_actual)
-                                log_debug(f"✅ Competencia guardada: {registro_actual.get('nombre_competencia', 'sin nombre')}")
-                                registro_actual = {}
-                            registro_actual["unidad_competencia"] = (norm(fila[1] or ""))
+                    tipo_celda = clasificador.clasificar(celda_izq)
 
-                        # Código
-                        elif TARGET_CODIGO in celda_izq:
-                            registro_actual["codigo_norma"] = (fila[1] or "").strip()
+                    # Competencia
+                    if tipo_celda == "competencia":
+                        if registro_actual:
+                            yield registro_actual.finalizar()
+                            log_debug(f"✅ Competencia guardada: {registro_actual.get('nombre_competencia', 'sin nombre')}")
+                            registro_actual = Competencia()
+                        registro_actual.unidad_competencia = (norm(fila[1] or ""))
 
-                        # Nombre
-                        elif TARGET_NOMBRE in celda_izq:
-                            registro_actual["nombre_competencia"] = (norm(fila[1] or ""))
+                    # Código
+                    elif tipo_celda == "codigo":
+                        registro_actual.codigo_norma = (fila[1] or "").strip()
 
-                        # Horas
-                        elif TARGET_HORA in celda_izq:
-                            for celda in fila:
-                                if celda and HORA_RE.search(str(celda)):
-                                    if not registro_actual:
-                                        # Ignorar horas sueltas (como la de 3120 horas inicial)
-                                        log_debug(f"[P{page.page_number}] ⏭ Ignorando hora fuera de competencia: {celda}")
-                                        continue
-                                    registro_actual["duracion_maxima"] = str(celda).strip()
-                                    break
+                    # Nombre
+                    elif tipo_celda == "nombre":
+                        registro_actual.nombre_competencia = (norm(fila[1] or ""))
+
+                    # Horas
+                    elif tipo_celda == "hora":
+                        for celda in fila:
+                            if celda and PATRON_HORAS_COMPETENCIA.search(str(celda)):
+                                if not registro_actual:
+                                    # Ignorar horas sueltas (como la de 3120 horas inicial)
+                                    log_debug(f"[P{page.numero}] ⏭ Ignorando hora fuera de competencia: {celda}")
+                                    continue
+                                registro_actual.duracion_maxima = str(celda).strip()
+                                break
 
     # Guardar último registro
     if registro_actual:
-        registros.append(registro_actual)
-        log_debug(f"✅ Última competencia guardada: {registro_actual.get('nombre_competencia', 'sin nombre')}")
-
-    return registros
\ No newline at end of file
+        yield registro_actual.finalizar()
+        log_debug(f"✅ Última competencia guardada: {registro_actual.get('nombre_competencia', 'sin nombre')}")
\ No newline at end of file
@@ -1,13 +1,32 @@
-import pdfplumber
-import re
-import sys
-from utils.pdf_helpers import norm, extraer_horas
+from utils.pdf_helpers import extraer_horas
+from utils.patrones import PATRON_REPETIDOS
+from utils.documento_pdf import DocumentoEscaneado, obtener_documento
+from utils.documento_pdfium import extraer_con_respaldo
+from utils.registros import Programa
+from utils.logs import log_debug
 
-def log_debug(mensaje):
-    """Enviar logs a stderr para no contaminar stdout"""
-    print(mensaje, file=sys.stderr, flush=True)
+# Campos que la lectura rápida tiene que traer para no recurrir a extract_tables()
+CAMPOS_PROGRAMA = ["nombre_programa", "codigo_programa", "version_programa", "vigencia",
+                   "horas_etapa_lectiva", "horas_etapa_productiva", "horas_totales", "tipo", "titulo"]
 
-def extraer_programa(pdf_path: str) -> list: 
+def extraer_programa(pdf_path: str, documento: DocumentoEscaneado | None = None, backend: str = "pdfplumber") -> list:
+    return list(iterar_programa(pdf_path, documento, backend))
+
+def programa_confiable(registro: dict) -> bool:
+    return all(registro.get(campo) for campo in CAMPOS_PROGRAMA) and registro["codigo_programa"].isdigit()
+
+def iterar_programa(pdf_path: str, documento: DocumentoEscaneado | None = None, backend: str = "pdfplumber"):
+    """
+    Genera cada programa en cuanto queda completo.
+    Con backend="pdfium" lee la sección con pdfium y solo usa extract_tables() si falta algún campo.
+    """
+    if backend == "pdfium":
+        yield from extraer_con_respaldo(recorrer_programa, pdf_path, documento, "programa", programa_confiable)
+        return
+    yield from recorrer_programa(obtener_documento(pdf_path, documento, "programa"))
+
+def recorrer_programa(documento: DocumentoEscaneado):
+    """Máquina de estados sobre las filas de la sección del programa"""
     TARGET_NOMBRE = "DENOMINACION DEL PROGRAMA"
     TARGET_CODIGO = "CODIGO PROGRAMA"
     TARGET_VERSION = "VERSION PROGRAMA"
@@ -18,77 +37,73 @@ def extraer_programa(pdf_path: str) -> list:
     TARGET_TIPO = "TIPO DE PROGRAMA"
     TARGET_TITULO = "TITULO O CERTIFICADO QUE OBTENDRA"
 
-    registros = []
-    registro_actual = {}
+    registro_actual = Programa()
     en_bloque_duracion = False
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            tablas = page.extract_tables()
-            for tabla in tablas:
-                for fila in tabla:
-                    if not fila or len(fila) < 1:
-                        continue
-                    
-                    celda_izq = norm(fila[0] or "")
-                    texto_celda = " ".join([str(c).strip() for c in fila if c]).strip()
-                    texto_norm = norm(texto_celda)
-                    
-                    # NOMBRE
-                    if TARGET_NOMBRE in celda_izq:
-                        if registro_actual:
-                            registros.append(registro_actual)
-                            log_debug(f"✅ Registro guardado: {registro_actual.get('nombre_programa', 'sin nombre')}")
-                            registro_actual = {}
-                        registro_actual["nombre_programa"] = (fila[1] or "").strip() if len(fila) > 1 else ""
+    for page in documento.paginas_seccion("programa"):
+        for tabla in page.tablas:
+            for fila_tabla in tabla:
+                fila = fila_tabla.celdas
+                if not fila or len(fila) < 1:
+                    continue
 
-                    # Código
-                    elif TARGET_CODIGO in celda_izq:
-                        registro_actual["codigo_programa"] = (fila[1] or "").strip() if len(fila) > 1 else ""
+                celda_izq = fila_tabla.celda_izq
+                texto_celda = fila_tabla.texto
+                texto_norm = fila_tabla.texto_norm
+                
+                # NOMBRE
+                if TARGET_NOMBRE in celda_izq:
+                    if registro_actual:
+                        yield registro_actual.finalizar()
+                        log_debug(f"✅ Registro guardado: {registro_actual.get('nombre_programa', 'sin nombre')}")
+                        registro_actual = Programa()
+                    registro_actual.nombre_programa = (fila[1] or "").strip() if len(fila) > 1 else ""
 
-                    # Versión
-                    elif TARGET_VERSION in celda_izq:
-                        registro_actual["version_programa"] = (fila[1] or "").strip() if len(fila) > 1 else ""
+                # Código
+                elif TARGET_CODIGO in celda_izq:
+                    registro_actual.codigo_programa = (fila[1] or "").strip() if len(fila) > 1 else ""
 
-                    # Vigencia
-                    elif TARGET_VIGENCIA in celda_izq:
-                        registro_actual["vigencia"] = (fila[1] or "").strip() if len(fila) > 1 else ""
+                # Versión
+                elif TARGET_VERSION in celda_izq:
+                    registro_actual.version_programa = (fila[1] or "").strip() if len(fila) > 1 else ""
 
-                    # Duración
-                    elif TARGET_DURACION in celda_izq:
-                        en_bloque_duracion = True
-                        
-                        if TARGET_LECTIVA in texto_norm and "horas_etapa_lectiva" not in registro_actual:
-                            horas = extraer_horas(texto_celda)
-                            if horas:
-                                registro_actual["horas_etapa_lectiva"] = horas
-                                log_debug(f"    ✅ Etapa lectiva: {horas}")
+                # Vigencia
+                elif TARGET_VIGENCIA in celda_izq:
+                    registro_actual.vigencia = (fila[1] or "").strip() if len(fila) > 1 else ""
+
+                # Duración
+                elif TARGET_DURACION in celda_izq:
+                    en_bloque_duracion = True
+                    
+                    if TARGET_LECTIVA in texto_norm and not hasattr(registro_actual, "horas_etapa_lectiva"):
+                        horas = extraer_horas(texto_celda)
+                        if horas:
+                            registro_actual.horas_etapa_lectiva = horas
+                            log_debug(f"    ✅ Etapa lectiva: {horas}")
 
-                    elif en_bloque_duracion:
-                        if TARGET_PRODUCTIVA in texto_norm and "horas_etapa_productiva" not in registro_actual:
+                elif en_bloque_duracion:
+                    if TARGET_PRODUCTIVA in texto_norm and not hasattr(registro_actual, "horas_etapa_productiva"):
+                        horas = extraer_horas(texto_celda)
+                        if horas:
+                            registro_actual.horas_etapa_productiva = horas
+                            log_debug(f"    ✅ Etapa productiva: {horas}")
+                    
+                    elif not hasattr(registro_actual, "horas_totales"):
+                        texto_norm_simple = PATRON_REPETIDOS.sub(r"\1", texto_norm)
+                        if "TOTAL" in texto_norm_simple:
                             horas = extraer_horas(texto_celda)
                             if horas:
-                                registro_actual["horas_etapa_productiva"] = horas
-                                log_debug(f"    ✅ Etapa productiva: {horas}")
-                        
-                        elif "horas_totales" not in registro_actual:
-                            texto_norm_simple = re.sub(r"(.)\1+", r"\1", texto_norm)
-                            if "TOTAL" in texto_norm_simple:
-                                horas = extraer_horas(texto_celda)
-                                if horas:
-                                    registro_actual["horas_totales"] = horas
-                                    log_debug(f"✅ Total detectado: {horas}")
-                                    en_bloque_duracion = False
-                                
-                    elif TARGET_TIPO in celda_izq:
-                        registro_actual["tipo"] = (fila[1] or "").strip() if len(fila) > 1 else ""
-                        
-                    elif TARGET_TITULO in celda_izq:
-                        registro_actual["titulo"] = (fila[1] or "").strip() if len(fila) > 1 else ""
+                                registro_actual.horas_totales = horas
+                                log_debug(f"✅ Total detectado: {horas}")
+                                en_bloque_duracion = False
+                            
+                elif TARGET_TIPO in celda_izq:
+                    registro_actual.tipo = (fila[1] or "").strip() if len(fila) > 1 else ""
+                    
+                elif TARGET_TITULO in celda_izq:
+                    registro_actual.titulo = (fila[1] or "").strip() if len(fila) > 1 else ""
 
     # Guardar último registro
     if registro_actual:
-        registros.append(registro_actual)
-        log_debug(f"✅ Último registro guardado: {registro_actual.get('nombre_programa', 'sin nombre')}")
-
-    return registros
\ No newline at end of file
+        yield registro_actual.finalizar()
+        log_debug(f"✅ Último registro guardado: {registro_actual.get('nombre_programa', 'sin nombre')}")
\ No newline at end of file
@@ -1,13 +1,17 @@
-import pdfplumber
-import re
 import sys
 from utils.pdf_helpers import norm
+from utils.patrones import (PATRON_CODIGO_LARGO, PATRON_CODIGO_RAP_ACTIVIDAD, PATRON_ESPACIOS, PATRON_NUMERACION_ETIQUETA,
+                            buscar_en_columna)
+from utils.documento_pdf import DocumentoEscaneado, escanear_pdf, obtener_documento
+from utils.documento_pdfium import extraer_con_respaldo
+from utils.registros import Actividad, Proyecto
+from utils.logs import log_debug, log_warning, log_error
 
-def log_debug(mensaje):
-    """Enviar logs a stderr para no contaminar stdout"""
-    print(mensaje, file=sys.stderr, flush=True)
+# Campos que la lectura rápida tiene que traer para no recurrir a extract_tables()
+CAMPOS_PROYECTO = ["codigo_proyecto", "codigo_programa", "centro_formacion", "regional",
+                   "nombre_proyecto", "programa_formacion"]
 
-def extraer_proyecto(pdf_path: str) -> list:
+def extraer_proyecto(pdf_path: str, documento: DocumentoEscaneado | None = None, backend: str = "pdfplumber") -> list:
     """
     Extrae información del proyecto formativo del PDF del SENA
     
@@ -17,9 +21,45 @@ def extraer_proyecto(pdf_path: str) -> list:
     Returns:
         list: Lista de diccionarios con información del proyecto
     """
+    return list(iterar_proyecto(pdf_path, documento, backend))
+
+
+def iterar_proyecto(pdf_path: str, documento: DocumentoEscaneado | None = None, backend: str = "pdfplumber"):
+    """
+    Genera el proyecto de la sección de información básica.
+    Con backend="pdfium" lee la sección con pdfium y solo usa extract_tables() si falta algún campo.
+    """
+    try:
+        if backend == "pdfium":
+            proyectos = extraer_con_respaldo(recorrer_proyecto, pdf_path, documento, "proyecto", proyecto_confiable)
+        else:
+            proyectos = recorrer_proyecto(obtener_documento(pdf_path, documento, "proyecto"))
+
+        extraidos = 0
+        for proyecto in proyectos:
+            extraidos += 1
+            yield proyecto
+
+        # Validar que se extrajo al menos un proyecto
+        if not extraidos:
+            log_warning("ADVERTENCIA: No se extrajo ningún proyecto del PDF")
+    
+    except Exception as e:
+        log_error(f"Error en extracción de proyectos: {str(e)}")
+        raise
+
+
+def proyecto_confiable(registro: dict) -> bool:
+    return (all(registro.get(campo) for campo in CAMPOS_PROYECTO)
+            and registro["codigo_proyecto"].isdigit() and registro["codigo_programa"].isdigit())
+
+
+def recorrer_proyecto(documento: DocumentoEscaneado):
+    """Máquina de estados sobre las filas de la sección de información básica"""
     
     # Definir los targets de búsqueda
     TARGET_SECCION = "INFORMACION BASICA DEL PROYECTO"
+    TARGET_FIN_SECCION = "ESTRUCTURA DEL PROYECTO"
     TARGET_CODIGO_PROYECTO = "CODIGO PROYECTO SOFIA"
     TARGET_CODIGO_PROGRAMA = "CODIGO DEL PROGRAMA SOFIA"
     TARGET_CENTRO = "CENTRO DE FORMACION"
@@ -27,99 +67,96 @@ def extraer_proyecto(pdf_path: str) -> list:
     TARGET_NOMBRE_PROYECTO = "NOMBRE DEL PROYECTO"
     TARGET_PROGRAMA_FORMACION = "PROGRAMA DE FORMACION AL QUE DA RESPUESTA"
     
-    registros = []
-    registro_actual = {}
+    registro_actual = Proyecto()
     dentro_seccion = False
-    
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                tablas = page.extract_tables()
-                for tabla in tablas:
-                    for fila in tabla:
-                        if not fila or len(fila) < 1:
-                            continue
-
-                        celda_izq = norm(fila[0] or "")
-                        texto_celda = " ".join([str(c).strip() for c in fila if c]).strip()
-                        texto_norm = norm(texto_celda)
-
-                        # === Detectar sección ===
-                        if TARGET_SECCION in texto_norm:
-                            dentro_seccion = True
-                            log_debug("Sección 'Información básica del proyecto' detectada")
-                            continue
-
-                        if not dentro_seccion:
-                            continue
-
-                        # === Extracción de campos ===
-                        if TARGET_CODIGO_PROYECTO in texto_norm and TARGET_CODIGO_PROGRAMA in texto_norm:
-
-                            valor_proyecto = None
-                            valor_programa = None
-
-                            # Buscar los valores numéricos (2537295, 228118, etc.)
-                            for idx, celda in enumerate(fila):
-                                texto = str(celda or "").strip()
-                                if re.match(r'^\d{5,}$', texto):
-                                # Heurística: el primer número largo es proyecto, el segundo es programa
-                                    if not valor_proyecto:
-                                        valor_proyecto = texto
-                                    elif not valor_programa:
-                                        valor_programa = texto
-
-                                if valor_proyecto:
-                                    registro_actual["codigo_proyecto"] = valor_proyecto
-                                    log_debug(f"Código Proyecto detectado: {valor_proyecto}")
-
-                                if valor_programa:
-                                    registro_actual["codigo_programa"] = valor_programa
-                                    log_debug(f"Código Programa detectado: {valor_programa}")
-                            continue
-
-                        # Centro de formación
-                        elif TARGET_CENTRO in celda_izq:
-                            valor = (fila[1] or "").strip() if len(fila) > 1 else ""
-                            registro_actual["centro_formacion"] = valor
-                            log_debug(f"Centro de formación: {valor}")
-
-                        # Regional
-                        elif TARGET_REGIONAL in texto_norm:
-                            valor = (fila[3] or "").strip() if len(fila) > 3 else ""
-                            registro_actual["regional"] = valor
-                            log_debug(f"Regional: {valor}")
-
-                        # Nombre del proyecto
-                        elif TARGET_NOMBRE_PROYECTO in celda_izq:
-                            valor = (fila[1] or "").strip() if len(fila) > 1 else ""
-                            registro_actual["nombre_proyecto"] = valor
-                            log_debug(f"Nombre del proyecto: {valor}")
-
-                        # Programa de formación
-                        elif TARGET_PROGRAMA_FORMACION in celda_izq:
-                            valor = (fila[1] or "").strip() if len(fila) > 1 else ""
-                            registro_actual["programa_formacion"] = valor
-                            log_debug(f"Programa de formación: {valor}")
-
-        # Guardar último registro si existe
-        if registro_actual:
-            registros.append(registro_actual)
-            log_debug(f" Último registro guardado: {registro_actual.get('nombre_proyecto', 'sin nombre')}")
-        
-        # Validar que se extrajo al menos un proyecto
-        if not registros:
-            log_debug("ADVERTENCIA: No se extrajo ningún proyecto del PDF")
-        else:
-            log_debug(f" Total proyectos extraídos: {len(registros)}")
-        
-        return registros
-    
-    except Exception as e:
-        log_debug(f"Error en extracción de proyectos: {str(e)}")
-        raise
 
-def extraer_fases_proyecto(pdf_path: str) -> list:
+    for page in documento.paginas_seccion("proyecto"):
+        for tabla in page.tablas:
+            for fila_tabla in tabla:
+                fila = fila_tabla.celdas
+                if not fila or len(fila) < 1:
+                    continue
+
+                celda_izq = fila_tabla.celda_izq
+                texto_norm = fila_tabla.texto_norm
+
+                # === Detectar sección ===
+                if TARGET_SECCION in texto_norm:
+                    dentro_seccion = True
+                    log_debug("Sección 'Información básica del proyecto' detectada")
+                    continue
+
+                if not dentro_seccion:
+                    continue
+
+                # === Fin de sección ===
+                if TARGET_FIN_SECCION in texto_norm:
+                    dentro_seccion = False
+                    log_debug("Fin de sección 'Información básica del proyecto'")
+                    continue
+
+                # === Extracción de campos ===
+                if TARGET_CODIGO_PROYECTO in texto_norm and TARGET_CODIGO_PROGRAMA in texto_norm:
+
+                    valor_proyecto = None
+                    valor_programa = None
+
+                    # Buscar los valores numéricos (2537295, 228118, etc.)
+                    for celda in fila:
+                        texto = str(celda or "").strip()
+                        if PATRON_CODIGO_LARGO.match(texto):
+                        # Heurística: el primer número largo es proyecto, el segundo es programa
+                            if not valor_proyecto:
+                                valor_proyecto = texto
+                            elif not valor_programa:
+                                valor_programa = texto
+
+                        if valor_proyecto:
+                            registro_actual.codigo_proyecto = valor_proyecto
+                            log_debug(f"Código Proyecto detectado: {valor_proyecto}")
+
+                        if valor_programa:
+                            registro_actual.codigo_programa = valor_programa
+                            log_debug(f"Código Programa detectado: {valor_programa}")
+                    continue
+
+                # Centro de formación
+                elif TARGET_CENTRO in celda_izq:
+                    valor = (fila[1] or "").strip() if len(fila) > 1 else ""
+                    registro_actual.centro_formacion = valor
+                    log_debug(f"Centro de formación: {valor}")
+
+                    # La regional suele venir en la misma fila ("1.2 Regional:")
+                    if TARGET_REGIONAL in texto_norm:
+                        valor = valor_despues_de_etiqueta(fila, TARGET_REGIONAL)
+                        registro_actual.regional = valor
+                        log_debug(f"Regional: {valor}")
+
+                # Regional
+                elif TARGET_REGIONAL in texto_norm:
+                    valor = (fila[3] or "").strip() if len(fila) > 3 else ""
+                    registro_actual.regional = valor
+                    log_debug(f"Regional: {valor}")
+
+                # Nombre del proyecto
+                elif TARGET_NOMBRE_PROYECTO in celda_izq:
+                    valor = (fila[1] or "").strip() if len(fila) > 1 else ""
+                    registro_actual.nombre_proyecto = valor
+                    log_debug(f"Nombre del proyecto: {valor}")
+
+                # Programa de formación
+                elif TARGET_PROGRAMA_FORMACION in celda_izq:
+                    valor = (fila[1] or "").strip() if len(fila) > 1 else ""
+                    registro_actual.programa_formacion = valor
+                    log_debug(f"Programa de formación: {valor}")
+
+    # Guardar último registro si existe
+    if registro_actual:
+        yield registro_actual.finalizar()
+        log_debug(f" Último registro guardado: {registro_actual.get('nombre_proyecto', 'sin nombre')}")
+        log_debug(" Total proyectos extraídos: 1")
+
+def extraer_fases_proyecto(pdf_path: str, documento: DocumentoEscaneado | None = None) -> list:
     """
     Extrae las fases del proyecto formativo del PDF del SENA
     
@@ -129,6 +166,11 @@ def extraer_fases_proyecto(pdf_path: str) -> list:
     Returns:
         list: Lista única de fases encontradas (sin duplicados)
     """
+    return list(iterar_fases_proyecto(pdf_path, documento))
+
+
+def iterar_fases_proyecto(pdf_path: str, documento: DocumentoEscaneado | None = None):
+    """Genera las fases únicas en el orden lógico del proyecto"""
     
     # Definir los targets de búsqueda
     TARGET_PLANEACION = "PLANEACION DEL PROYECTO"
@@ -143,71 +185,67 @@ def extraer_fases_proyecto(pdf_path: str) -> list:
     en_seccion_planeacion = False
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                tablas = page.extract_tables()
-                
-                if not tablas:
-                    continue
-                
-                for tabla in tablas:
-                    for fila in tabla:
-                        if not fila or all(c is None or c.strip() == "" for c in fila):
-                            continue
-
-                        # Convertir toda la fila a texto normalizado
-                        texto_fila = " ".join([str(c).strip() for c in fila if c]).strip()
-                        texto_norm = norm(texto_fila)
-                        
-                        # Detectar si estamos en la sección de planeación
-                        if TARGET_PLANEACION in texto_norm or TARGET_FASES in texto_norm:
-                            en_seccion_planeacion = True
-                            log_debug(f"Sección 'Planeación del proyecto' detectada en página {page_num}")
-                            continue
-                        
-                        # Si no estamos en la sección, continuar
-                        if not en_seccion_planeacion:
-                            continue
-                        
-                        # Detectar fin de sección (cuando llegue a otra sección principal)
-                        if "RUBROS PRESUPUESTALES" in texto_norm or \
-                           "EQUIPO QUE PARTICIPO" in texto_norm or \
-                           "VALORACION PRODUCTIVA" in texto_norm:
-                            en_seccion_planeacion = False
-                            log_debug(f"Fin de sección 'Planeación del proyecto' en página {page_num}")
+        documento = obtener_documento(pdf_path, documento, "planeacion")
+
+        for page in documento.paginas_seccion("planeacion"):
+            page_num = page.numero
+            if not page.tablas:
+                continue
+
+            for tabla in page.tablas:
+                for fila_tabla in tabla:
+                    fila = fila_tabla.celdas
+                    if not fila or all(c is None or c.strip() == "" for c in fila):
+                        continue
+
+                    # Texto de la fila ya normalizado
+                    texto_norm = fila_tabla.texto_norm
+                    
+                    # Detectar si estamos en la sección de planeación
+                    if TARGET_PLANEACION in texto_norm or TARGET_FASES in texto_norm:
+                        en_seccion_planeacion = True
+                        log_debug(f"Sección 'Planeación del proyecto' detectada en página {page_num}")
+                        continue
+                    
+                    # Si no estamos en la sección, continuar
+                    if not en_seccion_planeacion:
+                        continue
+                    
+                    # Detectar fin de sección (cuando llegue a otra sección principal)
+                    if "RUBROS PRESUPUESTALES" in texto_norm or \
+                       "EQUIPO QUE PARTICIPO" in texto_norm or \
+                       "VALORACION PRODUCTIVA" in texto_norm:
+                        en_seccion_planeacion = False
+                        log_debug(f"Fin de sección 'Planeación del proyecto' en página {page_num}")
+                        break
+                    
+                    # Buscar fases válidas en la primera columna
+                    primera_celda = fila_tabla.celda_izq
+                    
+                    # Verificar si la primera celda contiene alguna fase válida
+                    for fase in FASES_VALIDAS:
+                        if fase in primera_celda:
+                            fases_encontradas.add(fase)
+                            log_debug(f" Fase encontrada: {fase}")
                             break
-                        
-                        # Buscar fases válidas en la primera columna
-                        primera_celda = norm(fila[0] or "") if fila else ""
-                        
-                        # Verificar si la primera celda contiene alguna fase válida
-                        for fase in FASES_VALIDAS:
-                            if fase in primera_celda:
-                                fases_encontradas.add(fase)
-                                log_debug(f" Fase encontrada: {fase}")
-                                break
-
-        # Convertir set a lista ordenada
-        fases_resultado = []
-        
+
         # Ordenar las fases según el orden lógico del proyecto
         orden_fases = ["ANALISIS", "PLANEACION", "EJECUCION", "EVALUACION"]
-        for fase in orden_fases:
-            if fase in fases_encontradas:
-                fases_resultado.append({"nombre": fase})
+        fases_resultado = [fase for fase in orden_fases if fase in fases_encontradas]
         
         log_debug(f"\nTotal fases únicas extraídas: {len(fases_resultado)}")
-        log_debug(f" Fases: {[f['nombre'] for f in fases_resultado]}")
+        log_debug(f" Fases: {fases_resultado}")
         
-        return fases_resultado
+        for fase in fases_resultado:
+            yield {"nombre": fase}
     
     except Exception as e:
-        log_debug(f"Error en extracción de fases: {str(e)}")
+        log_error(f"Error en extracción de fases: {str(e)}")
         import traceback
-        log_debug(traceback.format_exc())
+        log_error(traceback.format_exc())
         raise
 
-def extraer_actividades_proyecto(pdf_path: str) -> list:
+def extraer_actividades_proyecto(pdf_path: str, documento: DocumentoEscaneado | None = None) -> list:
     """
     Extrae las actividades del proyecto y sus RAPs asociados
     
@@ -217,83 +255,111 @@ def extraer_actividades_proyecto(pdf_path: str) -> list:
     Returns:
         list: Lista de diccionarios con actividades y sus RAPs
     """
+    return list(iterar_actividades_proyecto(pdf_path, documento))
+
+
+def iterar_actividades_proyecto(pdf_path: str, documento: DocumentoEscaneado | None = None):
+    """Genera cada actividad en cuanto se lee su fila"""
     
     TARGET_PLANEACION = "PLANEACION DEL PROYECTO"
     TARGET_ACTIVIDADES = "ACTIVIDADES DEL PROYECTO"
+    TARGETS_FIN = ("RUBROS PRESUPUESTALES", "EQUIPO QUE PARTICIPO")
     
-    actividades = []
+    total = 0
     en_seccion_planeacion = False
     fase_actual = None
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                tablas = page.extract_tables()
-                if not tablas:
-                    continue
-                for tabla in tablas:
-                    for fila in tabla:
-                        if not fila or all(c is None or c.strip() == "" for c in fila):
-                            continue
-                        
-                        # Convertir fila a texto
-                        texto_fila = " ".join([str(c).strip() for c in fila if c]).strip()
-                        texto_norm = norm(texto_fila)
-                        
-                        # Detectar sección de planeación
-                        if TARGET_PLANEACION in texto_norm or TARGET_ACTIVIDADES in texto_norm:
-                            en_seccion_planeacion = True
-                            log_debug(f"Sección 'Actividades del proyecto' detectada en página {page_num}")
-                            continue
-                        
-                        if not en_seccion_planeacion:
-                            continue
-                        
-                        # Detectar fin de sección
-                        if "RUBROS PRESUPUESTALES" in texto_norm or \
-                           "EQUIPO QUE PARTICIPO" in texto_norm:
-                            en_seccion_planeacion = False
-                            log_debug(f"Fin de sección en página {page_num}")
-                            break
-                        
-                        # La estructura de la tabla es:
-                        # [Fase, Actividad, RAPs/Código, Competencia]
-                        
-                        if len(fila) < 3:
-                            continue
-                        
-                        fase_celda = norm(fila[0] or "")
-                        actividad_celda = (fila[1] or "").strip()
-                        raps_celda = (fila[2] or "").strip()
-                        
-                        # Detectar nueva fase
-                        if fase_celda and fase_celda in ["ANALISIS", "PLANEACION", "EJECUCION", "EVALUACION"]:
-                            fase_actual = fase_celda
-                            log_debug(f"\nFase detectada: {fase_actual}")
+        documento = obtener_documento(pdf_path, documento, "planeacion")
+
+        for page in documento.paginas_seccion("planeacion"):
+            page_num = page.numero
+            if not page.tablas:
+                continue
+            for tabla in page.tablas:
+                # Códigos de RAPs de la columna, calculados al llegar a la primera actividad
+                raps_tabla = None
+                desde = 0
+
+                for indice, fila_tabla in enumerate(tabla):
+                    fila = fila_tabla.celdas
+                    if not fila or all(c is None or c.strip() == "" for c in fila):
+                        continue
+
+                    # Texto de la fila ya normalizado
+                    texto_norm = fila_tabla.texto_norm
+                    
+                    # Detectar sección de planeación
+                    if TARGET_PLANEACION in texto_norm or TARGET_ACTIVIDADES in texto_norm:
+                        en_seccion_planeacion = True
+                        log_debug(f"Sección 'Actividades del proyecto' detectada en página {page_num}")
+                        continue
+                    
+                    if not en_seccion_planeacion:
+                        continue
+                    
+                    # Detectar fin de sección
+                    if any(target in texto_norm for target in TARGETS_FIN):
+                        en_seccion_planeacion = False
+                        log_debug(f"Fin de sección en página {page_num}")
+                        break
+                    
+                    # La estructura de la tabla es:
+                    # [Fase, Actividad, RAPs/Código, Competencia]
+                    
+                    if len(fila) < 3:
+                        continue
+                    
+                    fase_celda = fila_tabla.celda_izq
+                    actividad_celda = (fila[1] or "").strip()
+                    raps_celda = (fila[2] or "").strip()
+                    
+                    # Detectar nueva fase
+                    if fase_celda and fase_celda in ["ANALISIS", "PLANEACION", "EJECUCION", "EVALUACION"]:
+                        fase_actual = fase_celda
+                        log_debug(f"\nFase detectada: {fase_actual}")
+                    
+                    # Si hay actividad y RAPs, procesar
+                    if actividad_celda and raps_celda and fase_actual:
+                        if raps_tabla is None:
+                            # Una sola búsqueda sobre la columna [Fase, Actividad, RAPs, Competencia],
+                            # desde esta fila hasta el fin de la sección (las filas que el ciclo recorre)
+                            desde = indice
+                            hasta = next((j for j in range(indice, len(tabla))
+                                          if any(target in tabla[j].texto_norm for target in TARGETS_FIN)), len(tabla))
+                            raps_tabla = codigos_raps_columna([(f.celdas[2] or "").strip() if len(f.celdas) >= 3 else ""
+                                                               for f in tabla[desde:hasta]])
+                        raps_info = raps_tabla[indice - desde]
                         
-                        # Si hay actividad y RAPs, procesar
-                        if actividad_celda and raps_celda and fase_actual:
-                            raps_info = extraer_codigos_raps(raps_celda)
-                            
-                            if raps_info:
-                                actividad = {
-                                    "fase": fase_actual,
-                                    "nombre_actividad": actividad_celda,
-                                    "raps": raps_info
-                                }
-                                actividades.append(actividad)
-                                log_debug(f"Actividad: {actividad_celda[:50]}... | RAPs: {len(raps_info)}")
-
-        log_debug(f"\nTotal actividades extraídas: {len(actividades)}")
-        return actividades
+                        if raps_info:
+                            yield Actividad(fase_actual, actividad_celda, raps_info).finalizar()
+                            total += 1
+                            log_debug(f"Actividad: {actividad_celda[:50]}... | RAPs: {len(raps_info)}")
+
+        log_debug(f"\nTotal actividades extraídas: {total}")
     
     except Exception as e:
-        log_debug(f"Error en extracción de actividades: {str(e)}")
+        log_error(f"Error en extracción de actividades: {str(e)}")
         import traceback
-        log_debug(traceback.format_exc())
+        log_error(traceback.format_exc())
         raise
 
 
+def valor_despues_de_etiqueta(fila: list, etiqueta: str) -> str:
+    """
+    Devuelve el primer valor no vacío a la derecha de la celda cuya etiqueta
+    (sin numeración ni dos puntos) es exactamente la buscada, ej: "1.2 Regional:"
+    """
+    for idx, celda in enumerate(fila):
+        texto = PATRON_NUMERACION_ETIQUETA.sub("", norm(celda or "")).strip()
+        if texto == etiqueta:
+            for valor in fila[idx + 1:]:
+                if valor and valor.strip():
+                    return valor.strip()
+            break
+    return ""
+
+
 def extraer_codigos_raps(texto_raps: str) -> list:
     """
     Extrae los códigos de RAPs del texto
@@ -303,19 +369,21 @@ def extraer_codigos_raps(texto_raps: str) -> list:
         list: Lista de tuplas (codigo_rap, denominacion)
         Ejemplo: [("01", "IDENTIFICAR LA DINÁMICA..."), ("02", "APLICAR...")]
     """
+    return codigos_raps(PATRON_CODIGO_RAP_ACTIVIDAD.finditer(texto_raps))
+
+
+def codigos_raps_columna(celdas: list) -> list:
+    """extraer_codigos_raps de cada celda, con una sola búsqueda sobre toda la columna"""
+    return [codigos_raps(coincidencias) for coincidencias in buscar_en_columna(PATRON_CODIGO_RAP_ACTIVIDAD, celdas)]
+
+
+def codigos_raps(coincidencias) -> list:
+    """(código corto, denominación) de cada coincidencia de PATRON_CODIGO_RAP_ACTIVIDAD"""
     raps = []
-    
-    # Patrón: Captura código corto (01, 02) y la denominación completa
-    # Formato: 593343 - 01 IDENTIFICAR LA DINÁMICA...
-    patron = r'\d{6,7}\s*-\s*(\d{1,2})\s+([A-ZÀÁÉÍÓÚÑ].+?)(?=\d{6,7}\s*-|\Z)'
-    matches = re.findall(patron, texto_raps, re.DOTALL)
-    
-    for match in matches:
-        codigo_rap = match[0].zfill(2)  # "01", "02", etc.
-        denominacion = match[1].strip()
-        denominacion = re.sub(r'\s+', ' ', denominacion)  # Limpiar espacios múltiples
+    for match in coincidencias:
+        codigo_rap = match.group(1).zfill(2)  # "01", "02", etc.
+        denominacion = PATRON_ESPACIOS.sub(' ', match.group(2).strip())  # Limpiar espacios múltiples
         raps.append((codigo_rap, denominacion[:100]))  # Primeros 100 chars
-    
     return raps
 
 
@@ -333,22 +401,25 @@ if __name__ == "__main__":
     log_debug("INICIANDO EXTRACCIÓN DE PROYECTO")
     log_debug("=" * 60)
     
+    # Escanear el PDF una sola vez para los tres extractores
+    documento = escanear_pdf(pdf_path, secciones=["proyecto", "planeacion"])
+
     # Extraer información del proyecto
-    proyectos = extraer_proyecto(pdf_path)
+    proyectos = extraer_proyecto(pdf_path, documento)
     
     log_debug("\n" + "=" * 60)
     log_debug("INICIANDO EXTRACCIÓN DE FASES")
     log_debug("=" * 60)
     
     # Extraer fases del proyecto
-    fases = extraer_fases_proyecto(pdf_path)
+    fases = extraer_fases_proyecto(pdf_path, documento)
 
     log_debug("\n" + "=" * 60)
     log_debug("INICIANDO EXTRACCIÓN DE ACTIVIDADES DE PROYECTO")
     log_debug("=" * 60)
     
     # Extraer actividades del proyecto
-    actividades = extraer_actividades_proyecto(pdf_path)
+    actividades = extraer_actividades_proyecto(pdf_path, documento)
     
     # Crear resultado en formato JSON
     resultado = {
@@ -1,24 +1,11 @@
-import pdfplumber
-import re
 import sys
-import unicodedata
-
-def log_debug(mensaje):
-    """Enviar logs a stderr para no contaminar stdout"""
-    print(mensaje, file=sys.stderr, flush=True)
-
-
-def strip_accents(s: str) -> str:
-    """Eliminar acentos de un texto"""
-    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
-
-
-def norm(s: str) -> str:
-    """Normalizar texto: sin acentos, mayúsculas, espacios limpios"""
-    s = strip_accents(s or "").upper()
-    s = re.sub(r"\s+", " ", s)
-    return s.strip()
-
+from utils.pdf_helpers import Clasificador, norm
+from utils.patrones import (PATRON_ASTERISCO, PATRON_CODIGO_RAP, PATRON_DIVIDIR_TITULOS,
+                            PATRON_DOS_PUNTOS_FINAL, PATRON_HAY_TITULOS, PATRON_NUMERO_INICIAL)
+from utils.documento_pdf import DocumentoEscaneado, obtener_documento
+from utils.registros import UnidadRaps
+from utils.cache_bloques import HuellaBloque, cerrar_bloque
+from utils.logs import log_debug, log_error
 
 # === PALABRAS CLAVE ===
 TARGET_COMPETENCIA = "UNIDAD DE COMPETENCIA"
@@ -37,26 +24,44 @@ IGNORE_KEYS = [
     "DENOMINACION"
 ]
 
-# Patrones de fin de sección
-FIN_SECCION_PATTERNS = [
-    r"PERFIL DEL INSTRUCTOR",
-    r"REQUISITOS ACADEMICOS",
-    r"4\.8\s+PERFIL",
-    r"4\.8\.1",
-    r"CONTENIDOS CURRICULARES DE LA COMPETENCIA"
+# Marcadores de fin de sección (sobre texto normalizado: espacios ya colapsados)
+FIN_SECCION_KEYS = [
+    "PERFIL DEL INSTRUCTOR",
+    "REQUISITOS ACADEMICOS",
+    "4.8 PERFIL",
+    "4.8.1",
+    "CONTENIDOS CURRICULARES DE LA COMPETENCIA"
 ]
 
+# La fila completa decide si se ignora o si cierra la sección
+CLASIFICADOR_FILA = Clasificador({
+    **{key: "ignorar" for key in IGNORE_KEYS},
+    **{key: "fin" for key in FIN_SECCION_KEYS},
+})
 
-def es_fin_seccion(texto):
-    """Detecta si llegamos al final de la sección"""
-    texto_norm = norm(texto)
-    for pattern in FIN_SECCION_PATTERNS:
-        if re.search(pattern, texto_norm):
-            return True
-    return False
+# La celda izquierda decide qué campo o sección empieza, en este orden
+CLASIFICADOR_CELDA = Clasificador({
+    TARGET_COMPETENCIA: "competencia",
+    TARGET_CODIGO: "codigo",
+    TARGET_NOMBRE: "nombre",
+    TARGET_RESULTADOS: "resultados",
+    TARGET_CONOCIMIENTOS_PROCESO: "conocimientos",
+    TARGET_CRITERIOS_EVALUACION: "criterios",
+    TARGET_CONOCIMIENTOS_SABER: "saber",
+})
 
 
-def extraer_raps(pdf_path: str) -> list:
+def cerrar_unidad(registro: UnidadRaps, por_rap: bool = False) -> dict:
+    """La unidad como dict con sus secciones en texto (o, con por_rap, repartidas por RAP)"""
+    unidad = registro.finalizar()
+    if por_rap:
+        unidad["raps"] = estructurar_raps(unidad)
+        for campo in UnidadRaps.TEXTOS:
+            unidad.pop(campo, None)
+    return unidad
+
+
+def extraer_raps(pdf_path: str, documento: DocumentoEscaneado | None = None) -> list:
     """
     Extrae RAPs del PDF del programa SENA en el formato correcto
     
@@ -71,163 +76,158 @@ def extraer_raps(pdf_path: str) -> list:
             "criterios_evaluacion": "texto con saltos de línea"
         }
     """
+    return list(iterar_raps(pdf_path, documento))
+
+
+def iterar_raps(pdf_path: str, documento: DocumentoEscaneado | None = None, por_rap: bool = False):
+    """
+    Genera la unidad de RAPs de cada competencia en cuanto queda completa.
+    Con por_rap=True cada unidad trae "raps" (ver estructurar_raps) en lugar de
+    los textos de conocimientos y criterios sin repartir.
+    """
     
-    resultados = []
-    registro_actual = {}
+    total = 0
+    registro_actual = UnidadRaps()
     
     # Flags de captura
     capturando_resultados = False
     capturando_conocimientos = False
     capturando_criterios = False
     capturando_saber = False
+    # Filas del bloque de la competencia en curso (ver cache_bloques)
+    huella = HuellaBloque("inicio")
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for num_pagina, page in enumerate(pdf.pages, 1):
-                log_debug(f"Procesando página {num_pagina}")
-                
-                tablas = page.extract_tables()
-                
-                for tabla in tablas:
-                    for fila in tabla:
-                        if not fila or not any(fila):
-                            continue
-                        
-                        fila_texto = " ".join([c for c in fila if c]).strip()
-                        fila_norm = norm(fila_texto)
-                        celda_izq = norm(fila[0] or "")
-                        
-                        # === IGNORAR ENCABEZADOS ===
-                        if any(key in fila_norm for key in IGNORE_KEYS):
-                            continue
-                        
-                        # === DETECTAR NUEVA COMPETENCIA ===
-                        if TARGET_COMPETENCIA in celda_izq:
-                            # Guardar registro anterior si existe
-                            if registro_actual:
-                                    # Limpiar posibles líneas erróneas dentro de los resultados
-                                if "resultados_aprendizaje" in registro_actual:
-                                        registro_actual["resultados_aprendizaje"] = [ # type: ignore
-                                            r for r in registro_actual["resultados_aprendizaje"]
-                                            if not re.search(r"^\s*4\.6\s*CONOCIMIENTOS", norm(r))
-                                        ] 
-                                # Convertir listas a texto antes de guardar
-                                if "conocimientos_proceso" in registro_actual and isinstance(registro_actual["conocimientos_proceso"], list):
-                                    registro_actual["conocimientos_proceso"] = "\n".join(registro_actual["conocimientos_proceso"])
-                                if "conocimientos_saber" in registro_actual and isinstance(registro_actual["conocimientos_saber"], list):
-                                    registro_actual["conocimientos_saber"] = "\n".join(registro_actual["conocimientos_saber"])
-                                if "criterios_evaluacion" in registro_actual and isinstance(registro_actual["criterios_evaluacion"], list):
-                                    registro_actual["criterios_evaluacion"] = "\n".join(registro_actual["criterios_evaluacion"])
-                                
-                                resultados.append(registro_actual)
-                                log_debug(f"Competencia guardada: {registro_actual.get('codigo_competencia')}")
-                            
-                            # Iniciar nuevo registro
-                            registro_actual = {"competencia": (fila[1] or "").strip()}
-                            capturando_resultados = False
-                            capturando_conocimientos = False
-                            capturando_criterios = False
-                            capturando_saber = False
-                            continue
-                        
-                        # === CAPTURAR CÓDIGO ===
-                        if TARGET_CODIGO in celda_izq:
-                            codigo = (fila[1] or "").strip()
-                            if codigo and codigo != "999999999":  # Ignorar etapa práctica
-                                registro_actual["codigo_competencia"] = codigo
-                                log_debug(f"Código: {codigo}")
-                            continue
-                        
-                        # === CAPTURAR NOMBRE ===
-                        if TARGET_NOMBRE in celda_izq:
-                            registro_actual["competencia"] = (fila[1] or "").strip()
-                            continue
-                        
-                        # === DETECTAR FIN DE SECCIÓN ===
-                        if es_fin_seccion(fila_texto):
-                            capturando_resultados = False
-                            capturando_conocimientos = False
-                            capturando_criterios = False
-                            capturando_saber = False
-                            continue
-                        
-                        # === CAMBIAR SECCIÓN ===
-                        if TARGET_RESULTADOS in celda_izq:
-                            capturando_resultados = True
-                            capturando_conocimientos = False
-                            capturando_criterios = False
-                            capturando_saber = False
-                            registro_actual["resultados_aprendizaje"] = [] # type: ignore
-                            log_debug("Capturando Resultados de Aprendizaje")
-                            continue
-                        
-                        if TARGET_CONOCIMIENTOS_PROCESO in celda_izq:
-                            capturando_conocimientos = True
-                            capturando_resultados = False
-                            capturando_criterios = False
-                            capturando_saber = False
-                            registro_actual["conocimientos_proceso"] = [] # type: ignore
-                            log_debug("Capturando Conocimientos de Proceso")
-                            continue
-                        
-                        if TARGET_CRITERIOS_EVALUACION in celda_izq:
-                            capturando_criterios = True
-                            capturando_resultados = False
-                            capturando_conocimientos = False
-                            capturando_saber = False
-                            registro_actual["criterios_evaluacion"] = [] # type: ignore
-                            log_debug("Capturando Criterios de Evaluación")
-                            continue
-                        
-                        if TARGET_CONOCIMIENTOS_SABER in celda_izq:
-                            capturando_saber = True
-                            capturando_resultados = False
-                            capturando_conocimientos = False
-                            capturando_criterios = False
-                            registro_actual["conocimientos_saber"] = [] # type: ignore
-                            log_debug("Capturando Conocimientos del Saber")
-                            continue
-                        
-                        # === CAPTURAR CONTENIDO ===
-                        if capturando_resultados and fila_texto.strip():
-                            registro_actual.setdefault("resultados_aprendizaje", []).append(fila_texto) # type: ignore
-                        
-                        elif capturando_conocimientos and fila_texto.strip():
-                            registro_actual.setdefault("conocimientos_proceso", []).append(fila_texto) # type: ignore
-                        
-                        elif capturando_criterios and fila_texto.strip():
-                            registro_actual.setdefault("criterios_evaluacion", []).append(fila_texto) # type: ignore
+        documento = obtener_documento(pdf_path, documento, "competencias")
+
+        def cerrar():
+            # Sin por_rap cerrar la unidad cuesta menos que buscarla en la cache de bloques
+            if not por_rap:
+                return cerrar_unidad(registro_actual)
+            return cerrar_bloque("unidadRaps-por_rap", registro_actual.get("codigo_competencia"), huella,
+                                 lambda: cerrar_unidad(registro_actual, por_rap), documento.usar_cache)
+
+        for page in documento.paginas_seccion("competencias"):
+            log_debug(f"Procesando página {page.numero}")
+
+            for tabla in page.tablas:
+                for fila_tabla in tabla:
+                    fila = fila_tabla.celdas
+                    if not fila or not any(fila):
+                        continue
+
+                    fila_texto = " ".join([c for c in fila if c]).strip()
+                    tipo_fila = CLASIFICADOR_FILA.clasificar(fila_tabla.texto_norm)
+                    tipo_celda = CLASIFICADOR_CELDA.clasificar(fila_tabla.celda_izq)
+                    
+                    # === IGNORAR ENCABEZADOS ===
+                    if tipo_fila == "ignorar":
+                        continue
+                    
+                    # === DETECTAR NUEVA COMPETENCIA ===
+                    if tipo_celda == "competencia":
+                        # Guardar registro anterior si existe
+                        if registro_actual:
+                            yield cerrar()
+                            total += 1
+                            log_debug(f"Competencia guardada: {registro_actual.get('codigo_competencia')}")
                         
-                        elif capturando_saber and fila_texto.strip():
-                            registro_actual.setdefault("conocimientos_saber", []).append(fila_texto) # type: ignore
-        
+                        # Iniciar nuevo registro
+                        registro_actual = UnidadRaps()
+                        huella = HuellaBloque("competencia")
+                        huella.agregar(fila)
+                        registro_actual.competencia = (fila[1] or "").strip()
+                        capturando_resultados = False
+                        capturando_conocimientos = False
+                        capturando_criterios = False
+                        capturando_saber = False
+                        continue
+
+                    huella.agregar(fila)
+                    
+                    # === CAPTURAR CÓDIGO ===
+                    if tipo_celda == "codigo":
+                        codigo = (fila[1] or "").strip()
+                        if codigo and codigo != "999999999":  # Ignorar etapa práctica
+                            registro_actual.codigo_competencia = codigo
+                            log_debug(f"Código: {codigo}")
+                        continue
+                    
+                    # === CAPTURAR NOMBRE ===
+                    if tipo_celda == "nombre":
+                        registro_actual.competencia = (fila[1] or "").strip()
+                        continue
+                    
+                    # === DETECTAR FIN DE SECCIÓN ===
+                    if tipo_fila == "fin":
+                        capturando_resultados = False
+                        capturando_conocimientos = False
+                        capturando_criterios = False
+                        capturando_saber = False
+                        continue
+                    
+                    # === CAMBIAR SECCIÓN ===
+                    if tipo_celda == "resultados":
+                        capturando_resultados = True
+                        capturando_conocimientos = False
+                        capturando_criterios = False
+                        capturando_saber = False
+                        registro_actual.resultados_aprendizaje = []
+                        log_debug("Capturando Resultados de Aprendizaje")
+                        continue
+                    
+                    if tipo_celda == "conocimientos":
+                        capturando_conocimientos = True
+                        capturando_resultados = False
+                        capturando_criterios = False
+                        capturando_saber = False
+                        registro_actual.conocimientos_proceso = []
+                        log_debug("Capturando Conocimientos de Proceso")
+                        continue
+                    
+                    if tipo_celda == "criterios":
+                        capturando_criterios = True
+                        capturando_resultados = False
+                        capturando_conocimientos = False
+                        capturando_saber = False
+                        registro_actual.criterios_evaluacion = []
+                        log_debug("Capturando Criterios de Evaluación")
+                        continue
+                    
+                    if tipo_celda == "saber":
+                        capturando_saber = True
+                        capturando_resultados = False
+                        capturando_conocimientos = False
+                        capturando_criterios = False
+                        registro_actual.conocimientos_saber = []
+                        log_debug("Capturando Conocimientos del Saber")
+                        continue
+                    
+                    # === CAPTURAR CONTENIDO ===
+                    if capturando_resultados and fila_texto.strip():
+                        registro_actual.resultados_aprendizaje.append(fila_texto)
+                    
+                    elif capturando_conocimientos and fila_texto.strip():
+                        registro_actual.conocimientos_proceso.append(fila_texto)
+                    
+                    elif capturando_criterios and fila_texto.strip():
+                        registro_actual.criterios_evaluacion.append(fila_texto)
+                    
+                    elif capturando_saber and fila_texto.strip():
+                        registro_actual.conocimientos_saber.append(fila_texto)
+    
         # === GUARDAR EL ÚLTIMO REGISTRO ===
         if registro_actual and registro_actual.get("codigo_competencia"):
-            # Limpiar posibles líneas erróneas dentro de los resultados
-            if "resultados_aprendizaje" in registro_actual:
-                registro_actual["resultados_aprendizaje"] = [ # type: ignore
-                    r for r in registro_actual["resultados_aprendizaje"]
-                    if not re.search(r"^\s*4\.6\s*CONOCIMIENTOS", norm(r))
-                    ]
-            # Convertir listas a texto
-            if "conocimientos_proceso" in registro_actual and isinstance(registro_actual["conocimientos_proceso"], list):
-                registro_actual["conocimientos_proceso"] = "\n".join(registro_actual["conocimientos_proceso"])
-            if "conocimientos_saber" in registro_actual and isinstance(registro_actual["conocimientos_saber"], list):
-                registro_actual["conocimientos_saber"] = "\n".join(registro_actual["conocimientos_saber"])
-            if "criterios_evaluacion" in registro_actual and isinstance(registro_actual["criterios_evaluacion"], list):
-                registro_actual["criterios_evaluacion"] = "\n".join(registro_actual["criterios_evaluacion"])
-            
-            resultados.append(registro_actual)
+            yield cerrar()
+            total += 1
             log_debug(f"Última competencia guardada: {registro_actual.get('codigo_competencia')}")
         
-        log_debug(f"\nTotal competencias extraídas: {len(resultados)}")
-        
-        return resultados
+        log_debug(f"\nTotal competencias extraídas: {total}")
     
     except Exception as e:
-        log_debug(f"Error en extracción: {str(e)}")
+        log_error(f"Error en extracción: {str(e)}")
         import traceback
-        log_debug(traceback.format_exc())
+        log_error(traceback.format_exc())
         raise
 
 
@@ -244,6 +244,69 @@ def generar_resumen(competencias):
     return resumen
 
 
+# === RAPs ESTRUCTURADOS (mismo criterio que RapParser en el backend Node) ===
+
+def extraer_bloque(texto: str) -> list:
+    """Ítems del texto: las líneas que empiezan con *, sin el asterisco"""
+    items = [linea.strip() for linea in (texto or "").split("\n")]
+    return [PATRON_ASTERISCO.sub("", item).strip() for item in items if item.startswith("*")]
+
+
+def parsear_por_rap(texto: str, raps: list) -> dict:
+    """
+    Reparte conocimientos/criterios entre los RAPs: por títulos de sección si
+    el texto los tiene, si no en partes iguales. Devuelve {rap: [ítems]}.
+    """
+    resultado = {}
+    if not texto or not raps:
+        return resultado
+
+    if PATRON_HAY_TITULOS.search(texto):
+        claves = [(rap, norm(PATRON_NUMERO_INICIAL.sub("", rap, count=1)[:40])) for rap in raps]
+        for seccion in PATRON_DIVIDIR_TITULOS.split(texto):
+            if not seccion.strip():
+                continue
+            titulo = norm(PATRON_DOS_PUNTOS_FINAL.sub("", seccion.split("\n")[0].strip()))
+            rap = next((rap for rap, clave in claves if clave in titulo or titulo in clave), None)
+            if rap is not None:
+                items = extraer_bloque(seccion)
+                if any(items):
+                    resultado[rap] = items
+        return resultado
+
+    items = extraer_bloque(texto)
+    if not any(items):
+        return resultado
+    por_rap = -(-len(items) // len(raps))
+    for i, rap in enumerate(raps):
+        resultado[rap] = items[i * por_rap:(i + 1) * por_rap]
+    return resultado
+
+
+def estructurar_raps(unidad: dict) -> list:
+    """
+    Un registro por RAP: {"codigo", "denominacion", "conocimientos_proceso",
+    "conocimientos_saber", "criterios_evaluacion"}, los tres últimos como listas de ítems
+    """
+    raps = unidad.get("resultados_aprendizaje") or []
+    proceso = parsear_por_rap(unidad.get("conocimientos_proceso"), raps)
+    saber = parsear_por_rap(unidad.get("conocimientos_saber"), raps)
+    criterios = parsear_por_rap(unidad.get("criterios_evaluacion"), raps)
+
+    estructurados = []
+    for indice, rap in enumerate(raps):
+        limpio = rap.replace("\n", " ").strip()
+        coincidencia = PATRON_CODIGO_RAP.match(limpio)
+        estructurados.append({
+            "codigo": coincidencia.group(1).zfill(2) if coincidencia else str(indice + 1).zfill(2),
+            "denominacion": coincidencia.group(2).strip() if coincidencia else limpio,
+            "conocimientos_proceso": proceso.get(rap, []),
+            "conocimientos_saber": saber.get(rap, []),
+            "criterios_evaluacion": criterios.get(rap, []),
+        })
+    return estructurados
+
+
 # === PRUEBA DEL MÓDULO ===
 if __name__ == "__main__":
     import json
@@ -1,10 +1,19 @@
 import sys
 import json
 import os
-from extractors.programa_extractor import extraer_programa
-from extractors.competencias_extractor import extraer_competencias
-from extractors.raps_extractor import extraer_raps 
-from extractors.proyecto_extractor import extraer_proyecto, extraer_fases_proyecto, extraer_actividades_proyecto
+import time
+from concurrent.futures import ProcessPoolExecutor
+from extractors.programa_extractor import iterar_programa
+from extractors.competencias_extractor import iterar_competencias
+from extractors.raps_extractor import iterar_raps
+from extractors.proyecto_extractor import iterar_proyecto, iterar_fases_proyecto, iterar_actividades_proyecto
+from utils.documento_pdf import PlazoVencido, escanear_pdf, workers_paginas
+from utils.documento_pdfium import BACKENDS
+from utils.secciones import indice_documentos
+from utils.cache_resultados import obtener_cache, obtener_cache_paginas
+from utils.logs import log_warning, vaciar_logs
+from utils.metricas import a_prometheus, contar, cronometro, medir_iterador, recolectar, serializar
+from utils.perfilado import leer_modos, medir_memoria, perfilar
 
 # Configurar UTF-8
 if sys.stdout.encoding != 'utf-8':
@@ -14,49 +23,448 @@ if sys.stderr.encoding != 'utf-8':
 
 os.environ['PYTHONIOENCODING'] = 'utf-8'
 
-def procesar_pdf(pdf_path: str, tipo: str) -> dict:
+TIPOS = ['programa', 'competencias', 'raps', 'proyecto', 'fases', 'actividades', 'todo']
+
+# Secciones del PDF que lee cada tipo (ver utils/secciones.py)
+SECCIONES_POR_TIPO = {
+    'programa': ['programa'],
+    'competencias': ['competencias'],
+    'raps': ['competencias'],
+    'proyecto': ['proyecto'],
+    'fases': ['planeacion'],
+    'actividades': ['planeacion'],
+    'todo': ['programa', 'competencias', 'proyecto', 'planeacion'],
+}
+
+# Secciones etiqueta → valor que se leen con pdfium (extract_tables() solo si falta algún campo).
+# EXTRACTOR_BACKEND=pdfplumber vuelve a leerlas siempre con extract_tables()
+SECCIONES_RAPIDAS = ['programa', 'proyecto']
+
+# Clave en el resultado, tipos que la incluyen y generador que produce sus registros
+EXTRACTORES = [
+    ('programa', ['programa', 'todo'], iterar_programa),
+    ('competencias', ['competencias', 'todo'], iterar_competencias),
+    ('unidadRaps', ['raps', 'todo'], iterar_raps),
+    ('proyecto', ['proyecto', 'todo'], iterar_proyecto),
+    ('fases', ['fases', 'todo'], iterar_fases_proyecto),
+    ('actividades', ['actividades', 'todo'], iterar_actividades_proyecto),
+]
+
+# Con tipo 'todo' solo corren los extractores de la clase del documento (ver clasificar_documento)
+TIPOS_POR_DOCUMENTO = {
+    'programa': ['programa', 'competencias', 'raps'],
+    'proyecto': ['proyecto', 'fases', 'actividades'],
+}
+
+def backend_por_defecto() -> str:
+    backend = os.environ.get("EXTRACTOR_BACKEND", "pdfium").lower()
+    return backend if backend in BACKENDS else "pdfium"
+
+def tipos_a_extraer(tipo: str, tipo_documento: str | None = None) -> list:
+    """'todo' se reduce a los tipos de la clase del documento, si se pudo clasificar"""
+    if tipo == 'todo' and tipo_documento in TIPOS_POR_DOCUMENTO:
+        return TIPOS_POR_DOCUMENTO[tipo_documento]
+    return [tipo]
+
+def describir_documentos(documentos: list | None) -> str:
+    """Clase que se informa en la respuesta: 'programa', 'proyecto', 'unido' o 'desconocido'"""
+    if documentos and len(documentos) > 1:
+        return 'unido'
+    return (documentos[0][2] if documentos else None) or 'desconocido'
+
+def secciones_a_escanear(tipo: str, backend: str, tipo_documento: str | None = None) -> list:
+    """Secciones que pasan por extract_tables() de entrada; las rápidas se leen aparte"""
+    secciones = []
+    for tipo_extraido in tipos_a_extraer(tipo, tipo_documento):
+        secciones += [s for s in SECCIONES_POR_TIPO.get(tipo_extraido, []) if s not in secciones]
+    if backend == "pdfium":
+        return [s for s in secciones if s not in SECCIONES_RAPIDAS]
+    return secciones
+
+def variante_cache(tipo: str, por_rap: bool, backend: str) -> str:
+    return tipo + ("-por_rap" if por_rap else "") + ("-pdfplumber" if backend == "pdfplumber" else "")
+
+def generar_registros(iterar, pdf_path: str, documento, por_rap: bool = False, backend: str = "pdfplumber"):
+    """Generador del extractor; por_rap solo aplica a los RAPs y backend a programa y proyecto"""
+    if por_rap and iterar is iterar_raps:
+        return iterar_raps(pdf_path, documento, por_rap=True)
+    if iterar in (iterar_programa, iterar_proyecto):
+        return iterar(pdf_path, documento, backend=backend)
+    return iterar(pdf_path, documento)
+
+def extractores_a_ejecutar(tipo: str, tipo_documento: str | None = None) -> list:
+    """
+    (clave, generador) de los extractores que corren. Los del tipo que no
+    corresponden a la clase del documento quedan fuera (su lista sale vacía)
+    """
+    tipos = tipos_a_extraer(tipo, tipo_documento)
+    extractores = [(clave_resultado, iterar) for clave_resultado, tipos_extractor, iterar in EXTRACTORES
+                   if any(t in tipos_extractor for t in tipos)]
+    omitidos = sum(1 for _, tipos_extractor, _ in EXTRACTORES if tipo in tipos_extractor) - len(extractores)
+    if omitidos:
+        contar("extractores_omitidos", omitidos)
+    return extractores
+
+def extraer_documento(pdf_path: str, tipo: str, documento, por_rap: bool, backend: str, tipo_documento: str | None = None) -> dict:
+    """Registros de cada extractor del tipo sobre el documento ya escaneado"""
+    resultado = {clave_resultado: [] for clave_resultado, tipos, _ in EXTRACTORES if tipo in tipos}
+    for clave_resultado, iterar in extractores_a_ejecutar(tipo, tipo_documento):
+        with medir_memoria(clave_resultado):
+            resultado[clave_resultado] = list(medir_iterador(f"clasificacion.{clave_resultado}", generar_registros(iterar, pdf_path, documento, por_rap, backend)))
+    return resultado
+
+def procesar_documento(pdf_path: str, tipo: str, por_rap: bool, backend: str, rango: tuple, indice: dict,
+                       tipo_documento: str | None = None, workers: int | None = None, usar_cache: bool = True) -> dict:
+    """Uno de los documentos de un PDF unido (se ejecuta en un proceso hijo si hay varios núcleos)"""
+    documento = escanear_pdf(pdf_path, workers, secciones_a_escanear(tipo, backend, tipo_documento), indice=indice, rango=rango,
+                             usar_cache=usar_cache)
+    return extraer_documento(pdf_path, tipo, documento, por_rap, backend, tipo_documento)
+
+def procesar_documentos(pdf_path: str, tipo: str, por_rap: bool, backend: str, documentos: list,
+                        usar_cache: bool = True) -> dict:
+    """
+    PDF unido (varios programas o proyectos): cada documento se procesa por
+    separado, en paralelo si hay núcleos, así sus registros no se mezclan.
+    Las listas de registros se concatenan en orden y "documentos" dice de qué
+    clase es cada uno, qué páginas ocupa y qué tramo [desde, hasta) de cada lista le toca.
+    """
+    workers = min(workers_paginas(), len(documentos))
+    if workers <= 1:
+        partes = [procesar_documento(pdf_path, tipo, por_rap, backend, rango, indice, tipo_documento, usar_cache=usar_cache)
+                  for rango, indice, tipo_documento in documentos]
+    else:
+        # Cada hijo extrae sus páginas en serie: el paralelismo ya está entre documentos
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = [executor.submit(procesar_documento, pdf_path, tipo, por_rap, backend, rango, indice, tipo_documento, 1,
+                                       usar_cache) for rango, indice, tipo_documento in documentos]
+            partes = [futuro.result() for futuro in futuros]
+
+    resultado = {clave_resultado: [] for clave_resultado, tipos, _ in EXTRACTORES if tipo in tipos}
+    resumen = []
+    for (rango, _, tipo_documento), parte in zip(documentos, partes):
+        tramos = {}
+        for clave_resultado, registros in parte.items():
+            desde = len(resultado[clave_resultado])
+            resultado[clave_resultado].extend(registros)
+            tramos[clave_resultado] = [desde, len(resultado[clave_resultado])]
+        resumen.append({"tipo": tipo_documento or "desconocido", "paginas": list(rango), "registros": tramos})
+    resultado["documentos"] = resumen
+    return resultado
+
+def registros_con_paginas(datos: dict):
+    """(clave, registro, páginas del documento o None) de un resultado ya armado"""
+    tramos = {}
+    for documento in datos.get("documentos", []):
+        for clave_resultado, (desde, hasta) in documento["registros"].items():
+            for i in range(desde, hasta):
+                tramos[(clave_resultado, i)] = documento["paginas"]
+    for clave_resultado, registros in datos.items():
+        if clave_resultado == "documentos":
+            continue
+        for i, registro in enumerate(registros):
+            yield clave_resultado, registro, tramos.get((clave_resultado, i))
+
+def iterar_documentos(pdf_path: str, tipo: str, por_rap: bool, backend: str, documentos: list | None,
+                      resultado: dict, resumen: list, plazo: float | None = None, usar_cache: bool = True):
+    """
+    Recorre los documentos uno tras otro, con páginas perezosas, y produce
+    (clave, registro, páginas del documento o None) en cuanto cada registro se
+    finaliza. Los registros quedan además en resultado y el tramo de cada
+    documento en resumen. Con plazo corta con PlazoVencido (ver DocumentoEscaneado).
+    """
+    unido = bool(documentos) and len(documentos) > 1
+    for rango, indice, tipo_documento in documentos or [(None, None, None)]:
+        tramos = {clave_resultado: [len(registros)] * 2 for clave_resultado, registros in resultado.items()}
+        resumen.append({"tipo": tipo_documento or "desconocido", "paginas": list(rango) if rango else None,
+                        "registros": tramos})
+        with escanear_pdf(pdf_path, secciones=secciones_a_escanear(tipo, backend, tipo_documento), perezoso=True,
+                          indice=indice, rango=rango if unido else None, plazo=plazo, usar_cache=usar_cache) as documento:
+            for clave_resultado, iterar in extractores_a_ejecutar(tipo, tipo_documento):
+                tramos[clave_resultado][0] = len(resultado[clave_resultado])
+                with medir_memoria(clave_resultado):
+                    for registro in medir_iterador(f"clasificacion.{clave_resultado}", generar_registros(iterar, pdf_path, documento, por_rap, backend)):
+                        resultado[clave_resultado].append(registro)
+                        tramos[clave_resultado][1] = len(resultado[clave_resultado])
+                        yield clave_resultado, registro, list(rango) if unido else None
+
+def datos_del_corte(corte: PlazoVencido, resultado: dict) -> dict:
+    """Marca de resultado parcial y lo necesario para reanudar"""
+    contar("plazo_vencido")
+    log_warning(f"Plazo vencido: se devuelven los registros finalizados hasta la página {corte.ultima}")
+    registros = {clave_resultado: len(registros) for clave_resultado, registros in resultado.items() if clave_resultado != "documentos"}
+    # Se reanuda desde el inicio del documento (un registro puede venir de páginas anteriores
+    # al corte); basta con saber cuántos registros de cada lista ya se entregaron
+    return {"partial": True, "ultima_pagina": corte.ultima, "reanudar": {"registros": registros}}
+
+def omitir_entregados(datos: dict, reanudar: dict | None) -> dict:
+    """
+    Quita de cada lista los registros que ya se entregaron antes del corte y
+    corre los tramos de "documentos" para que sigan apuntando a sus registros
+    """
+    if not reanudar:
+        return datos
+    entregados = reanudar.get("registros", {})
+    restantes = {clave_resultado: registros[entregados.get(clave_resultado, 0):]
+                 for clave_resultado, registros in datos.items() if clave_resultado != "documentos"}
+    if "documentos" in datos:
+        restantes["documentos"] = [{
+            **documento,
+            "registros": {clave_resultado: [max(0, desde - entregados.get(clave_resultado, 0)),
+                                            max(0, hasta - entregados.get(clave_resultado, 0))]
+                          for clave_resultado, (desde, hasta) in documento["registros"].items()},
+        } for documento in datos["documentos"]]
+    return restantes
+
+def avisar_reanudacion(reanudar: dict | None, usar_cache: bool = True):
+    if reanudar and obtener_cache_paginas(usar_cache) is None:
+        log_warning("Reanudación sin cache de páginas: se vuelven a procesar las páginas ya leídas")
+
+def procesar_pdf(pdf_path: str, tipo: str, metricas: bool = False, por_rap: bool = False, backend: str | None = None,
+                 plazo: float | None = None, reanudar: dict | None = None, perfil: str | list | None = None,
+                 usar_cache: bool = True) -> dict:
     """
     Procesa un PDF y extrae información según el tipo
     Args:
         pdf_path: Ruta absoluta al PDF
         tipo: 'programa', 'competencias', 'todo'
+        metricas: agrega a la respuesta un bloque "metrics" con tiempos y contadores
+        por_rap: cada unidad de RAPs trae "raps" con conocimientos y criterios ya repartidos por RAP
+        backend: 'pdfium' o 'pdfplumber' para programa y proyecto (por defecto EXTRACTOR_BACKEND o pdfium)
+        plazo: segundos para la extracción. Al vencer se devuelven los registros ya
+            finalizados con "partial": True, "ultima_pagina" y "reanudar"
+        reanudar: el "reanudar" de una respuesta parcial. Se vuelve a extraer (las
+            páginas ya procesadas salen de la cache de páginas) y solo se devuelven
+            los registros posteriores a los entregados
+        perfil: modos de utils/perfilado.py ('cprofile,memoria,paginas' o 'todo'); guarda
+            los artefactos y agrega "perfil" con los puntos calientes a la respuesta
+        usar_cache: False no lee ni escribe la cache de resultados ni la de páginas
+            (así corre una extracción perfilada, sin tocar el entorno del proceso)
+    Si el PDF une varios programas o proyectos, cada uno se procesa por separado
+    y "data" trae además "documentos" con sus páginas (ver procesar_documentos).
+    La respuesta trae "tipo_documento" ('programa', 'proyecto', 'unido' o
+    'desconocido'); con tipo 'todo' solo corren los extractores de esa clase.
     """
+    backend = backend or backend_por_defecto()
+    modos = leer_modos(perfil)
+    if modos:
+        return perfilar(pdf_path, tipo, modos, metricas, lambda con_metricas: procesar_pdf(
+            pdf_path, tipo, con_metricas, por_rap, backend, plazo=plazo, reanudar=reanudar, usar_cache=False))
+    if metricas:
+        with recolectar() as medidas:
+            with cronometro("total"):
+                respuesta = procesar_pdf(pdf_path, tipo, por_rap=por_rap, backend=backend, plazo=plazo, reanudar=reanudar,
+                                         usar_cache=usar_cache)
+        return {**respuesta, "metrics": medidas.a_dict()}
 
-    resultado = {}
-
+    limite = time.monotonic() + plazo if plazo else None
     try:
-        if tipo in ['programa', 'todo']:
-            resultado['programa'] = extraer_programa(pdf_path)
-            
-        if tipo in ['competencias', 'todo']:
-            resultado['competencias'] = extraer_competencias(pdf_path)
-        
-        if tipo in ['raps', 'todo']:
-            resultado['unidadRaps'] = extraer_raps(pdf_path)
-            
-        if tipo in ['proyecto', 'todo']:
-            resultado['proyecto'] = extraer_proyecto(pdf_path)
-            
-        if tipo in ['fases','todo']:
-            resultado['fases'] = extraer_fases_proyecto(pdf_path)
-            
-        if tipo in ['actividades', 'todo']:
-            resultado['actividades'] = extraer_actividades_proyecto(pdf_path)
-            
-        return {"success": True, "data": resultado}
+        # Mismo PDF (mismo contenido) ya procesado: se responde sin abrirlo
+        cache = obtener_cache(usar_cache) if tipo in TIPOS else None
+        if cache:
+            clave = cache.clave(pdf_path, variante_cache(tipo, por_rap, backend))
+            en_cache = cache.leer(clave)
+            if en_cache is None:
+                contar("cache_misses")
+            else:
+                contar("cache_hits")
+                return {**en_cache, "data": omitir_entregados(en_cache["data"], reanudar)}
+
+        # Un pre-escaneo de texto da las secciones, la clase del documento y,
+        # si el PDF une varios documentos, sus límites
+        with cronometro("indice_secciones"):
+            documentos = indice_documentos(pdf_path)
+        if documentos and len(documentos) > 1:
+            contar("documentos", len(documentos))
+
+        parcial = None
+        if limite is not None:
+            # Con plazo las páginas se leen en serie a medida que los extractores las piden,
+            # así al cortar se conserva todo lo finalizado
+            avisar_reanudacion(reanudar, usar_cache)
+            resultado = {clave_resultado: [] for clave_resultado, tipos, _ in EXTRACTORES if tipo in tipos}
+            resumen = []
+            try:
+                for _ in iterar_documentos(pdf_path, tipo, por_rap, backend, documentos, resultado, resumen, limite,
+                                           usar_cache):
+                    pass
+            except PlazoVencido as corte:
+                parcial = datos_del_corte(corte, resultado)
+            if documentos and len(documentos) > 1:
+                resultado["documentos"] = resumen
+        elif documentos and len(documentos) > 1:
+            resultado = procesar_documentos(pdf_path, tipo, por_rap, backend, documentos, usar_cache)
+        else:
+            # Se abre el PDF y se extraen sus tablas una sola vez para todos los extractores,
+            # solo en las páginas de las secciones que se van a leer
+            _, indice, tipo_documento = documentos[0] if documentos else (None, None, None)
+            with medir_memoria("escaneo"):
+                documento = escanear_pdf(pdf_path, secciones=secciones_a_escanear(tipo, backend, tipo_documento), indice=indice,
+                                         usar_cache=usar_cache)
+            resultado = extraer_documento(pdf_path, tipo, documento, por_rap, backend, tipo_documento)
+
+        respuesta = {"success": True, "data": resultado, "tipo_documento": describir_documentos(documentos)}
+        if parcial:
+            respuesta.update(parcial)
+        elif cache:
+            cache.escribir(clave, respuesta)
+        return {**respuesta, "data": omitir_entregados(resultado, reanudar)}
     except Exception as e:
         return {"success": False, "error": str(e)}
+    finally:
+        vaciar_logs()
+
+def procesar_pdf_stream(pdf_path: str, tipo: str, metricas: bool = False, por_rap: bool = False, backend: str | None = None,
+                        plazo: float | None = None, reanudar: dict | None = None):
+    """
+    Igual que procesar_pdf, pero genera cada registro en cuanto el extractor lo
+    finaliza: {"tipo": "competencias", "data": {...}}. Termina con
+    {"tipo": "fin", "success": True} o {"tipo": "error", "success": False, "error": ...}.
+    Las páginas se procesan a medida que se leen, así el primer registro sale
+    antes de terminar el documento. Con metricas=True la línea "fin" trae el bloque "metrics".
+    En un PDF unido los documentos van uno tras otro y cada línea trae "paginas": [primera, última].
+    La línea "fin" trae "tipo_documento" y, si venció el plazo, "partial", "ultima_pagina"
+    y "reanudar" (ver procesar_pdf).
+    """
+    backend = backend or backend_por_defecto()
+    if metricas:
+        with recolectar() as medidas:
+            for linea in procesar_pdf_stream(pdf_path, tipo, por_rap=por_rap, backend=backend, plazo=plazo, reanudar=reanudar):
+                if linea["tipo"] == "fin":
+                    linea = {**linea, "metrics": medidas.a_dict()}
+                yield linea
+        return
+
+    limite = time.monotonic() + plazo if plazo else None
+    entregados = (reanudar or {}).get("registros", {})
+    try:
+        cache = obtener_cache() if tipo in TIPOS else None
+        if cache:
+            clave = cache.clave(pdf_path, variante_cache(tipo, por_rap, backend))
+            en_cache = cache.leer(clave)
+            if en_cache is None:
+                contar("cache_misses")
+            else:
+                contar("cache_hits")
+                vistos = {}
+                for clave_resultado, registro, paginas in registros_con_paginas(en_cache["data"]):
+                    vistos[clave_resultado] = vistos.get(clave_resultado, 0) + 1
+                    if vistos[clave_resultado] <= entregados.get(clave_resultado, 0):
+                        continue
+                    linea = {"tipo": clave_resultado, "data": registro}
+                    if paginas:
+                        linea["paginas"] = paginas
+                    yield linea
+                yield {"tipo": "fin", "success": True, "tipo_documento": en_cache.get("tipo_documento", "desconocido")}
+                return
+
+        with cronometro("indice_secciones"):
+            documentos = indice_documentos(pdf_path)
+        unido = bool(documentos) and len(documentos) > 1
+        if unido:
+            contar("documentos", len(documentos))
+        avisar_reanudacion(reanudar)
+
+        resultado = {clave_resultado: [] for clave_resultado, tipos, _ in EXTRACTORES if tipo in tipos}
+        resumen = []
+        parcial = None
+        try:
+            for clave_resultado, registro, paginas in iterar_documentos(pdf_path, tipo, por_rap, backend, documentos,
+                                                                        resultado, resumen, limite):
+                if len(resultado[clave_resultado]) <= entregados.get(clave_resultado, 0):
+                    continue
+                linea = {"tipo": clave_resultado, "data": registro}
+                if paginas:
+                    linea["paginas"] = paginas
+                yield linea
+        except PlazoVencido as corte:
+            parcial = datos_del_corte(corte, resultado)
+        if unido:
+            resultado["documentos"] = resumen
+
+        tipo_documento = describir_documentos(documentos)
+        if cache and not parcial:
+            cache.escribir(clave, {"success": True, "data": resultado, "tipo_documento": tipo_documento})
+        yield {"tipo": "fin", "success": True, "tipo_documento": tipo_documento, **(parcial or {})}
+    except Exception as e:
+        yield {"tipo": "error", "success": False, "error": str(e)}
+    finally:
+        vaciar_logs()
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
+    # Modo worker persistente: atiende muchos PDFs por proceso
+    if "--worker" in sys.argv:
+        from worker import ejecutar_worker
+        ejecutar_worker(sys.argv[1:])
+        sys.exit(0)
+
+    # API HTTP de trabajos (Flask) sobre el mismo pool de procesos
+    if "--servidor" in sys.argv:
+        from servidor import ejecutar_servidor
+        ejecutar_servidor(sys.argv[1:])
+        sys.exit(0)
+
+    # Modo lote: muchos PDFs de un directorio, glob o manifiesto
+    if "--batch" in sys.argv:
+        from batch import ejecutar_batch
+        ejecutar_batch(sys.argv[1:])
+        sys.exit(0)
+
+    # Opciones que llevan valor: el valor no cuenta como argumento posicional
+    valores = {i + 1 for i, a in enumerate(sys.argv) if a in ("--exportar", "--formato", "--plazo", "--reanudar", "--perfil")}
+    argumentos = [a for i, a in enumerate(sys.argv) if i > 0 and i not in valores and not a.startswith("--")]
+    if len(argumentos) < 2:
         print(json.dumps({
             "success": False, 
-            "error": "Uso: python main.py <ruta_pdf> <tipo>"
+            "error": "Uso: python main.py <ruta_pdf> <tipo> [--stream] [--metricas|--metricas-prometheus] [--por-rap] [--plazo SEGUNDOS] [--reanudar JSON] [--perfil cprofile,memoria,paginas|todo] [--exportar <directorio> [--formato tsv|csv]] | python main.py --worker [--workers N] [--socket RUTA] | python main.py --batch <entrada> --salida <salida> | python main.py --servidor [--puerto 5001] [--workers N]"
         }))
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
-    tipo = sys.argv[2]
+    pdf_path = argumentos[0]
+    tipo = argumentos[1]
+
+    # --metricas agrega el bloque "metrics" al JSON; --metricas-prometheus lo escribe en stderr como texto
+    prometheus = "--metricas-prometheus" in sys.argv
+    metricas = prometheus or "--metricas" in sys.argv
+    por_rap = "--por-rap" in sys.argv
+
+    # --plazo corta la extracción y devuelve lo finalizado con "partial"; --reanudar recibe su "reanudar"
+    plazo = float(sys.argv[sys.argv.index("--plazo") + 1]) if "--plazo" in sys.argv else None
+    reanudar = json.loads(sys.argv[sys.argv.index("--reanudar") + 1]) if "--reanudar" in sys.argv else None
+    # --perfil guarda cProfile, tracemalloc y tiempos por página en EXTRACTOR_PERFIL_DIR (ver utils/perfilado.py)
+    perfil = sys.argv[sys.argv.index("--perfil") + 1] if "--perfil" in sys.argv else None
+
+    # Tablas planas listas para LOAD DATA (una por tabla de la base) y cargar.sql
+    if "--exportar" in sys.argv:
+        from exportar import ejecutar_exportacion
+        indice = sys.argv.index("--exportar") + 1
+        formato = sys.argv[sys.argv.index("--formato") + 1] if "--formato" in sys.argv else "tsv"
+        if indice >= len(sys.argv):
+            print(json.dumps({"success": False, "error": "--exportar necesita un directorio"}))
+            sys.exit(1)
+        respuesta = ejecutar_exportacion(pdf_path, tipo, sys.argv[indice], formato)
+        print(json.dumps(respuesta, ensure_ascii=False, indent=2))
+        sys.exit(0 if respuesta.get("success") else 1)
+
+    # Una línea NDJSON compacta por registro, en cuanto está lista.
+    # En este modo las páginas se procesan dentro de los extractores, así que
+    # los tiempos de clasificación incluyen extract_tables
+    if "--stream" in sys.argv:
+        if perfil:
+            print(json.dumps({"success": False, "error": "--perfil no se combina con --stream"}))
+            sys.exit(1)
+        for linea in procesar_pdf_stream(pdf_path, tipo, metricas, por_rap, plazo=plazo, reanudar=reanudar):
+            if prometheus and "metrics" in linea:
+                print(a_prometheus(linea.pop("metrics")), file=sys.stderr, flush=True)
+            print(serializar(linea), flush=True)
+        sys.exit(0)
 
-    resultado = procesar_pdf(pdf_path, tipo)
-    print(json.dumps(resultado, ensure_ascii=False, indent=2))
\ No newline at end of file
+    resultado = procesar_pdf(pdf_path, tipo, metricas, por_rap, plazo=plazo, reanudar=reanudar, perfil=perfil)
+    if prometheus:
+        bloque = resultado.pop("metrics")
+        inicio = time.perf_counter()
+        texto = serializar(resultado, indent=2)
+        bloque["tiempos"]["serializacion"] = round(time.perf_counter() - inicio, 4)
+        print(a_prometheus(bloque), file=sys.stderr, flush=True)
+    else:
+        texto = serializar(resultado, indent=2)
+    print(texto)
\ No newline at end of file
@@ -0,0 +1,233 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import TimeoutError as TiempoAgotado
+
+from flask import Flask, Response, request
+
+from main import TIPOS
+from worker import PoolExtraccion, workers_por_defecto
+from utils.metricas import serializar
+from utils.logs import log_info, log_warning
+
+# === API HTTP de trabajos ===
+# POST /trabajos                 sube el PDF (campo "pdf"); responde 202 con el id, o 429 si la cola está llena
+# GET  /trabajos/<id>            estado: en_cola | procesando | terminado | error
+# GET  /trabajos/<id>/eventos    NDJSON con cada cambio de estado hasta que termina
+# GET  /trabajos/<id>/resultado  la respuesta de procesar_pdf (202 mientras no termina)
+#
+# EXTRACTOR_API_COLA: trabajos sin terminar admitidos (por defecto 4 por proceso)
+# EXTRACTOR_API_RETENCION: segundos que se guarda un trabajo terminado (por defecto 3600)
+# EXTRACTOR_API_MAX_MB: tamaño máximo del PDF subido (por defecto 50)
+
+INTERVALO_EVENTOS = 15  # segundos entre líneas de estado repetidas, para mantener viva la conexión
+
+
+def entero_entorno(nombre: str, defecto: int) -> int:
+    valor = os.environ.get(nombre, "")
+    return int(valor) if valor.isdigit() and int(valor) > 0 else defecto
+
+
+class Trabajo:
+    """Un PDF subido y el futuro de su extracción en el pool"""
+    __slots__ = ("id", "tipo", "ruta", "futuro", "creado", "iniciado", "terminado")
+
+    def __init__(self, id_trabajo: str, tipo: str, ruta: str, futuro):
+        self.id = id_trabajo
+        self.tipo = tipo
+        self.ruta = ruta
+        self.futuro = futuro
+        self.creado = time.time()
+        self.iniciado = None
+        self.terminado = None
+
+    @property
+    def estado(self) -> str:
+        if not self.futuro.done():
+            # iniciado lo marca el proceso hijo al tomar el trabajo (ver PoolExtraccion)
+            return "procesando" if self.iniciado is not None else "en_cola"
+        if self.futuro.exception() is not None:
+            return "error"
+        return "terminado" if self.futuro.result().get("success") else "error"
+
+    def resultado(self) -> dict:
+        try:
+            return self.futuro.result()
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def resumen(self) -> dict:
+        resumen = {"id": self.id, "tipo": self.tipo, "estado": self.estado, "creado": round(self.creado, 3)}
+        if self.terminado is not None:
+            resumen["segundos"] = round(self.terminado - self.creado, 3)
+        if resumen["estado"] == "error":
+            resumen["error"] = self.resultado().get("error")
+        return resumen
+
+
+class ColaTrabajos:
+    """
+    Trabajos en curso y terminados sobre un PoolExtraccion. Admite como mucho
+    `maximo` trabajos sin terminar; el resto se rechaza (429) para que el
+    cliente reintente en vez de acumular PDFs en memoria y disco.
+    """
+
+    def __init__(self, pool: PoolExtraccion, maximo: int, retencion: int, directorio: str):
+        self.pool = pool
+        self.maximo = maximo
+        self.retencion = retencion
+        self.directorio = directorio
+        self._trabajos = {}
+        self._lock = threading.Lock()
+
+    def pendientes(self) -> int:
+        return sum(1 for trabajo in self._trabajos.values() if trabajo.terminado is None)
+
+    def enviar(self, archivo, tipo: str, metricas: bool, por_rap: bool) -> Trabajo | None:
+        """Guarda el PDF y lo encola; None si la cola está llena"""
+        with self._lock:
+            self._limpiar()
+            if self.pendientes() >= self.maximo:
+                return None
+
+            id_trabajo = uuid.uuid4().hex
+            ruta = os.path.join(self.directorio, f"{id_trabajo}.pdf")
+            archivo.save(ruta)
+            trabajo = Trabajo(id_trabajo, tipo, ruta, self.pool.enviar(ruta, tipo, metricas, por_rap, id_trabajo=id_trabajo))
+            self._trabajos[id_trabajo] = trabajo
+
+        trabajo.futuro.add_done_callback(lambda _: self._al_terminar(trabajo))
+        return trabajo
+
+    def obtener(self, id_trabajo: str) -> Trabajo | None:
+        return self._trabajos.get(id_trabajo)
+
+    def al_iniciar(self, id_trabajo: str):
+        # Con el lock: el aviso puede llegar antes de que enviar() registre el trabajo
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is not None:
+                trabajo.iniciado = time.time()
+
+    def _al_terminar(self, trabajo: Trabajo):
+        trabajo.terminado = time.time()
+        # El PDF ya no hace falta: el resultado queda en el futuro
+        try:
+            os.remove(trabajo.ruta)
+        except OSError:
+            pass
+
+    def _limpiar(self):
+        """Olvida los trabajos terminados hace más de `retencion` segundos"""
+        limite = time.time() - self.retencion
+        for id_trabajo in [i for i, t in self._trabajos.items() if t.terminado is not None and t.terminado < limite]:
+            del self._trabajos[id_trabajo]
+
+
+def respuesta_json(datos: dict, estado: int = 200, headers: dict | None = None) -> Response:
+    return Response(serializar(datos), status=estado, mimetype="application/json", headers=headers)
+
+
+def crear_app(cola: ColaTrabajos) -> Flask:
+    app = Flask(__name__)
+    app.config["MAX_CONTENT_LENGTH"] = entero_entorno("EXTRACTOR_API_MAX_MB", 50) * 1024 * 1024
+
+    @app.post("/trabajos")
+    def crear_trabajo():
+        archivo = request.files.get("pdf")
+        if archivo is None:
+            return respuesta_json({"success": False, "error": "Falta el archivo 'pdf'"}, 400)
+
+        tipo = request.form.get("tipo", "todo")
+        if tipo not in TIPOS:
+            return respuesta_json({"success": False, "error": f"Tipo no válido: {tipo}"}, 400)
+        metricas = request.form.get("metricas", "").lower() in ("1", "true")
+        por_rap = request.form.get("por_rap", "").lower() in ("1", "true")
+
+        trabajo = cola.enviar(archivo, tipo, metricas, por_rap)
+        if trabajo is None:
+            return respuesta_json({"success": False, "error": "Cola de extracción llena, reintentar más tarde"}, 429,
+                                  {"Retry-After": "5"})
+        return respuesta_json({"success": True, **trabajo.resumen()}, 202, {"Location": f"/trabajos/{trabajo.id}"})
+
+    @app.get("/trabajos/<id_trabajo>")
+    def estado_trabajo(id_trabajo):
+        trabajo = cola.obtener(id_trabajo)
+        if trabajo is None:
+            return respuesta_json({"success": False, "error": "Trabajo no encontrado"}, 404)
+        return respuesta_json({"success": True, **trabajo.resumen()})
+
+    @app.get("/trabajos/<id_trabajo>/eventos")
+    def eventos_trabajo(id_trabajo):
+        trabajo = cola.obtener(id_trabajo)
+        if trabajo is None:
+            return respuesta_json({"success": False, "error": "Trabajo no encontrado"}, 404)
+
+        def generar():
+            anterior = None
+            ultimo = 0
+            while True:
+                resumen = trabajo.resumen()
+                if resumen["estado"] != anterior or time.monotonic() - ultimo >= INTERVALO_EVENTOS:
+                    yield json.dumps(resumen, ensure_ascii=False) + "\n"
+                    anterior = resumen["estado"]
+                    ultimo = time.monotonic()
+                if trabajo.futuro.done():
+                    return
+                try:
+                    trabajo.futuro.exception(timeout=0.5)
+                except TiempoAgotado:
+                    pass
+
+        return Response(generar(), mimetype="application/x-ndjson")
+
+    @app.get("/trabajos/<id_trabajo>/resultado")
+    def resultado_trabajo(id_trabajo):
+        trabajo = cola.obtener(id_trabajo)
+        if trabajo is None:
+            return respuesta_json({"success": False, "error": "Trabajo no encontrado"}, 404)
+        if not trabajo.futuro.done():
+            return respuesta_json({"success": True, **trabajo.resumen()}, 202)
+        return respuesta_json(trabajo.resultado())
+
+    @app.errorhandler(413)
+    def archivo_grande(_):
+        return respuesta_json({"success": False, "error": "El PDF supera el tamaño máximo"}, 413)
+
+    return app
+
+
+def ejecutar_servidor(args: list):
+    """
+    Uso: python main.py --servidor [--puerto 5001] [--host 127.0.0.1] [--workers N]
+    """
+    def opcion(nombre, defecto=None):
+        return args[args.index(nombre) + 1] if nombre in args else defecto
+
+    workers = int(opcion("--workers", workers_por_defecto()))
+    host = opcion("--host", "127.0.0.1")
+    puerto = int(opcion("--puerto", 5001))
+
+    # Los trabajos ya corren en paralelo; por defecto cada uno extrae sus páginas en serie
+    os.environ.setdefault("EXTRACTOR_PAGINAS_WORKERS", "1")
+
+    directorio = tempfile.mkdtemp(prefix="extractor_api_")
+    # La cola se crea después; no llega ningún aviso de inicio antes del primer trabajo
+    pool = PoolExtraccion(workers, al_iniciar=lambda id_trabajo: cola.al_iniciar(id_trabajo))
+    cola = ColaTrabajos(pool, entero_entorno("EXTRACTOR_API_COLA", 4 * workers),
+                        entero_entorno("EXTRACTOR_API_RETENCION", 3600), directorio)
+    log_info(f"API de extracción en http://{host}:{puerto} con {workers} procesos y cola de {cola.maximo}")
+
+    try:
+        crear_app(cola).run(host=host, port=puerto, threaded=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.cerrar()
+        shutil.rmtree(directorio, ignore_errors=True)
+        if cola.pendientes():
+            log_warning(f"{cola.pendientes()} trabajos sin terminar al cerrar la API")
@@ -0,0 +1,107 @@
+import os
+import threading
+from collections import OrderedDict
+from utils.metricas import contar
+
+# === Cache de bloques de competencia ===
+# Las mismas competencias (sobre todo las transversales) se repiten en muchos
+# programas. Debajo de la cache por documento, cada bloque de competencia se
+# guarda por su código de norma + un hash de sus filas, con la unidad de RAPs
+# ya repartida por RAP (por_rap): al ver un bloque igual en otro PDF se
+# reutiliza en lugar de volver a repartir conocimientos y criterios, que es
+# casi la mitad del recorrido de la sección. Los registros de "competencias" y
+# las unidades sin repartir no pasan por aquí: cerrarlos cuesta menos que
+# hashear el bloque y buscarlo.
+# Vive en la memoria del proceso (worker, servidor, lote), que es donde pasan
+# muchos PDFs: leer un bloque de disco cuesta más que volver a armarlo.
+#
+# EXTRACTOR_CACHE_BLOQUES: bloques que se guardan (por defecto 1024; 0 la desactiva).
+# EXTRACTOR_CACHE=0 también la desactiva.
+
+MAX_BLOQUES_POR_DEFECTO = 1024
+
+
+class HuellaBloque:
+    """
+    Filas de un bloque tal como vienen (no el texto normalizado): los
+    registros conservan tildes y mayúsculas, así que dos bloques que solo
+    difieren en eso no son iguales. inicio es cómo se abrió el bloque (al
+    principio de la sección o en la fila de una nueva competencia).
+
+    Se guardan referencias a las filas y se hashean una sola vez al cerrar el
+    bloque, con hash() de Python: las cadenas ya traen su hash calculado y la
+    cache vive en el proceso, donde ese hash es estable. Un hash criptográfico
+    por fila se llevaba buena parte de lo que ahorra un acierto.
+    """
+    __slots__ = ("inicio", "filas")
+
+    def __init__(self, inicio: str = ""):
+        self.inicio = inicio
+        self.filas = []
+
+    def agregar(self, celdas: list):
+        self.filas.append(celdas)
+
+    def digest(self) -> int:
+        return hash((self.inicio, tuple(map(tuple, self.filas))))
+
+
+class CacheBloques:
+    """
+    LRU en memoria de registros finalizados. Se devuelve el mismo dict en cada
+    lectura, sin copiarlo (copiar una unidad por RAP cuesta casi lo mismo que
+    armarla): después de finalizar() los registros solo se serializan, nadie
+    los modifica.
+    """
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self._bloques = OrderedDict()
+        self._lock = threading.Lock()
+
+    def leer(self, clave: tuple) -> dict | None:
+        with self._lock:
+            registro = self._bloques.get(clave)
+            if registro is None:
+                return None
+            self._bloques.move_to_end(clave)
+        return registro
+
+    def escribir(self, clave: tuple, registro: dict):
+        with self._lock:
+            self._bloques[clave] = registro
+            self._bloques.move_to_end(clave)
+            while len(self._bloques) > self.maximo:
+                self._bloques.popitem(last=False)
+
+
+_cache_bloques = None
+
+def obtener_cache_bloques(usar_cache: bool = True) -> CacheBloques | None:
+    """Cache de bloques del proceso, o None si está desactivada (usar_cache=False como en obtener_cache)"""
+    global _cache_bloques
+    valor = os.environ.get("EXTRACTOR_CACHE_BLOQUES", "")
+    maximo = int(valor) if valor.isdigit() else MAX_BLOQUES_POR_DEFECTO
+    if not usar_cache or os.environ.get("EXTRACTOR_CACHE", "1") == "0" or maximo == 0:
+        return None
+    if _cache_bloques is None:
+        _cache_bloques = CacheBloques(maximo)
+    return _cache_bloques
+
+
+def cerrar_bloque(tipo: str, codigo: str | None, huella: HuellaBloque, cerrar, usar_cache: bool = True) -> dict:
+    """
+    Registro finalizado del bloque: el guardado si ya se vio un bloque igual
+    (mismo tipo de registro, código de norma y hash de filas), si no el que devuelve cerrar().
+    """
+    cache = obtener_cache_bloques(usar_cache)
+    if cache is None or not codigo:
+        return cerrar()
+    clave = (tipo, codigo, huella.digest())
+    registro = cache.leer(clave)
+    if registro is not None:
+        contar("bloques_reutilizados")
+        return registro
+    registro = cerrar()
+    cache.escribir(clave, registro)
+    return registro
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from utils.logs import log_debug
+
+# Subir cuando cambie la lógica de los extractores: invalida todo lo guardado
+VERSION_EXTRACTORES = "3"
+
+DIRECTORIO_POR_DEFECTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "extracciones")
+MAX_MB_POR_DEFECTO = 256
+
+DIRECTORIO_PAGINAS_POR_DEFECTO = os.path.join(os.path.dirname(DIRECTORIO_POR_DEFECTO), "paginas")
+# Una escritura por página: el límite se revisa cada tantas escrituras y no en cada una
+DESALOJAR_PAGINAS_CADA = 32
+
+def hash_archivo(pdf_path: str) -> str:
+    """SHA-256 del contenido del PDF"""
+    sha = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+class CacheResultados:
+    """
+    Cache en disco de respuestas {"success", "data"} de procesar_pdf.
+    La clave es el SHA-256 del PDF + la versión de los extractores + el tipo,
+    así el mismo PDF subido por distintos coordinadores no se vuelve a procesar.
+    También guarda las tablas de cada página (ver obtener_cache_paginas).
+    """
+
+    def __init__(self, directorio: str, max_bytes: int, desalojar_cada: int = 1):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.desalojar_cada = desalojar_cada
+        self._escrituras = 0
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, pdf_path: str, tipo: str) -> str:
+        return f"{hash_archivo(pdf_path)}-v{VERSION_EXTRACTORES}-{tipo}"
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, clave + ".json")
+
+    def leer(self, clave: str) -> dict | None:
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                resultado = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # Marcar como usado recientemente para el LRU
+        try:
+            os.utime(ruta)
+        except FileNotFoundError:
+            pass
+
+        log_debug(f"Resultado tomado de la cache: {clave}")
+        return resultado
+
+    def escribir(self, clave: str, resultado: dict):
+        """Escritura atómica: archivo temporal en el mismo directorio + os.replace"""
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, ensure_ascii=False)
+            os.replace(temporal, self._ruta(clave))
+        except Exception:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+        with self._lock:
+            self._escrituras += 1
+            toca = self._escrituras % self.desalojar_cada == 0
+        if toca:
+            self.desalojar()
+
+    def desalojar(self):
+        """Elimina las entradas usadas hace más tiempo hasta quedar bajo el límite"""
+        entradas = []
+        total = 0
+        for entrada in os.scandir(self.directorio):
+            if not entrada.name.endswith(".json"):
+                continue
+            try:
+                info = entrada.stat()
+            except FileNotFoundError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, entrada.path))
+            total += info.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, tamano, ruta in sorted(entradas):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                # Otro worker ya la eliminó
+                pass
+            total -= tamano
+            if total <= self.max_bytes:
+                break
+
+
+_cache = None
+
+def obtener_cache(usar_cache: bool = True) -> CacheResultados | None:
+    """
+    Cache compartida del proceso, configurada por entorno:
+    EXTRACTOR_CACHE=0 la desactiva, EXTRACTOR_CACHE_DIR y EXTRACTOR_CACHE_MAX_MB la ajustan.
+    Con usar_cache=False (una extracción perfilada) devuelve None sin tocar el entorno.
+    """
+    global _cache
+    if not usar_cache or os.environ.get("EXTRACTOR_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        directorio = os.environ.get("EXTRACTOR_CACHE_DIR", DIRECTORIO_POR_DEFECTO)
+        max_mb = int(os.environ.get("EXTRACTOR_CACHE_MAX_MB", MAX_MB_POR_DEFECTO))
+        _cache = CacheResultados(directorio, max_mb * 1024 * 1024)
+    return _cache
+
+
+_cache_paginas = None
+
+def obtener_cache_paginas(usar_cache: bool = True) -> CacheResultados | None:
+    """
+    Cache de las tablas detectadas en cada página, por hash del contenido de la página:
+    al volver a subir un PDF con pocos cambios solo se procesan las páginas modificadas.
+    EXTRACTOR_CACHE=0 o EXTRACTOR_CACHE_PAGINAS=0 la desactivan; EXTRACTOR_CACHE_PAGINAS_DIR
+    y EXTRACTOR_CACHE_PAGINAS_MAX_MB la ajustan. usar_cache=False como en obtener_cache.
+    """
+    global _cache_paginas
+    if not usar_cache or os.environ.get("EXTRACTOR_CACHE", "1") == "0" or os.environ.get("EXTRACTOR_CACHE_PAGINAS", "1") == "0":
+        return None
+    if _cache_paginas is None:
+        directorio = os.environ.get("EXTRACTOR_CACHE_PAGINAS_DIR", DIRECTORIO_PAGINAS_POR_DEFECTO)
+        max_mb = int(os.environ.get("EXTRACTOR_CACHE_PAGINAS_MAX_MB", MAX_MB_POR_DEFECTO))
+        _cache_paginas = CacheResultados(directorio, max_mb * 1024 * 1024, DESALOJAR_PAGINAS_CADA)
+    return _cache_paginas
@@ -0,0 +1,403 @@
+import gc
+import hashlib
+import os
+import time
+import weakref
+import pdfplumber
+from concurrent.futures import ProcessPoolExecutor
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+from pdfminer.psparser import PSLiteral
+from utils.pdf_helpers import norm
+from utils.secciones import indice_secciones, secciones_sin_indice
+from utils.cache_resultados import CacheResultados, obtener_cache_paginas
+from utils.memoria import memoria_excedida
+from utils.plantillas import PATRON_SUBCONJUNTO, detectar_tablas, obtener_plantillas
+from utils.metricas import contar, cronometro, metricas_actuales
+from utils.logs import log_warning
+
+# Por debajo de este número de páginas el costo de levantar el pool domina
+PAGINAS_MINIMAS_PARALELO = 24
+
+# Con la memoria sobre el techo, el PDF se reabre como mucho cada tantas páginas
+PAGINAS_ENTRE_REAPERTURAS = 8
+
+# Subir cuando cambie la forma de detectar tablas: invalida la cache de páginas
+VERSION_TABLAS = "2"
+
+class PlazoVencido(Exception):
+    """Se alcanzó el plazo de la extracción antes de procesar una página nueva"""
+
+    def __init__(self, pagina: int, ultima: int | None):
+        super().__init__(f"Plazo vencido antes de la página {pagina}")
+        self.pagina = pagina
+        self.ultima = ultima
+
+
+# === Estructuras del documento escaneado ===
+class FilaTabla:
+    """Fila de una tabla con sus textos ya normalizados"""
+    __slots__ = ("celdas", "celda_izq", "texto", "texto_norm")
+
+    def __init__(self, celdas: list):
+        self.celdas = celdas
+        self.celda_izq = norm(celdas[0] or "") if celdas else ""
+        self.texto = " ".join([str(c).strip() for c in celdas if c]).strip()
+        self.texto_norm = norm(self.texto)
+
+
+class PaginaEscaneada:
+    """Tablas de una página, en el orden en que las detecta pdfplumber"""
+    __slots__ = ("numero", "tablas")
+
+    def __init__(self, numero: int, tablas: list):
+        self.numero = numero
+        self.tablas = tablas
+
+
+class DocumentoEscaneado:
+    """
+    Resultado de recorrer el PDF una sola vez. Solo incluye las páginas que
+    pertenecen a alguna de las secciones pedidas (o todas si no hay índice).
+
+    En modo perezoso el PDF queda abierto y cada página se procesa la primera
+    vez que un extractor la pide; las siguientes lecturas la reutilizan. Con
+    plazo (instante de time.monotonic()) una página que no está en la cache
+    pedida después del plazo corta la lectura con PlazoVencido.
+
+    rango (primera, última) son las páginas del documento escaneado, aunque
+    numeros solo tenga las de las secciones pedidas. usar_cache=False (una
+    extracción perfilada) también apaga la cache de bloques de los extractores.
+    """
+    __slots__ = ("ruta", "numeros", "secciones", "plazo", "rango", "usar_cache", "ultima", "_paginas", "_pdf", "_cache",
+                 "_desde_apertura")
+
+    def __init__(self, ruta: str, numeros: list, secciones: dict | None = None, paginas: list | None = None, pdf=None,
+                 cache: CacheResultados | None = None, plazo: float | None = None, rango: tuple | None = None,
+                 usar_cache: bool = True):
+        self.ruta = ruta
+        self.numeros = numeros
+        self.secciones = secciones
+        self.plazo = plazo
+        self.rango = rango
+        self.usar_cache = usar_cache
+        self.ultima = max((pagina.numero for pagina in paginas or []), default=None)
+        self._paginas = {pagina.numero: pagina for pagina in paginas or []}
+        self._pdf = pdf
+        self._cache = cache
+        self._desde_apertura = 0
+
+    @property
+    def paginas(self) -> list:
+        return [self.pagina(numero) for numero in self.numeros]
+
+    def pagina(self, numero: int) -> PaginaEscaneada:
+        pagina = self._paginas.get(numero)
+        if pagina is None:
+            self._pdf, self._desde_apertura = aliviar_memoria(self._pdf, self.ruta, self._desde_apertura)
+            pagina, clave = leer_pagina_cache(self._pdf, numero, self._cache)
+            if pagina is None:
+                if self.plazo is not None and time.monotonic() >= self.plazo:
+                    raise PlazoVencido(numero, self.ultima)
+                pagina = extraer_pagina(self._pdf, numero, self._cache, clave)
+            self._paginas[numero] = pagina
+            self.ultima = max(self.ultima or 0, numero)
+        return pagina
+
+    def tiene_seccion(self, seccion: str) -> bool:
+        """Si se escanearon todas las páginas de la sección"""
+        if self.secciones is None:
+            return True
+        return set(self.secciones.get(seccion, [])).issubset(self.numeros)
+
+    def paginas_seccion(self, seccion: str):
+        """Páginas de una sección en orden; todas las del documento si no hay índice"""
+        if self.secciones is None:
+            numeros = self.numeros
+        else:
+            incluidas = set(self.numeros)
+            numeros = [n for n in self.secciones.get(seccion, []) if n in incluidas]
+        for numero in numeros:
+            yield self.pagina(numero)
+
+    def cerrar(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def construir_pagina(numero: int, tablas_crudas: list, segundos: float | None = None) -> PaginaEscaneada:
+    """Convierte la salida de extract_tables() en filas normalizadas"""
+    inicio = time.perf_counter()
+    tablas = [[FilaTabla(fila) for fila in tabla] for tabla in tablas_crudas]
+
+    metricas = metricas_actuales()
+    if metricas is not None:
+        metricas.sumar_tiempo("normalizacion", time.perf_counter() - inicio)
+        if segundos is not None:
+            metricas.registrar_pagina(numero, segundos, len(tablas), sum(len(tabla) for tabla in tablas))
+
+    return PaginaEscaneada(numero, tablas)
+
+
+def extraer_pagina(pdf, numero: int, cache: CacheResultados | None = None, clave: str | None = None) -> PaginaEscaneada:
+    """Detecta las tablas de una página (desde 1) del PDF abierto; con clave las guarda en la cache"""
+    inicio = time.perf_counter()
+    page = pdf.pages[numero - 1]
+    try:
+        tablas = detectar_tablas(page, obtener_plantillas())
+    finally:
+        # Los objetos de layout de la página ya no hacen falta: las filas quedan en PaginaEscaneada
+        page.close()
+    segundos = time.perf_counter() - inicio
+    if cache is not None and clave:
+        cache.escribir(clave, tablas)
+    return construir_pagina(numero, tablas, segundos)
+
+
+def aliviar_memoria(pdf, pdf_path: str, desde_apertura: int) -> tuple:
+    """
+    (pdf, páginas leídas desde que se abrió). Con la memoria sobre el techo
+    (EXTRACTOR_MEMORIA_MAX_MB) reabre el PDF: pdfminer suelta los objetos que
+    fue resolviendo en las páginas anteriores.
+    """
+    if desde_apertura < PAGINAS_ENTRE_REAPERTURAS or not memoria_excedida():
+        return pdf, desde_apertura + 1
+    contar("memoria.reaperturas")
+    pdf.close()
+    gc.collect()
+    return pdfplumber.open(pdf_path), 1
+
+
+# === Cache de páginas ===
+# Huellas de los objetos indirectos ya vistos, por documento abierto: las
+# fuentes y formularios se comparten entre páginas y se hashean una sola vez
+_huellas_objetos = weakref.WeakKeyDictionary()
+
+# Nombres de fuente: sin el prefijo de subconjunto, que cambia en cada exportación
+CLAVES_NOMBRE_FUENTE = {"BaseFont", "FontName"}
+
+
+def huella_objeto(objeto, sha, memo: dict, camino: set, clave: str | None = None):
+    """
+    Agrega al hash un objeto PDF con todo lo que referencia: diccionarios,
+    listas y streams (atributos y bytes decodificados; de las imágenes solo los
+    atributos, sus píxeles no cambian las tablas). Cada referencia se resume
+    una vez en memo; camino corta los ciclos.
+    """
+    if isinstance(objeto, PDFObjRef):
+        objid = objeto.objid
+        if objid not in memo:
+            if objid in camino:
+                sha.update(b"<ciclo>")
+                return
+            camino.add(objid)
+            sub = hashlib.sha256()
+            huella_objeto(resolve1(objeto), sub, memo, camino, clave)
+            camino.discard(objid)
+            memo[objid] = sub.digest()
+        sha.update(memo[objid])
+    elif isinstance(objeto, dict):
+        sha.update(b"{")
+        for nombre in sorted(objeto):
+            sha.update(f"/{nombre}".encode())
+            huella_objeto(objeto[nombre], sha, memo, camino, nombre)
+        sha.update(b"}")
+    elif isinstance(objeto, (list, tuple)):
+        sha.update(b"[")
+        for elemento in objeto:
+            huella_objeto(elemento, sha, memo, camino)
+        sha.update(b"]")
+    elif isinstance(objeto, PDFStream):
+        huella_objeto(objeto.attrs, sha, memo, camino)
+        if getattr(resolve1(objeto.attrs.get("Subtype")), "name", None) != "Image":
+            sha.update(objeto.get_data())
+    elif isinstance(objeto, PSLiteral):
+        nombre = str(objeto.name)
+        sha.update(f"/{PATRON_SUBCONJUNTO.sub('', nombre) if clave in CLAVES_NOMBRE_FUENTE else nombre}".encode())
+    elif isinstance(objeto, bytes):
+        sha.update(PATRON_SUBCONJUNTO.sub("", objeto.decode("latin-1")).encode("latin-1")
+                   if clave in CLAVES_NOMBRE_FUENTE else objeto)
+    else:
+        sha.update(repr(objeto).encode())
+
+
+def clave_pagina(page) -> str:
+    """
+    Hash de lo que determina las tablas de la página: los content streams
+    decodificados, el tamaño y los recursos completos (formularios XObject,
+    fuentes con su programa, ToUnicode y codificación). La cache de páginas se
+    comparte entre documentos: dos páginas con el mismo contenido pero otros
+    recursos no deben compartir tablas.
+    """
+    sha = hashlib.sha256(f"{VERSION_TABLAS}|{pdfplumber.__version__}|{page.mediabox}|{page.rotation}".encode())
+    objeto = page.page_obj
+    for contenido in objeto.contents:
+        sha.update(resolve1(contenido).get_data())
+
+    memo = _huellas_objetos.setdefault(page.pdf, {})
+    huella_objeto(objeto.resources or {}, sha, memo, set())
+    return sha.hexdigest()
+
+
+def leer_pagina_cache(pdf, numero: int, cache: CacheResultados | None) -> tuple:
+    """(página tomada de la cache o None, clave de la página o None si no hay cache)"""
+    if cache is None:
+        return None, None
+    try:
+        clave = clave_pagina(pdf.pages[numero - 1])
+    except Exception:
+        # Página con estructura rara: se procesa sin cache
+        return None, None
+
+    tablas = cache.leer(clave)
+    if tablas is None:
+        return None, clave
+    contar("paginas_cache")
+    return construir_pagina(numero, tablas), clave
+
+
+def workers_paginas() -> int:
+    """Procesos para extraer tablas en paralelo: EXTRACTOR_PAGINAS_WORKERS o núcleos disponibles"""
+    valor = os.environ.get("EXTRACTOR_PAGINAS_WORKERS")
+    if valor and valor.isdigit() and int(valor) > 0:
+        return int(valor)
+    return os.cpu_count() or 1
+
+
+def dividir_paginas(indices: list, partes: int) -> list:
+    """Divide la lista de páginas en bloques contiguos de tamaño parecido"""
+    partes = max(1, min(partes, len(indices)))
+    tamano, resto = divmod(len(indices), partes)
+    bloques = []
+    inicio = 0
+    for i in range(partes):
+        fin = inicio + tamano + (1 if i < resto else 0)
+        bloques.append(indices[inicio:fin])
+        inicio = fin
+    return bloques
+
+
+def extraer_tablas_paginas(pdf_path: str, indices: list) -> list:
+    """
+    Se ejecuta en un proceso hijo: (tablas crudas, segundos) de las páginas
+    indicadas (desde 0). El tiempo viaja al proceso padre para las métricas.
+    """
+    resultado = []
+    plantillas = obtener_plantillas()
+    with pdfplumber.open(pdf_path) as pdf:
+        for i in indices:
+            inicio = time.perf_counter()
+            page = pdf.pages[i]
+            try:
+                tablas = detectar_tablas(page, plantillas)
+            finally:
+                page.close()
+            resultado.append((tablas, time.perf_counter() - inicio))
+    return resultado
+
+
+def escanear_pdf(pdf_path: str, workers: int | None = None, secciones: list | None = None, perezoso: bool = False,
+                 indice: dict | None = None, rango: tuple | None = None, plazo: float | None = None,
+                 usar_cache: bool = True) -> DocumentoEscaneado:
+    """
+    Abre el PDF una vez y extrae las tablas de cada página una sola vez.
+    Todos los extractores leen de este mismo documento.
+
+    Si se indican las secciones que se van a leer, un pre-escaneo de texto con
+    pdfium decide qué páginas las contienen y solo en esas se detectan tablas.
+
+    En documentos largos las páginas se reparten entre varios procesos; las
+    filas se vuelven a ordenar por página, así el resultado es el mismo que en serie.
+
+    Con perezoso=True no se extrae nada por adelantado: el documento queda
+    abierto (usar con `with`) y cada página se procesa cuando se lee.
+
+    Las páginas cuyo contenido ya se procesó antes (mismo hash, ver
+    clave_pagina) toman sus tablas de la cache de páginas (salvo con usar_cache=False).
+
+    Con indice se usa ese índice de secciones en lugar de pre-escanear, y con
+    rango (primera, última) solo se leen esas páginas: así se escanea uno de
+    los documentos de un PDF unido (ver indice_documentos).
+
+    plazo (time.monotonic()) solo aplica en modo perezoso, ver DocumentoEscaneado.
+    """
+    if workers is None:
+        workers = workers_paginas()
+
+    if indice is None and secciones is not None:
+        with cronometro("indice_secciones"):
+            indice = indice_secciones(pdf_path)
+
+    with cronometro("apertura"):
+        pdf = pdfplumber.open(pdf_path)
+    primera, ultima = rango or (1, len(pdf.pages))
+    numeros = list(range(primera, ultima + 1))
+    if indice is not None and secciones is not None:
+        faltantes = secciones_sin_indice(indice, secciones)
+        if faltantes:
+            # Un marcador que pdfium no leyó no deja la sección vacía: se busca en todas las páginas
+            contar("secciones_sin_indice", len(faltantes))
+            log_warning(f"Secciones sin páginas en el índice de {os.path.basename(pdf_path)} ({', '.join(faltantes)}): "
+                        f"se buscan en las páginas {primera}-{ultima}")
+            indice = {**indice, **{seccion: list(numeros) for seccion in faltantes}}
+        necesarias = set()
+        for seccion in secciones:
+            necesarias.update(indice.get(seccion, []))
+        numeros = [n for n in numeros if n in necesarias]
+
+    cache = obtener_cache_paginas(usar_cache)
+    if perezoso:
+        return DocumentoEscaneado(pdf_path, numeros, indice, pdf=pdf, cache=cache, plazo=plazo, rango=(primera, ultima),
+                                  usar_cache=usar_cache)
+
+    # Sobre el techo de memoria no se levantan procesos hijos (cada uno abre el PDF completo)
+    poca_memoria = memoria_excedida()
+    if poca_memoria:
+        contar("memoria.serie")
+        log_warning(f"Memoria sobre el techo, páginas de {os.path.basename(pdf_path)} en serie")
+
+    try:
+        paginas = {}
+        claves = {}
+        for numero in numeros:
+            pagina, claves[numero] = leer_pagina_cache(pdf, numero, cache)
+            if pagina is not None:
+                paginas[numero] = pagina
+
+        # Solo las páginas nuevas o modificadas pasan por extract_tables
+        pendientes = [n for n in numeros if n not in paginas]
+        if poca_memoria or workers <= 1 or len(pendientes) < PAGINAS_MINIMAS_PARALELO:
+            desde_apertura = 0
+            for numero in pendientes:
+                pdf, desde_apertura = aliviar_memoria(pdf, pdf_path, desde_apertura)
+                paginas[numero] = extraer_pagina(pdf, numero, cache, claves[numero])
+            return DocumentoEscaneado(pdf_path, numeros, indice, list(paginas.values()), rango=(primera, ultima),
+                                      usar_cache=usar_cache)
+    finally:
+        pdf.close()
+
+    indices = [numero - 1 for numero in pendientes]
+    bloques = dividir_paginas(indices, workers)
+    with ProcessPoolExecutor(max_workers=len(bloques)) as executor:
+        futuros = [executor.submit(extraer_tablas_paginas, pdf_path, bloque) for bloque in bloques]
+        for bloque, futuro in zip(bloques, futuros):
+            for i, (tablas, segundos) in zip(bloque, futuro.result()):
+                if cache is not None and claves[i + 1]:
+                    cache.escribir(claves[i + 1], tablas)
+                paginas[i + 1] = construir_pagina(i + 1, tablas, segundos)
+
+    return DocumentoEscaneado(pdf_path, numeros, indice, list(paginas.values()), rango=(primera, ultima),
+                              usar_cache=usar_cache)
+
+
+def obtener_documento(pdf_path: str, documento: DocumentoEscaneado | None = None, seccion: str | None = None) -> DocumentoEscaneado:
+    """Reutiliza el documento ya escaneado o escanea solo la sección pedida si no se pasó uno"""
+    if documento is not None:
+        return documento
+    return escanear_pdf(pdf_path, secciones=[seccion] if seccion else None)
@@ -0,0 +1,178 @@
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from utils.documento_pdf import DocumentoEscaneado, FilaTabla, PaginaEscaneada, escanear_pdf
+from utils.secciones import indice_secciones, secciones_sin_indice
+from utils.metricas import contar, cronometro
+from utils.logs import log_debug, log_warning
+
+# === Lectura rápida de tablas etiqueta → valor con pdfium ===
+# Las celdas de los PDF del SENA son rectángulos dibujados: con sus bordes y las
+# cajas de texto de pdfium se arman las filas sin el análisis de layout de
+# pdfplumber (unas 20 veces más rápido por página). Sirve para tablas simples
+# de etiqueta → valor; las tablas grandes siguen con extract_tables().
+
+BACKENDS = ["pdfplumber", "pdfium"]
+
+TOLERANCIA = 2.5      # puntos: bordes dobles, filas alineadas
+ANCHO_MINIMO = 8      # por debajo es una línea separadora, no una celda
+ALTO_MINIMO = 6
+TOLERANCIA_LINEA = 3  # textos cuyo centro vertical difiere menos están en la misma línea
+
+
+def cajas_celdas(page) -> list:
+    """Rectángulos (izq, abajo, der, arriba) que no contienen otro: las celdas de la página"""
+    cajas = []
+    for objeto in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH], max_depth=2):
+        izq, abajo, der, arriba = objeto.get_bounds()
+        if der - izq >= ANCHO_MINIMO and arriba - abajo >= ALTO_MINIMO:
+            cajas.append((izq, abajo, der, arriba))
+
+    # Bordes dobles (relleno + trazo): queda la caja más chica
+    cajas.sort(key=lambda c: (c[2] - c[0]) * (c[3] - c[1]))
+    unicas = []
+    for caja in cajas:
+        if not any(all(abs(caja[i] - otra[i]) <= TOLERANCIA for i in range(4)) for otra in unicas):
+            unicas.append(caja)
+
+    def contiene(caja, otra):
+        return (otra is not caja and otra[0] >= caja[0] - TOLERANCIA and otra[1] >= caja[1] - TOLERANCIA
+                and otra[2] <= caja[2] + TOLERANCIA and otra[3] <= caja[3] + TOLERANCIA)
+
+    return [caja for caja in unicas if not any(contiene(caja, otra) for otra in unicas)]
+
+
+def trozos_texto(textpage) -> list:
+    """Cajas de texto de la página con su texto; sin las copias de la negrita simulada"""
+    trozos = []
+    for i in range(textpage.count_rects()):
+        izq, abajo, der, arriba = textpage.get_rect(i)
+        texto = " ".join(textpage.get_text_bounded(izq, abajo, der, arriba).split())
+        if not texto:
+            continue
+        # La negrita simulada dibuja el mismo texto varias veces con un corrimiento mínimo
+        if any(t[4] == texto and abs(t[0] - izq) <= 1.5 and abs(t[1] - abajo) <= 1.5 for t in trozos):
+            continue
+        trozos.append((izq, abajo, der, arriba, texto))
+    return trozos
+
+
+def texto_en(trozos: list, izq: float, abajo: float, der: float, arriba: float) -> str:
+    """Texto de los trozos cuyo centro cae en el rectángulo, en orden de lectura"""
+    dentro = [t for t in trozos if izq <= (t[0] + t[2]) / 2 <= der and abajo <= (t[1] + t[3]) / 2 <= arriba]
+    dentro.sort(key=lambda t: (-t[3], t[0]))
+
+    lineas = []
+    for trozo in dentro:
+        centro = (trozo[1] + trozo[3]) / 2
+        if lineas and abs(lineas[-1][0] - centro) <= TOLERANCIA_LINEA:
+            lineas[-1][1].append(trozo)
+        else:
+            lineas.append((centro, [trozo]))
+    return "\n".join(" ".join(t[4] for t in sorted(linea, key=lambda t: t[0])) for _, linea in lineas).strip()
+
+
+def filas_pagina(page) -> list:
+    """
+    Filas de la página como listas de celdas, de arriba hacia abajo. Las celdas
+    con el mismo borde superior forman una fila; el espacio sin borde a la
+    derecha de una celda (valores de formularios) cuenta como otra celda.
+    """
+    textpage = page.get_textpage()
+    try:
+        trozos = trozos_texto(textpage)
+    finally:
+        textpage.close()
+
+    cajas = cajas_celdas(page)
+    if not cajas:
+        return []
+    borde_derecho = max(caja[2] for caja in cajas)
+
+    grupos = []
+    for caja in sorted(cajas, key=lambda c: (-c[3], c[0])):
+        if grupos and abs(grupos[-1][0][3] - caja[3]) <= TOLERANCIA:
+            grupos[-1].append(caja)
+        else:
+            grupos.append([caja])
+
+    filas = []
+    for grupo in grupos:
+        grupo.sort(key=lambda c: c[0])
+        celdas = []
+        for i, caja in enumerate(grupo):
+            celdas.append(texto_en(trozos, *caja))
+            siguiente = grupo[i + 1][0] if i + 1 < len(grupo) else borde_derecho
+            if siguiente - caja[2] >= ANCHO_MINIMO:
+                celdas.append(texto_en(trozos, caja[2], caja[1], siguiente, caja[3]))
+        filas.append(celdas)
+    return filas
+
+
+def escanear_pdfium(pdf_path: str, secciones: list | None = None, indice: dict | None = None) -> DocumentoEscaneado:
+    """Igual que escanear_pdf, pero arma las filas con pdfium (una tabla por página)"""
+    if indice is None and secciones is not None:
+        with cronometro("indice_secciones"):
+            indice = indice_secciones(pdf_path)
+
+    with cronometro("pdfium"):
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            numeros = list(range(1, len(pdf) + 1))
+            if indice is not None and secciones is not None:
+                necesarias = set()
+                for seccion in secciones:
+                    necesarias.update(indice.get(seccion, []))
+                numeros = [n for n in numeros if n in necesarias]
+
+            paginas = []
+            for numero in numeros:
+                page = pdf[numero - 1]
+                try:
+                    filas = filas_pagina(page)
+                finally:
+                    page.close()
+                paginas.append(PaginaEscaneada(numero, [[FilaTabla(celdas) for celdas in filas]]))
+        finally:
+            pdf.close()
+
+    return DocumentoEscaneado(pdf_path, numeros, indice, paginas)
+
+
+def extraer_con_respaldo(recorrer, pdf_path: str, documento: DocumentoEscaneado | None, seccion: str, confiable) -> list:
+    """
+    Registros de la sección leída con pdfium. Si no sale ninguno o alguno no es
+    confiable, la sección se vuelve a leer con extract_tables() (del documento
+    ya escaneado si la incluye). Se usa el índice de secciones del documento,
+    así en un PDF unido solo se leen las páginas de ese documento.
+
+    Si el pre-escaneo no encontró la sección en un documento de su clase (un
+    marcador que pdfium no leyó), se busca con extract_tables() en todas sus páginas.
+    """
+    indice = documento.secciones if documento is not None else None
+    rango = documento.rango if documento is not None else None
+    if indice is None:
+        with cronometro("indice_secciones"):
+            indice = indice_secciones(pdf_path)
+
+    if indice is not None and secciones_sin_indice(indice, [seccion]):
+        contar(f"pdfium.sin_indice.{seccion}")
+        return list(recorrer(escanear_pdf(pdf_path, secciones=[seccion], indice=indice, rango=rango)))
+    # La sección es de otra clase de documento: pdfplumber tampoco leería ninguna página
+    if indice is not None and not indice.get(seccion):
+        return []
+
+    try:
+        registros = list(recorrer(escanear_pdfium(pdf_path, [seccion], indice)))
+    except Exception as e:
+        log_warning(f"Lectura rápida de '{seccion}' falló, se usa pdfplumber: {e}")
+        registros = []
+
+    if registros and all(confiable(registro) for registro in registros):
+        contar(f"pdfium.{seccion}")
+        return registros
+
+    contar(f"pdfium.respaldo.{seccion}")
+    log_debug(f"Lectura rápida de '{seccion}' incompleta, se usa extract_tables()")
+    if documento is None or not documento.tiene_seccion(seccion):
+        documento = escanear_pdf(pdf_path, secciones=[seccion], indice=indice, rango=rango)
+    return list(recorrer(documento))
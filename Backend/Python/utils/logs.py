@@ -0,0 +1,114 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+# === Logs compartidos ===
+# Todo va a stderr para no contaminar stdout (ahí sale el JSON).
+# EXTRACTOR_LOG_NIVEL: debug | info (por defecto) | warning | error
+# EXTRACTOR_LOG_FORMATO: texto (por defecto) | json, una línea por registro
+# Las líneas se acumulan y se escriben juntas: al llenarse el buffer, cada
+# INTERVALO_VACIADO segundos, ante un error y al terminar cada extracción.
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+NIVELES = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+NOMBRES = {valor: nombre for nombre, valor in NIVELES.items()}
+
+MAX_LINEAS_BUFFER = 200
+INTERVALO_VACIADO = 0.5
+
+
+class Bitacora:
+    """Logs con nivel mínimo y buffer en memoria"""
+
+    def __init__(self, nivel: int = INFO, formato: str = "texto", salida=None):
+        self.nivel = nivel
+        self.formato = formato
+        self.salida = salida
+        self._buffer = []
+        self._ultimo_vaciado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def escribir(self, nivel: int, mensaje, campos: dict):
+        if nivel < self.nivel:
+            return
+        mensaje = str(mensaje)
+
+        if self.formato == "json":
+            linea = json.dumps({"ts": round(time.time(), 3), "nivel": NOMBRES[nivel], "mensaje": mensaje, **campos},
+                               ensure_ascii=False, default=str)
+        elif campos:
+            linea = f"{mensaje} {' '.join(f'{clave}={valor}' for clave, valor in campos.items())}"
+        else:
+            linea = mensaje
+
+        with self._lock:
+            self._buffer.append(linea)
+            vencido = time.monotonic() - self._ultimo_vaciado >= INTERVALO_VACIADO
+            if nivel >= ERROR or vencido or len(self._buffer) >= MAX_LINEAS_BUFFER:
+                self._vaciar()
+
+    def vaciar(self):
+        with self._lock:
+            self._vaciar()
+
+    def _vaciar(self):
+        self._ultimo_vaciado = time.monotonic()
+        if not self._buffer:
+            return
+        texto = "\n".join(self._buffer) + "\n"
+        self._buffer.clear()
+        salida = self.salida or sys.stderr
+        try:
+            salida.write(texto)
+            salida.flush()
+        except (OSError, ValueError):
+            # stderr cerrado (p. ej. el proceso padre ya terminó)
+            pass
+
+
+def bitacora_desde_entorno() -> Bitacora:
+    nivel = NIVELES.get(os.environ.get("EXTRACTOR_LOG_NIVEL", "info").lower(), INFO)
+    formato = os.environ.get("EXTRACTOR_LOG_FORMATO", "texto").lower()
+    return Bitacora(nivel, formato)
+
+
+_bitacora = bitacora_desde_entorno()
+atexit.register(_bitacora.vaciar)
+
+
+def _reiniciar_en_hijo():
+    _bitacora._buffer = []
+    _bitacora._lock = threading.Lock()
+
+
+# Con fork el hijo heredaría el buffer sin escribir y lo repetiría
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_bitacora.vaciar, after_in_child=_reiniciar_en_hijo)
+
+
+def vaciar_logs():
+    """Escribe lo acumulado; se llama al terminar cada extracción"""
+    _bitacora.vaciar()
+
+
+def log_debug(mensaje, **campos):
+    _bitacora.escribir(DEBUG, mensaje, campos)
+
+
+def log_info(mensaje, **campos):
+    _bitacora.escribir(INFO, mensaje, campos)
+
+
+def log_warning(mensaje, **campos):
+    _bitacora.escribir(WARNING, mensaje, campos)
+
+
+def log_error(mensaje, **campos):
+    _bitacora.escribir(ERROR, mensaje, campos)
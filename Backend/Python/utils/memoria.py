@@ -0,0 +1,87 @@
+import ctypes
+import os
+import sys
+from utils.logs import log_warning
+
+try:
+    import resource
+except ImportError:
+    # Windows no tiene el módulo resource
+    resource = None
+
+# === Techo de memoria ===
+# EXTRACTOR_MEMORIA_MAX_MB: al superarlo el escaneo pasa a la estrategia de
+# poca memoria (páginas en serie, sin procesos hijos, y el PDF se reabre para
+# soltar los objetos que pdfminer va acumulando). Sin definir o 0: sin techo.
+# El RSS se lee de /proc en Linux, con GetProcessMemoryInfo en Windows y con
+# resource (pico) en macOS.
+
+
+def memoria_maxima_mb() -> int:
+    valor = os.environ.get("EXTRACTOR_MEMORIA_MAX_MB", "")
+    return int(valor) if valor.isdigit() else 0
+
+
+class _ContadoresMemoria(ctypes.Structure):
+    """PROCESS_MEMORY_COUNTERS de psapi.h"""
+    _fields_ = [
+        ("cb", ctypes.c_ulong),
+        ("PageFaultCount", ctypes.c_ulong),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t),
+    ]
+
+
+def _rss_windows_mb() -> float | None:
+    """Working set del proceso (el RSS de Windows)"""
+    try:
+        kernel32 = ctypes.WinDLL("kernel32")
+        psapi = ctypes.WinDLL("psapi")
+        kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+        psapi.GetProcessMemoryInfo.argtypes = [ctypes.c_void_p, ctypes.POINTER(_ContadoresMemoria), ctypes.c_ulong]
+        contadores = _ContadoresMemoria()
+        contadores.cb = ctypes.sizeof(contadores)
+        if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(contadores), contadores.cb):
+            return None
+    except (OSError, AttributeError):
+        return None
+    return contadores.WorkingSetSize / (1024 * 1024)
+
+
+def rss_actual_mb() -> float | None:
+    """Memoria residente actual del proceso; None si no se puede medir"""
+    if sys.platform == "win32":
+        return _rss_windows_mb()
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    # Sin /proc (macOS): el pico es la mejor aproximación disponible
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+_sin_medicion_avisada = False
+
+def memoria_excedida() -> bool:
+    global _sin_medicion_avisada
+    maximo = memoria_maxima_mb()
+    if not maximo:
+        return False
+    rss = rss_actual_mb()
+    if rss is None:
+        if not _sin_medicion_avisada:
+            _sin_medicion_avisada = True
+            log_warning(f"EXTRACTOR_MEMORIA_MAX_MB={maximo} no tiene efecto: no se puede medir la memoria del proceso")
+        return False
+    return rss >= maximo
@@ -0,0 +1,136 @@
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+
+# === Métricas de una extracción ===
+# Solo se recolectan dentro de recolectar(); fuera de él cronometro/contar no hacen nada,
+# así la instrumentación no cuesta cuando no se pidieron métricas.
+
+class Metricas:
+    """Tiempos acumulados (segundos), contadores y detalle por página de una extracción"""
+    __slots__ = ("tiempos", "contadores", "paginas")
+
+    def __init__(self):
+        self.tiempos = {}
+        self.contadores = {}
+        self.paginas = []
+
+    def sumar_tiempo(self, nombre: str, segundos: float):
+        self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + segundos
+
+    def contar(self, nombre: str, cantidad: int = 1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def registrar_pagina(self, numero: int, segundos: float, tablas: int, filas: int):
+        self.paginas.append({"pagina": numero, "segundos": round(segundos, 4), "tablas": tablas, "filas": filas})
+        self.sumar_tiempo("extract_tables", segundos)
+        self.contar("paginas")
+        self.contar("tablas", tablas)
+        self.contar("filas", filas)
+
+    def a_dict(self) -> dict:
+        return {
+            "tiempos": {nombre: round(segundos, 4) for nombre, segundos in self.tiempos.items()},
+            "contadores": dict(self.contadores),
+            "paginas": sorted(self.paginas, key=lambda p: p["pagina"]),
+        }
+
+
+_actual = contextvars.ContextVar("metricas", default=None)
+
+
+def a_prometheus(bloque: dict) -> str:
+    """Bloque "metrics" en formato de texto de Prometheus"""
+    lineas = ["# TYPE extractor_segundos gauge"]
+    lineas += [f'extractor_segundos{{etapa="{nombre}"}} {segundos}' for nombre, segundos in bloque["tiempos"].items()]
+    lineas.append("# TYPE extractor_total counter")
+    lineas += [f'extractor_total{{contador="{nombre}"}} {cantidad}' for nombre, cantidad in bloque["contadores"].items()]
+    lineas.append("# TYPE extractor_pagina_segundos gauge")
+    lineas += [f'extractor_pagina_segundos{{pagina="{p["pagina"]}"}} {p["segundos"]}' for p in bloque["paginas"]]
+    return "\n".join(lineas) + "\n"
+
+
+def metricas_actuales() -> Metricas | None:
+    return _actual.get()
+
+
+@contextmanager
+def recolectar():
+    """Activa la recolección de métricas durante el bloque"""
+    metricas = Metricas()
+    token = _actual.set(metricas)
+    try:
+        yield metricas
+    finally:
+        _actual.reset(token)
+
+
+@contextmanager
+def cronometro(nombre: str):
+    metricas = _actual.get()
+    if metricas is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        metricas.sumar_tiempo(nombre, time.perf_counter() - inicio)
+
+
+def contar(nombre: str, cantidad: int = 1):
+    metricas = _actual.get()
+    if metricas is not None:
+        metricas.contar(nombre, cantidad)
+
+
+def medir_iterador(nombre: str, iterable):
+    """Suma el tiempo que tarda el generador en producir cada registro (no el del consumidor)"""
+    metricas = _actual.get()
+    if metricas is None:
+        return iterable
+    return _iterar_midiendo(metricas, nombre, iter(iterable))
+
+
+def _iterar_midiendo(metricas: Metricas, nombre: str, iterador):
+    while True:
+        inicio = time.perf_counter()
+        try:
+            elemento = next(iterador)
+        except StopIteration:
+            metricas.sumar_tiempo(nombre, time.perf_counter() - inicio)
+            return
+        metricas.sumar_tiempo(nombre, time.perf_counter() - inicio)
+        metricas.contar(f"registros.{nombre.split('.')[-1]}")
+        yield elemento
+
+
+# json.dumps con opciones arma un JSONEncoder nuevo en cada llamada; en el
+# modo --stream y en el lote se serializa una línea por registro
+_CODIFICADOR = json.JSONEncoder(ensure_ascii=False)
+
+
+def _a_json(valor, **kwargs) -> str:
+    return json.dumps(valor, ensure_ascii=False, **kwargs) if kwargs else _CODIFICADOR.encode(valor)
+
+
+def serializar(respuesta: dict, **kwargs) -> str:
+    """
+    JSON de la respuesta (o de una línea NDJSON). Si trae "metrics", mide la
+    serialización del resto y la agrega al bloque antes de incluirlo.
+    """
+    if "metrics" not in respuesta:
+        return _a_json(respuesta, **kwargs)
+
+    metricas = respuesta["metrics"]
+    sin_metricas = {clave: valor for clave, valor in respuesta.items() if clave != "metrics"}
+
+    inicio = time.perf_counter()
+    texto = _a_json(sin_metricas, **kwargs)
+    metricas["tiempos"]["serializacion"] = round(time.perf_counter() - inicio, 4)
+
+    # Se agrega el bloque antes de la llave de cierre del objeto ya serializado
+    separador = ",\n  " if kwargs.get("indent") else ", "
+    bloque = _a_json(metricas)
+    return texto[:-1].rstrip() + f'{separador}"metrics": {bloque}' + ("\n}" if kwargs.get("indent") else "}")
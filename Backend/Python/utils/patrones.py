@@ -0,0 +1,81 @@
+import re
+
+# === Expresiones regulares compiladas una sola vez ===
+# Los extractores las aplican fila por fila; compilarlas aquí evita la
+# búsqueda en la cache interna de re en cada llamada.
+
+# Horas: "3120 horas", "48 HORAS"
+PATRON_HORAS = re.compile(r"(\d+)\s*horas?", re.IGNORECASE)
+PATRON_HORAS_COMPETENCIA = re.compile(r"\b(\d{1,4})\s*(HORA|HORAS)\b", re.IGNORECASE)
+
+# Viñetas, numeración y guiones al inicio de un ítem
+PATRON_VINETA = re.compile(r"^[*•\-\d.\s]+")
+
+# Encabezados y pies de página anclados al inicio (sobre texto normalizado, usar con match).
+# Los de texto fijo se buscan como subcadenas en es_ruido: una alternancia con
+# ellos pierde la búsqueda por prefijo literal de re y resulta más lenta
+PATRON_RUIDO_INICIO = re.compile("|".join([
+    r"\d+/\d+/\d+\s+\d+:\d+",  # fechas
+    r"PAGINA\s+\d+",
+    r"SOFTWARE$",
+    r"DENOMINACION$",
+]))
+PATRON_PALABRA_5 = re.compile(r"[a-zA-Z]{5,}")
+PATRON_PALABRA_4 = re.compile(r"[a-zA-ZÁÉÍÓÚáéíóúÑñ]{4,}")
+
+# Letras repetidas por la negrita simulada: "TTOOTTAALL" -> "TOTAL"
+PATRON_REPETIDOS = re.compile(r"(.)\1+")
+
+# Encabezado "4.6 CONOCIMIENTOS" que se cuela entre los resultados de aprendizaje
+PATRON_CONOCIMIENTOS_46 = re.compile(r"^\s*4\.6\s*CONOCIMIENTOS")
+
+# RAPs estructurados (mismo criterio que RapParser en el backend Node)
+PATRON_HAY_TITULOS = re.compile(r"\n[A-ZÑÁÉÍÓÚ][A-ZÑÁÉÍÓÚ\s]{20,}:")
+PATRON_DIVIDIR_TITULOS = re.compile(r"\n(?=[A-ZÑÁÉÍÓÚ][A-ZÑÁÉÍÓÚ\s]{15,}:)")
+PATRON_CODIGO_RAP = re.compile(r"^(\d{1,2})\s+(.+)")
+PATRON_ASTERISCO = re.compile(r"^\*\s*")
+PATRON_NUMERO_INICIAL = re.compile(r"^\d+\s+")
+PATRON_DOS_PUNTOS_FINAL = re.compile(r":$")
+
+# Etiquetas de formulario: numeración al inicio o dos puntos al final ("1.2 Regional:")
+PATRON_NUMERACION_ETIQUETA = re.compile(r"^[\d.\s]+|:$")
+PATRON_CODIGO_LARGO = re.compile(r"^\d{5,}$")
+PATRON_ESPACIOS = re.compile(r"\s+")
+PATRON_ENTERO = re.compile(r"\d+")
+
+# RAPs de una actividad: "593343 - 01 IDENTIFICAR LA DINÁMICA..." (código corto y denominación).
+# La denominación llega hasta el siguiente "código -": como ese corte solo puede
+# empezar en un dígito, avanza por tramos sin dígitos en vez de probar el
+# lookahead en cada carácter (la mitad del tiempo que con .+?). No cruza \x00
+# para poder buscar en una columna entera (ver buscar_en_columna)
+PATRON_CODIGO_RAP_ACTIVIDAD = re.compile(
+    r"\d{6,7}\s*-\s*(\d{1,2})\s+([A-ZÀÁÉÍÓÚÑ](?:[^\d\x00]+|\d)+?)(?=\d{6,7}\s*-|\x00|\Z)"
+)
+
+# Separador de celdas al buscar en una columna: no es espacio ni letra, así
+# \s, \b y las clases de caracteres no lo cruzan
+SEPARADOR_CELDAS = "\x00"
+
+
+def buscar_en_columna(patron: re.Pattern, celdas: list) -> list:
+    """
+    Todas las coincidencias del patrón en cada celda, con una sola pasada del
+    regex sobre la columna completa: [[match, ...] por celda]. El patrón no
+    debe cruzar SEPARADOR_CELDAS ni usar ^/$ (se anclarían a la columna).
+    """
+    resultado = [[] for _ in celdas]
+    if not celdas:
+        return resultado
+
+    inicios = []
+    posicion = 0
+    for celda in celdas:
+        inicios.append(posicion)
+        posicion += len(celda or "") + 1
+
+    indice = 0
+    for coincidencia in patron.finditer(SEPARADOR_CELDAS.join(celda or "" for celda in celdas)):
+        while indice + 1 < len(inicios) and inicios[indice + 1] <= coincidencia.start():
+            indice += 1
+        resultado[indice].append(coincidencia)
+    return resultado
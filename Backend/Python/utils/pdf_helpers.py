@@ -1,57 +1,96 @@
-import re
 import unicodedata
+from functools import lru_cache
+from utils.patrones import PATRON_HORAS, PATRON_PALABRA_4, PATRON_PALABRA_5, PATRON_RUIDO_INICIO, PATRON_VINETA
+
+# === Normalización ===
+def _sin_tildes_nfd(s: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
+
+# Tabla de traducción precalculada para Latin-1 y Latin Extended-A (á→a, Ñ→N, ...)
+_TABLA_TILDES = {
+    codigo: _sin_tildes_nfd(chr(codigo))
+    for codigo in range(0x80, 0x250)
+    if _sin_tildes_nfd(chr(codigo)) != chr(codigo)
+}
 
-# === Funciones auxiliares ===
 def strip_accents(s: str) -> str:
     """Quita tildes"""
-    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
+    if s.isascii():
+        return s
+    s = s.translate(_TABLA_TILDES)
+    if s.isascii():
+        return s
+    # Caracteres fuera de la tabla: camino lento con NFD
+    return _sin_tildes_nfd(s)
 
+@lru_cache(maxsize=8192)
 def norm(s: str) -> str:
-    """Normaliza texto: mayúsculas y espacios"""
-    s = strip_accents(s or "").upper()
-    s = re.sub(r"\s+", " ", s)
-    return s.strip()
+    """Normaliza texto: mayúsculas y espacios (memoizado: los encabezados se repiten en cada página)"""
+    return " ".join(strip_accents(s or "").upper().split())
+
+
+# === Clasificación de filas ===
+class Clasificador:
+    """
+    Clasifica un texto ya normalizado contra varias palabras clave a la vez.
+    Recibe {palabra_clave: nombre} en orden de prioridad (varias claves pueden
+    compartir nombre); clasificar devuelve el nombre de la primera que aparece,
+    igual que una cadena de if/elif.
+
+    Nota: una alternancia con re o un Aho-Corasick en Python resultan más
+    lentos que las búsquedas de subcadena de CPython para filas de este tamaño.
+    """
+
+    def __init__(self, claves: dict):
+        self._claves = tuple(claves.items())
+
+    def clasificar(self, texto: str) -> str | None:
+        for clave, nombre in self._claves:
+            if clave in texto:
+                return nombre
+        return None
+
+    def alguno(self, texto: str) -> bool:
+        for clave, _ in self._claves:
+            if clave in texto:
+                return True
+        return False
+
 
 def extraer_horas(texto: str) -> str:
     """Extrae el valor de horas de un texto (ej: '3120 horas' -> '3120 horas')"""
     if not texto:
         return ""
     # Buscar patrón de número seguido de "horas"
-    match = re.search(r'(\d+)\s*horas?', texto, re.IGNORECASE)
+    match = PATRON_HORAS.search(texto)
     if match:
         return f"{match.group(1)} horas"
     return ""
 
 def limpiar_item(texto):
     """Limpia viñetas o caracteres extra de un ítem"""
-    texto = re.sub(r"^[*•\-\d.\s]+", "", texto.strip())
+    texto = PATRON_VINETA.sub("", texto.strip())
     return texto.strip()
 
+# Encabezados y pies de página de texto fijo (los anclados están en PATRON_RUIDO_INICIO)
+CLASIFICADOR_RUIDO = Clasificador({clave: "ruido" for clave in [
+    "LINEA TECNOLOGICA",
+    "RED TECNOLOGICA",
+    "RED DE CONOCIMIENTO",
+    "GESTION DE LA INFORMACION",
+    "TECNOLOGIAS DE LA INFORMACION",
+    "DISENO Y DESARROLLO",
+    "INFORMACION Y LAS COMUNICACIONES",
+]})
+
 def es_ruido(texto):
     """Detecta si el texto es ruido (header, footer, etc.)"""
     texto_norm = norm(texto)
-    
-    # Lista de patrones de ruido
-    ruido_patterns = [
-        r"LINEA TECNOLOGICA",
-        r"RED TECNOLOGICA",
-        r"RED DE CONOCIMIENTO",
-        r"GESTION DE LA INFORMACION",
-        r"TECNOLOGIAS DE LA INFORMACION",
-        r"DISENO Y DESARROLLO",
-        r"^\d+/\d+/\d+\s+\d+:\d+",  # fechas
-        r"^PAGINA\s+\d+",
-        r"INFORMACION Y LAS COMUNICACIONES",
-        r"^SOFTWARE$",
-        r"^DENOMINACION$"
-    ]
-    
-    for pattern in ruido_patterns:
-        if re.search(pattern, texto_norm):
-            return True
+    if PATRON_RUIDO_INICIO.match(texto_norm) or CLASIFICADOR_RUIDO.alguno(texto_norm):
+        return True
     
     # Si el texto es muy corto (menos de 10 caracteres) y no tiene contenido sustancial
-    if len(texto.strip()) < 10 and not re.search(r"[a-zA-Z]{5,}", texto):
+    if len(texto.strip()) < 10 and not PATRON_PALABRA_5.search(texto):
         return True
         
     return False
@@ -65,7 +104,7 @@ def es_contenido_valido(texto):
         return False
     
     # Debe tener al menos una palabra completa
-    if not re.search(r"[a-zA-ZÁÉÍÓÚáéíóúÑñ]{4,}", texto):
+    if not PATRON_PALABRA_4.search(texto):
         return False
         
     return True
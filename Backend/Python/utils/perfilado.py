@@ -0,0 +1,183 @@
+import contextvars
+import cProfile
+import json
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from utils.cache_resultados import DIRECTORIO_POR_DEFECTO, hash_archivo
+from utils.logs import log_info, log_warning
+
+# === Perfilado de una extracción ===
+# Para ver por qué una subida fue lenta sin reproducirla en local:
+#   cprofile  cProfile alrededor de procesar_pdf (.prof, se abre con pstats o snakeviz)
+#   memoria   tracemalloc por extractor: pico, neto y líneas que más asignan (.snap por extractor)
+#   paginas   histograma del tiempo de extract_tables por página
+# Los archivos van a EXTRACTOR_PERFIL_DIR (por defecto .cache/perfiles) con el
+# hash del PDF en el nombre, y la respuesta trae un resumen en "perfil".
+# Con perfil no se usan la cache de resultados ni la de páginas (procesar_pdf
+# con usar_cache=False): si no, un PDF ya procesado solo mostraría la lectura de la cache.
+# cProfile y tracemalloc hacen varias veces más lenta cada página, así que con
+# paginas y alguno de ellos los tiempos por página salen de una pasada aparte, sin instrumentar.
+# Sin perfil activo los ganchos solo leen una ContextVar: no cuestan nada.
+# cProfile solo ve el proceso actual (no los hijos que extraen páginas en paralelo).
+
+MODOS = ["cprofile", "memoria", "paginas"]
+
+DIRECTORIO_PERFILES_POR_DEFECTO = os.path.join(os.path.dirname(DIRECTORIO_POR_DEFECTO), "perfiles")
+
+# Funciones con más tiempo propio que se incluyen en la respuesta
+MAX_HOTSPOTS = 15
+# Líneas que más memoria asignan por extractor
+MAX_LINEAS_MEMORIA = 5
+# Límites (segundos) de los tramos del histograma de páginas
+TRAMOS_PAGINAS = [0.05, 0.1, 0.25, 0.5, 1, 2, 5]
+MAX_PAGINAS_LENTAS = 5
+
+
+def leer_modos(valor) -> list:
+    """'cprofile,paginas', 'todo' o una lista -> modos válidos en orden; los desconocidos se avisan y se ignoran"""
+    if not valor:
+        return []
+    pedidos = valor.split(",") if isinstance(valor, str) else list(valor)
+    pedidos = [modo.strip().lower() for modo in pedidos if modo.strip()]
+    if "todo" in pedidos:
+        return list(MODOS)
+    for modo in pedidos:
+        if modo not in MODOS:
+            log_warning(f"Modo de perfil desconocido: {modo} (válidos: {', '.join(MODOS)})")
+    return [modo for modo in MODOS if modo in pedidos]
+
+
+class Perfil:
+    """Artefactos y resumen de una extracción perfilada"""
+    __slots__ = ("modos", "prefijo", "archivos", "memoria")
+
+    def __init__(self, modos: list, prefijo: str):
+        self.modos = modos
+        self.prefijo = prefijo
+        self.archivos = []
+        self.memoria = {}
+
+    def archivo(self, sufijo: str) -> str:
+        ruta = f"{self.prefijo}{sufijo}"
+        self.archivos.append(ruta)
+        return ruta
+
+
+_actual = contextvars.ContextVar("perfil", default=None)
+
+
+@contextmanager
+def medir_memoria(nombre: str):
+    """Pico, neto y líneas que más asignan durante el bloque (solo con el modo memoria)"""
+    perfil = _actual.get()
+    if perfil is None or "memoria" not in perfil.modos:
+        yield
+        return
+
+    antes = tracemalloc.take_snapshot()
+    inicial, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        actual, pico = tracemalloc.get_traced_memory()
+        despues = tracemalloc.take_snapshot()
+        despues.dump(perfil.archivo(f".memoria-{nombre}.snap"))
+        # Sin las asignaciones del propio tracemalloc al tomar las instantáneas
+        propias = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        lineas = despues.filter_traces(propias).compare_to(antes.filter_traces(propias), "lineno")[:MAX_LINEAS_MEMORIA]
+        perfil.memoria[nombre] = {
+            "pico_kb": round((pico - inicial) / 1024, 1),
+            "neto_kb": round((actual - inicial) / 1024, 1),
+            "lineas": [{"linea": f"{ruta_corta(linea.traceback[0].filename)}:{linea.traceback[0].lineno}",
+                        "kb": round(linea.size_diff / 1024, 1)} for linea in lineas],
+        }
+
+
+def ruta_corta(ruta: str) -> str:
+    """Las dos últimas partes de la ruta: 'pdfplumber/table.py'"""
+    return "/".join(ruta.replace("\\", "/").split("/")[-2:])
+
+
+def hotspots(perfilador: cProfile.Profile) -> list:
+    """Funciones con más tiempo propio"""
+    estadisticas = pstats.Stats(perfilador).stats
+    ordenadas = sorted(estadisticas.items(), key=lambda item: item[1][2], reverse=True)[:MAX_HOTSPOTS]
+    return [{
+        "funcion": f"{ruta_corta(archivo)}:{linea}({funcion})",
+        "llamadas": llamadas,
+        "segundos_propios": round(propio, 4),
+        "segundos_acumulados": round(acumulado, 4),
+    } for (archivo, linea, funcion), (_, llamadas, propio, acumulado, _) in ordenadas]
+
+
+def histograma_paginas(paginas: list) -> dict:
+    """Páginas por tramo de tiempo y las más lentas (de metrics.paginas)"""
+    etiquetas = [f"<={limite}s" for limite in TRAMOS_PAGINAS] + [f">{TRAMOS_PAGINAS[-1]}s"]
+    tramos = dict.fromkeys(etiquetas, 0)
+    for pagina in paginas:
+        indice = next((i for i, limite in enumerate(TRAMOS_PAGINAS) if pagina["segundos"] <= limite), len(TRAMOS_PAGINAS))
+        tramos[etiquetas[indice]] += 1
+    lentas = sorted(paginas, key=lambda p: p["segundos"], reverse=True)[:MAX_PAGINAS_LENTAS]
+    return {
+        "tramos": tramos,
+        "mas_lentas": [{"pagina": p["pagina"], "segundos": p["segundos"]} for p in lentas],
+        "total_segundos": round(sum(p["segundos"] for p in paginas), 4),
+    }
+
+
+def perfilar(pdf_path: str, tipo: str, modos: list, metricas: bool, ejecutar) -> dict:
+    """
+    Corre ejecutar(con_metricas) (procesar_pdf sin perfil y sin caches) con los
+    modos pedidos, guarda los artefactos y agrega "perfil" a la respuesta.
+    El modo paginas usa las métricas por página de una pasada sin cProfile ni
+    tracemalloc; si además se piden cprofile o memoria, esos corren en una
+    segunda pasada. Las métricas solo quedan en la respuesta si se pidieron
+    (y, si hubo pasada limpia, son las de esa pasada).
+    """
+    directorio = os.environ.get("EXTRACTOR_PERFIL_DIR", DIRECTORIO_PERFILES_POR_DEFECTO)
+    os.makedirs(directorio, exist_ok=True)
+    perfil = Perfil(modos, os.path.join(directorio, f"{hash_archivo(pdf_path)[:16]}-{tipo}"))
+    resumen = {"modos": modos, "sin_cache": True}
+
+    respuesta = None
+    if "paginas" in modos:
+        respuesta = ejecutar(True)
+        bloque = respuesta.get("metrics") if metricas else respuesta.pop("metrics", None)
+        resumen["paginas"] = histograma_paginas((bloque or {}).get("paginas", []))
+
+    perfilador = cProfile.Profile() if "cprofile" in modos else None
+    if perfilador is not None or "memoria" in modos:
+        metricas_limpias = respuesta.get("metrics") if respuesta else None
+        iniciar_tracemalloc = "memoria" in modos and not tracemalloc.is_tracing()
+        if iniciar_tracemalloc:
+            tracemalloc.start()
+        token = _actual.set(perfil)
+        try:
+            if perfilador is not None:
+                perfilador.enable()
+            try:
+                respuesta = ejecutar(metricas and metricas_limpias is None)
+            finally:
+                if perfilador is not None:
+                    perfilador.disable()
+        finally:
+            _actual.reset(token)
+            if iniciar_tracemalloc:
+                tracemalloc.stop()
+        if metricas_limpias is not None:
+            respuesta["metrics"] = metricas_limpias
+
+    if perfilador is not None:
+        perfilador.dump_stats(perfil.archivo(".prof"))
+        resumen["hotspots"] = hotspots(perfilador)
+    if "memoria" in modos:
+        resumen["memoria"] = perfil.memoria
+
+    with open(perfil.archivo(".json"), "w", encoding="utf-8") as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+    resumen["archivos"] = perfil.archivos
+    log_info(f"Perfil de {os.path.basename(pdf_path)} en {directorio}")
+    return {**respuesta, "perfil": resumen}
@@ -0,0 +1,178 @@
+import hashlib
+import os
+import re
+import threading
+from pdfminer.pdftypes import resolve1
+from pdfplumber.table import TableSettings
+from utils.cache_resultados import CacheResultados, DIRECTORIO_POR_DEFECTO
+from utils.metricas import contar
+from utils.logs import log_debug
+
+# === Plantillas de diseño ===
+# Los programas y proyectos del SENA salen de una plantilla fija: las tablas
+# ocupan siempre la misma región de la página. La primera vez que se procesa
+# una familia de documentos (huella: tamaño, rotación y fuentes de la página)
+# se detecta en la página completa y se guarda la región que cubre todas sus
+# tablas junto con los table_settings usados; en los documentos siguientes de
+# esa familia la detección corre solo sobre page.crop(región). Con otra huella,
+# o si una tabla llega al borde del recorte, se vuelve a la página completa.
+#
+# EXTRACTOR_PLANTILLAS=1 las activa (por defecto no: la mayor parte del costo
+# de extract_tables es leer los objetos de la página, que el recorte no evita).
+# EXTRACTOR_PLANTILLAS_DIR cambia dónde se guardan.
+
+# Subir cuando cambie la forma de detectar tablas o de armar la huella
+VERSION_PLANTILLAS = "1"
+
+DIRECTORIO_PLANTILLAS_POR_DEFECTO = os.path.join(os.path.dirname(DIRECTORIO_POR_DEFECTO), "plantillas")
+
+# Páginas completas que se miran antes de confiar en la región aprendida
+PAGINAS_PARA_APRENDER = 8
+
+# Holgura (puntos) alrededor de la región y distancia al borde que cuenta como tabla cortada
+MARGEN_REGION = 6
+TOLERANCIA_BORDE = 1
+
+# table_settings con que se aprende una familia (los de pdfplumber por defecto)
+AJUSTES_POR_DEFECTO = {}
+
+# "ABCDEF+Arial" -> "Arial"
+PATRON_SUBCONJUNTO = re.compile(r"^[A-Z]{6}\+")
+
+
+def fuentes_pagina(page) -> list:
+    """Fuentes de la página como "nombre=BaseFont", sin el prefijo de subconjunto y ordenadas"""
+    fuentes = resolve1((page.page_obj.resources or {}).get("Font")) or {}
+    nombres = []
+    for nombre, fuente in fuentes.items():
+        base = (resolve1(fuente) or {}).get("BaseFont")
+        base = getattr(base, "name", base)
+        nombres.append(f"{nombre}={PATRON_SUBCONJUNTO.sub('', str(base))}")
+    return sorted(nombres)
+
+
+def huella_pagina(page) -> str | None:
+    """Identifica la familia de la página; None si no se puede leer su estructura"""
+    try:
+        datos = f"{VERSION_PLANTILLAS}|{page.mediabox}|{page.rotation}|{'|'.join(fuentes_pagina(page))}"
+    except Exception:
+        return None
+    return hashlib.sha256(datos.encode()).hexdigest()[:32]
+
+
+class Plantilla:
+    """Región (x0, top, x1, bottom) que cubre las tablas de una familia y los table_settings para detectarlas"""
+    __slots__ = ("region", "ajustes", "paginas")
+
+    def __init__(self, region: list | None = None, ajustes: dict | None = None, paginas: int = 0):
+        self.region = region
+        self.ajustes = AJUSTES_POR_DEFECTO if ajustes is None else ajustes
+        self.paginas = paginas
+
+    @property
+    def lista(self) -> bool:
+        return self.region is not None and self.paginas >= PAGINAS_PARA_APRENDER
+
+    def ampliar(self, cajas: list) -> bool:
+        """Suma las cajas de las tablas de una página completa; True si la región creció"""
+        self.paginas += 1
+        if not cajas:
+            return False
+        x0 = min(c[0] for c in cajas)
+        top = min(c[1] for c in cajas)
+        x1 = max(c[2] for c in cajas)
+        bottom = max(c[3] for c in cajas)
+        if self.region is None:
+            self.region = [x0, top, x1, bottom]
+            return True
+        nueva = [min(self.region[0], x0), min(self.region[1], top), max(self.region[2], x1), max(self.region[3], bottom)]
+        crecio = nueva != self.region
+        self.region = nueva
+        return crecio
+
+    def a_dict(self) -> dict:
+        return {"region": self.region, "ajustes": self.ajustes, "paginas": self.paginas}
+
+
+class Plantillas:
+    """Plantillas por huella, guardadas en disco para los documentos siguientes"""
+
+    def __init__(self, cache: CacheResultados):
+        self.cache = cache
+        self._plantillas = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, huella: str) -> Plantilla:
+        with self._lock:
+            plantilla = self._plantillas.get(huella)
+            if plantilla is None:
+                guardada = self.cache.leer(huella) or {}
+                plantilla = Plantilla(guardada.get("region"), guardada.get("ajustes"), guardada.get("paginas", 0))
+                self._plantillas[huella] = plantilla
+            return plantilla
+
+    def aprender(self, huella: str, plantilla: Plantilla, cajas: list):
+        with self._lock:
+            lista_antes = plantilla.lista
+            crecio = plantilla.ampliar(cajas)
+            # Se guarda al quedar lista y cada vez que la región crece después
+            if plantilla.lista and (crecio or not lista_antes):
+                self.cache.escribir(huella, plantilla.a_dict())
+                log_debug(f"Plantilla {huella} guardada: región {plantilla.region}")
+
+
+def region_recorte(page, plantilla: Plantilla) -> tuple:
+    """Región de la plantilla con holgura, dentro de la página"""
+    x0, top, x1, bottom = plantilla.region
+    return (max(page.bbox[0], x0 - MARGEN_REGION), max(page.bbox[1], top - MARGEN_REGION),
+            min(page.bbox[2], x1 + MARGEN_REGION), min(page.bbox[3], bottom + MARGEN_REGION))
+
+
+def tabla_cortada(caja: tuple, recorte: tuple, pagina: tuple) -> bool:
+    """Si la tabla llega a un lado del recorte que queda dentro de la página (pudo quedar cortada)"""
+    for lado, signo in ((0, 1), (1, 1), (2, -1), (3, -1)):
+        dentro = (recorte[lado] - pagina[lado]) * signo > TOLERANCIA_BORDE
+        if dentro and abs(caja[lado] - recorte[lado]) <= TOLERANCIA_BORDE:
+            return True
+    return False
+
+
+def detectar_tablas(page, plantillas: "Plantillas | None") -> list:
+    """
+    Igual que page.extract_tables(), pero con plantilla lista para la huella
+    de la página detecta solo dentro de su región.
+    """
+    if plantillas is None:
+        return page.extract_tables()
+    huella = huella_pagina(page)
+    if huella is None:
+        return page.extract_tables()
+
+    plantilla = plantillas.obtener(huella)
+    ajustes = TableSettings.resolve(plantilla.ajustes)
+    if plantilla.lista:
+        recorte = region_recorte(page, plantilla)
+        encontradas = page.crop(recorte).find_tables(ajustes)
+        if not any(tabla_cortada(tabla.bbox, recorte, page.bbox) for tabla in encontradas):
+            contar("plantillas.recortadas")
+            return [tabla.extract(**(ajustes.text_settings or {})) for tabla in encontradas]
+        # Una tabla sale de la región: se detecta en la página completa y la región se amplía
+        contar("plantillas.respaldo")
+
+    encontradas = page.find_tables(ajustes)
+    plantillas.aprender(huella, plantilla, [tabla.bbox for tabla in encontradas])
+    return [tabla.extract(**(ajustes.text_settings or {})) for tabla in encontradas]
+
+
+_plantillas = None
+
+def obtener_plantillas() -> Plantillas | None:
+    """Plantillas compartidas del proceso; None si EXTRACTOR_PLANTILLAS no está en 1"""
+    global _plantillas
+    if os.environ.get("EXTRACTOR_PLANTILLAS", "0") != "1":
+        return None
+    if _plantillas is None:
+        directorio = os.environ.get("EXTRACTOR_PLANTILLAS_DIR", DIRECTORIO_PLANTILLAS_POR_DEFECTO)
+        # Cada plantilla ocupa unos cientos de bytes: el límite solo evita crecer sin fin
+        _plantillas = Plantillas(CacheResultados(directorio, 1024 * 1024))
+    return _plantillas
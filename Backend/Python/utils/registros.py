@@ -0,0 +1,72 @@
+from utils.pdf_helpers import norm
+from utils.patrones import PATRON_CONOCIMIENTOS_46
+
+# === Registros extraídos ===
+# Los extractores arman cada entidad en un objeto con __slots__ (sin un dict
+# por registro mientras recorren las filas) y la convierten a dict una sola
+# vez, al cerrarla con finalizar(). Solo los campos asignados salen en el
+# dict, igual que con los dicts armados a mano: el JSON no cambia.
+
+
+class Registro:
+    """Base de los registros: campos en __slots__, en el orden en que salen en el JSON"""
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return any(hasattr(self, campo) for campo in self.__slots__)
+
+    def get(self, campo: str, defecto=None):
+        return getattr(self, campo, defecto)
+
+    def a_dict(self) -> dict:
+        return {campo: getattr(self, campo) for campo in self.__slots__ if hasattr(self, campo)}
+
+    def finalizar(self) -> dict:
+        """Cierra el registro y lo devuelve como dict (lo que emiten los extractores)"""
+        return self.a_dict()
+
+
+class Programa(Registro):
+    __slots__ = ("nombre_programa", "codigo_programa", "version_programa", "vigencia", "horas_etapa_lectiva",
+                 "horas_etapa_productiva", "horas_totales", "tipo", "titulo")
+
+
+class Competencia(Registro):
+    __slots__ = ("unidad_competencia", "codigo_norma", "nombre_competencia", "duracion_maxima")
+
+
+class UnidadRaps(Registro):
+    """
+    RAPs de una competencia. Las secciones se acumulan como listas de filas;
+    finalizar() descarta el encabezado "4.6 CONOCIMIENTOS" que se cuela entre
+    los resultados y une conocimientos y criterios en texto con saltos de línea.
+    """
+    __slots__ = ("competencia", "codigo_competencia", "resultados_aprendizaje", "conocimientos_proceso",
+                 "conocimientos_saber", "criterios_evaluacion")
+
+    TEXTOS = ("conocimientos_proceso", "conocimientos_saber", "criterios_evaluacion")
+
+    def finalizar(self) -> dict:
+        unidad = self.a_dict()
+        if "resultados_aprendizaje" in unidad:
+            unidad["resultados_aprendizaje"] = [
+                r for r in unidad["resultados_aprendizaje"] if not PATRON_CONOCIMIENTOS_46.search(norm(r))
+            ]
+        for campo in self.TEXTOS:
+            if campo in unidad:
+                unidad[campo] = "\n".join(unidad[campo])
+        return unidad
+
+
+class Proyecto(Registro):
+    __slots__ = ("codigo_proyecto", "codigo_programa", "centro_formacion", "regional", "nombre_proyecto",
+                 "programa_formacion")
+
+
+class Actividad(Registro):
+    __slots__ = ("fase", "nombre_actividad", "raps")
+
+    def __init__(self, fase: str, nombre_actividad: str, raps: list):
+        self.fase = fase
+        self.nombre_actividad = nombre_actividad
+        self.raps = raps
@@ -0,0 +1,150 @@
+import pypdfium2 as pdfium
+from utils.pdf_helpers import norm
+from utils.logs import log_warning
+
+# === Secciones del documento ===
+# Cada sección se abre con cualquiera de sus marcadores de inicio y se cierra
+# con cualquiera de los de fin. Si una página trae ambos, decide el que aparece
+# último en el texto de la página.
+SECCIONES = {
+    "programa": (
+        ["DENOMINACION DEL PROGRAMA", "CODIGO PROGRAMA"],
+        ["UNIDAD DE COMPETENCIA", "CODIGO NORMA DE COMPETENCIA LABORAL"],
+    ),
+    "competencias": (
+        ["UNIDAD DE COMPETENCIA", "CODIGO NORMA DE COMPETENCIA LABORAL", "NOMBRE DE LA COMPETENCIA"],
+        ["CONTROL DEL DOCUMENTO"],
+    ),
+    "proyecto": (
+        ["INFORMACION BASICA DEL PROYECTO"],
+        ["ESTRUCTURA DEL PROYECTO"],
+    ),
+    "planeacion": (
+        ["PLANEACION DEL PROYECTO", "FASES DEL PROYECTO", "ACTIVIDADES DEL PROYECTO"],
+        ["RUBROS PRESUPUESTALES", "EQUIPO QUE PARTICIPO"],
+    ),
+}
+
+# Marcadores de la primera página de un documento y la clase que indican. Un PDF
+# con varios es la unión de varios programas o proyectos: cada uno se procesa por separado
+TIPOS_DOCUMENTO = {
+    "DENOMINACION DEL PROGRAMA": "programa",
+    "INFORMACION BASICA DEL PROYECTO": "proyecto",
+}
+INICIOS_DOCUMENTO = list(TIPOS_DOCUMENTO)
+
+# Páginas del inicio de cada documento en las que se buscan los marcadores
+PAGINAS_CLASIFICACION = 3
+
+# Sin marcador de inicio, la clase sale de las secciones que aparecen
+SECCIONES_POR_TIPO_DOCUMENTO = {
+    "programa": ["programa", "competencias"],
+    "proyecto": ["proyecto", "planeacion"],
+}
+
+
+def textos_paginas(pdf_path: str) -> list:
+    """Texto normalizado de cada página usando pdfium (mucho más barato que extract_tables)"""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        textos = []
+        for i in range(len(pdf)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            textos.append(norm(textpage.get_text_range()))
+            textpage.close()
+            page.close()
+        return textos
+    finally:
+        pdf.close()
+
+
+def paginas_de_seccion(textos: list, inicio: list, fin: list) -> list:
+    """Números de página (desde 1) en los que la sección puede estar abierta"""
+    paginas = []
+    abierta = False
+    for num_pagina, texto in enumerate(textos, 1):
+        pos_inicio = max(texto.rfind(m) for m in inicio)
+        pos_fin = max(texto.rfind(m) for m in fin)
+        if abierta or pos_inicio >= 0:
+            paginas.append(num_pagina)
+        if pos_inicio > pos_fin:
+            abierta = True
+        elif pos_fin >= 0:
+            abierta = False
+    return paginas
+
+
+def indexar_secciones(textos: list) -> dict:
+    """Índice página → sección: {"programa": [1, 2, ...], "planeacion": [4, ...], ...}"""
+    return {
+        nombre: paginas_de_seccion(textos, inicio, fin)
+        for nombre, (inicio, fin) in SECCIONES.items()
+    }
+
+
+def secciones_sin_indice(indice: dict, secciones: list) -> list:
+    """
+    Secciones pedidas que el pre-escaneo no encontró aunque deberían estar: el
+    documento tiene otras secciones de su clase, o ninguna que lo clasifique
+    (pdfium no leyó algún marcador). Las de otra clase de documento faltan de verdad.
+    """
+    presentes = [tipo for tipo, propias in SECCIONES_POR_TIPO_DOCUMENTO.items()
+                 if any(indice.get(seccion) for seccion in propias)]
+    return [seccion for seccion in secciones if not indice.get(seccion)
+            and (not presentes or any(seccion in SECCIONES_POR_TIPO_DOCUMENTO[tipo] for tipo in presentes))]
+
+
+def limites_documentos(textos: list) -> list:
+    """
+    (primera, última) página de cada documento del PDF. Las páginas anteriores
+    al primer marcador quedan con el primer documento.
+    """
+    inicios = [n for n, texto in enumerate(textos, 1) if any(m in texto for m in INICIOS_DOCUMENTO)]
+    if not inicios:
+        return [(1, len(textos))] if textos else []
+    inicios[0] = 1
+    return [(inicio, fin - 1) for inicio, fin in zip(inicios, inicios[1:] + [len(textos) + 1])]
+
+
+def clasificar_documento(textos: list, indice: dict) -> str | None:
+    """
+    'programa' o 'proyecto' según el primer marcador de inicio en las primeras
+    páginas; si no aparece, según las secciones indexadas. None si no se sabe.
+    """
+    for texto in textos[:PAGINAS_CLASIFICACION]:
+        encontrados = [(texto.find(marcador), tipo) for marcador, tipo in TIPOS_DOCUMENTO.items() if marcador in texto]
+        if encontrados:
+            return min(encontrados)[1]
+    presentes = [tipo for tipo, secciones in SECCIONES_POR_TIPO_DOCUMENTO.items()
+                 if any(indice.get(seccion) for seccion in secciones)]
+    return presentes[0] if len(presentes) == 1 else None
+
+
+def indice_documentos(pdf_path: str) -> list | None:
+    """
+    [((primera, última), índice de secciones, clase)] de cada documento del PDF,
+    con un solo pre-escaneo de texto. None si no se pudo leer su texto.
+    """
+    try:
+        textos = textos_paginas(pdf_path)
+    except Exception as e:
+        log_warning(f"No se pudo indexar secciones, se procesarán todas las páginas: {e}")
+        return None
+
+    documentos = []
+    for primera, ultima in limites_documentos(textos):
+        indice = indexar_secciones(textos[primera - 1:ultima])
+        documentos.append(((primera, ultima), {
+            nombre: [n + primera - 1 for n in paginas] for nombre, paginas in indice.items()
+        }, clasificar_documento(textos[primera - 1:ultima], indice)))
+    return documentos
+
+
+def indice_secciones(pdf_path: str) -> dict | None:
+    """Índice de secciones del PDF, o None si no se pudo leer su texto"""
+    try:
+        return indexar_secciones(textos_paginas(pdf_path))
+    except Exception as e:
+        log_warning(f"No se pudo indexar secciones, se procesarán todas las páginas: {e}")
+        return None
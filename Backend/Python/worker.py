@@ -0,0 +1,220 @@
+import json
+import multiprocessing
+import os
+import re
+import socketserver
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from main import procesar_pdf
+from utils.metricas import serializar
+from utils.logs import log_info, log_warning
+
+
+def workers_por_defecto() -> int:
+    """Tamaño del pool: EXTRACTOR_WORKERS o hasta 4 según los núcleos disponibles"""
+    valor = os.environ.get("EXTRACTOR_WORKERS")
+    if valor and valor.isdigit() and int(valor) > 0:
+        return int(valor)
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+# Cola por la que los procesos hijos avisan qué trabajo empiezan (ver PoolExtraccion)
+_inicios = None
+
+
+def _registrar_inicios(cola):
+    global _inicios
+    _inicios = cola
+
+
+def procesar_trabajo(id_trabajo, *args, **kwargs) -> dict:
+    """procesar_pdf en un proceso hijo, avisando antes al pool que el trabajo empezó"""
+    if _inicios is not None and id_trabajo is not None:
+        _inicios.put(id_trabajo)
+    return procesar_pdf(*args, **kwargs)
+
+
+class PoolExtraccion:
+    """
+    Pool de procesos que conserva los imports (pdfplumber, extractores)
+    cargados entre trabajos. Si un proceso hijo muere, el pool se recrea.
+    Con al_iniciar, se llama al_iniciar(id_trabajo) cuando un hijo toma el
+    trabajo: running() del futuro ya es True mientras espera en la cola de
+    llamadas del executor, así que no sirve para saber si empezó.
+    """
+
+    def __init__(self, workers: int, al_iniciar=None):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._inicios = multiprocessing.Queue() if al_iniciar else None
+        self._executor = self._crear_executor()
+        if al_iniciar:
+            threading.Thread(target=self._leer_inicios, args=(al_iniciar,), daemon=True).start()
+
+    def _crear_executor(self) -> ProcessPoolExecutor:
+        if self._inicios is None:
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_registrar_inicios, initargs=(self._inicios,))
+
+    def _leer_inicios(self, al_iniciar):
+        while True:
+            id_trabajo = self._inicios.get()
+            if id_trabajo is None:
+                return
+            al_iniciar(id_trabajo)
+
+    def enviar(self, pdf_path: str, tipo: str, metricas: bool = False, por_rap: bool = False,
+               plazo: float | None = None, reanudar: dict | None = None, perfil: str | list | None = None,
+               id_trabajo=None):
+        opciones = {"plazo": plazo, "reanudar": reanudar, "perfil": perfil}
+        with self._lock:
+            try:
+                return self._executor.submit(procesar_trabajo, id_trabajo, pdf_path, tipo, metricas, por_rap, **opciones)
+            except BrokenProcessPool:
+                log_warning("Pool de extracción caído, reiniciando procesos")
+                self._executor = self._crear_executor()
+                return self._executor.submit(procesar_trabajo, id_trabajo, pdf_path, tipo, metricas, por_rap, **opciones)
+
+    def cerrar(self):
+        self._executor.shutdown(wait=True)
+        if self._inicios is not None:
+            self._inicios.put(None)
+
+
+# "id" de una línea que no se pudo leer como trabajo (JSON cortado o inválido)
+PATRON_ID = re.compile(r'"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")')
+
+
+def id_de_linea(linea: str, trabajo=None):
+    """Id del trabajo aunque la línea sea inválida, para que quien lo envió reciba la respuesta; None si no se encuentra"""
+    if isinstance(trabajo, dict):
+        return trabajo.get("id")
+    coincidencia = PATRON_ID.search(linea)
+    if not coincidencia:
+        return None
+    try:
+        return json.loads(coincidencia.group(1))
+    except ValueError:
+        return None
+
+
+def atender(lineas, escribir, pool: PoolExtraccion):
+    """
+    Lee trabajos NDJSON ({"id", "pdf_path", "tipo", "metricas"?, "por_rap"?, "plazo"?, "reanudar"?, "perfil"?}) y
+    escribe una línea de respuesta por trabajo ({"id", "success", "data"|"error", "metrics"?, "partial"?, "perfil"?})
+    a medida que terminan.
+    El plazo (segundos) cuenta desde que el trabajo empieza a procesarse, no desde que entra a la cola.
+    Las respuestas pueden llegar en distinto orden que los trabajos. Un trabajo
+    inválido responde con su id si se puede recuperar de la línea, si no con id null.
+    """
+    lock_salida = threading.Lock()
+    pendientes = []
+
+    def responder(respuesta: dict):
+        linea = serializar(respuesta)
+        with lock_salida:
+            escribir(linea + "\n")
+
+    def al_terminar(id_trabajo, futuro):
+        try:
+            resultado = futuro.result()
+        except Exception as e:
+            resultado = {"success": False, "error": str(e)}
+        responder({"id": id_trabajo, **resultado})
+
+    for linea in lineas:
+        linea = linea.strip()
+        if not linea:
+            continue
+
+        trabajo = None
+        try:
+            trabajo = json.loads(linea)
+            id_trabajo = trabajo.get("id")
+            pdf_path = trabajo["pdf_path"]
+            tipo = trabajo.get("tipo", "todo")
+            metricas = bool(trabajo.get("metricas"))
+            por_rap = bool(trabajo.get("por_rap"))
+            plazo = float(trabajo["plazo"]) if trabajo.get("plazo") else None
+            reanudar = trabajo.get("reanudar")
+            perfil = trabajo.get("perfil")
+        except (ValueError, KeyError, AttributeError, TypeError) as e:
+            responder({"id": id_de_linea(linea, trabajo), "success": False, "error": f"Trabajo inválido: {e}"})
+            continue
+
+        futuro = pool.enviar(pdf_path, tipo, metricas, por_rap, plazo, reanudar, perfil)
+        futuro.add_done_callback(lambda f, id_trabajo=id_trabajo: al_terminar(id_trabajo, f))
+        pendientes.append(futuro)
+        pendientes = [f for f in pendientes if not f.done()]
+
+    # Esperar los trabajos en curso antes de cerrar la entrada
+    for futuro in pendientes:
+        try:
+            futuro.result()
+        except Exception:
+            pass
+
+
+def servir_stdio(pool: PoolExtraccion):
+    """Modo por defecto: trabajos por stdin, respuestas por stdout"""
+    def escribir(texto):
+        sys.stdout.write(texto)
+        sys.stdout.flush()
+
+    atender(sys.stdin, escribir, pool)
+
+
+def servir_socket(ruta_socket: str, pool: PoolExtraccion):
+    """Modo socket Unix local: cada conexión envía y recibe NDJSON"""
+    if os.path.exists(ruta_socket):
+        os.remove(ruta_socket)
+
+    class Manejador(socketserver.StreamRequestHandler):
+        def handle(self):
+            lineas = (linea.decode("utf-8") for linea in self.rfile)
+
+            def escribir(texto):
+                self.wfile.write(texto.encode("utf-8"))
+                self.wfile.flush()
+
+            atender(lineas, escribir, pool)
+
+    with socketserver.ThreadingUnixStreamServer(ruta_socket, Manejador) as servidor:
+        servidor.daemon_threads = True
+        log_info(f"Worker escuchando en {ruta_socket}")
+        try:
+            servidor.serve_forever()
+        finally:
+            os.remove(ruta_socket)
+
+
+def ejecutar_worker(args: list):
+    """
+    Uso: python main.py --worker [--workers N] [--socket RUTA]
+    """
+    workers = workers_por_defecto()
+    ruta_socket = None
+
+    if "--workers" in args:
+        workers = int(args[args.index("--workers") + 1])
+    if "--socket" in args:
+        ruta_socket = args[args.index("--socket") + 1]
+
+    # Los trabajos ya corren en paralelo; por defecto cada uno extrae sus páginas en serie
+    os.environ.setdefault("EXTRACTOR_PAGINAS_WORKERS", "1")
+
+    pool = PoolExtraccion(workers)
+    log_info(f"Worker de extracción iniciado con {workers} procesos")
+
+    try:
+        if ruta_socket:
+            servir_socket(ruta_socket, pool)
+        else:
+            servir_stdio(pool)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.cerrar()
@@ -3,7 +3,6 @@ const db = require("../config/conexion_db");
 const PythonService = require("../services/pythonService");
 const fs = require("fs");
 const path = require("path");
-const RapParser = require('../middleware/rap_parser');
 
 class PdfController {
   /**
@@ -26,8 +25,8 @@ class PdfController {
       console.log(`Procesando PDF: ${pdfPath}`);
       console.log(`Tipo de extracción: ${tipo}`);
 
-      // Ejecutar script Python
-      const resultado = await PythonService.ejecutarScript(pdfPath, tipo);
+      // Ejecutar script Python (los conocimientos y criterios llegan ya repartidos por RAP)
+      const resultado = await PythonService.ejecutarScript(pdfPath, tipo, { porRap: true });
 
       console.log("Python retornó datos:", JSON.stringify(resultado, null, 2));
 
@@ -95,7 +94,7 @@ class PdfController {
 
         for (const infoRap of resultado.unidadRaps) {
           const codigoCompetencia = infoRap.codigo_competencia;
-          const rapsEstructurados = RapParser.procesarCompetencia(infoRap);
+          const rapsEstructurados = infoRap.raps || [];
 
           if (rapsEstructurados.length === 0) {
             console.warn(`Competencia ${codigoCompetencia} sin RAPs, saltando...`);
@@ -140,25 +139,28 @@ class PdfController {
             console.log(`  - Conocimientos Saber: ${rap.conocimientos_saber.length}`);
             console.log(`  - Criterios: ${rap.criterios_evaluacion.length}`);
 
-            // INSERTAR COMO UN SOLO REGISTRO (si hay contenido)
-            if (rap.conocimientos_proceso && rap.conocimientos_proceso.trim()) {
+            // INSERTAR COMO UN SOLO REGISTRO (si hay contenido): un ítem por línea
+            const conocimientosProceso = rap.conocimientos_proceso.join('\n');
+            if (conocimientosProceso.trim()) {
               await connection.query(
                 `INSERT INTO conocimiento_proceso (id_rap, nombre) VALUES (?, ?)`,
-                [idRap, rap.conocimientos_proceso]
+                [idRap, conocimientosProceso]
               );
             }
 
-            if (rap.conocimientos_saber && rap.conocimientos_saber.trim()) {
+            const conocimientosSaber = rap.conocimientos_saber.join('\n');
+            if (conocimientosSaber.trim()) {
               await connection.query(
                 `INSERT INTO conocimiento_saber (id_rap, nombre) VALUES (?, ?)`,
-                [idRap, rap.conocimientos_saber]
+                [idRap, conocimientosSaber]
               );
             }
 
-            if (rap.criterios_evaluacion && rap.criterios_evaluacion.trim()) {
+            const criterios = rap.criterios_evaluacion.join('\n');
+            if (criterios.trim()) {
               await connection.query(
                 `INSERT INTO criterios_evaluacion (id_rap, nombre) VALUES (?, ?)`,
-                [idRap, rap.criterios_evaluacion]
+                [idRap, criterios]
               );
             }
           }
@@ -1,65 +1,204 @@
 const { spawn } = require('child_process');
 const path = require('path');
+const readline = require('readline');
+
+const scriptPath = path.join(__dirname, '../../python/main.py');
+const pythonPath = path.join(__dirname, '../../.venv/Scripts/python.exe');
+
+// Número de procesos de extracción en paralelo dentro del worker
+const WORKERS_PYTHON = parseInt(process.env.PYTHON_WORKERS || '2', 10);
+
+// Con PYTHON_METRICAS=1 cada extracción reporta tiempos y contadores
+const METRICAS_PYTHON = process.env.PYTHON_METRICAS === '1';
+
+// Tiempo máximo (ms) de espera por cada trabajo del worker; 0 lo desactiva
+const TIMEOUT_TRABAJO_MS = parseInt(process.env.PYTHON_TIMEOUT_MS || '600000', 10);
+
+// Caracteres de stderr que se adjuntan al error cuando el script falla
+const MAX_STDERR_ERROR = 16 * 1024;
 
 class PythonService {
+    static worker = null;
+    static pendientes = new Map();
+    static siguienteId = 1;
+
     /**
-     * Ejecuta el script Python y retorna el resultado
+     * Inicia (una sola vez) el worker Python persistente.
+     * El worker mantiene pdfplumber cargado y atiende varios PDFs por proceso.
+     */
+    static obtenerWorker() {
+        if (this.worker) return this.worker;
+
+        const python = spawn(pythonPath, [scriptPath, '--worker', '--workers', String(WORKERS_PYTHON)]);
+
+        // Cada línea de stdout es la respuesta JSON de un trabajo
+        const lector = readline.createInterface({ input: python.stdout });
+        lector.on('line', (linea) => {
+            let respuesta;
+            try {
+                respuesta = JSON.parse(linea);
+            } catch (parseError) {
+                console.error('[PYTHON WORKER]: Respuesta no es JSON:', linea);
+                return;
+            }
+
+            // Sin id no se sabe de qué trabajo es: se descarta (ese trabajo termina por su timeout)
+            if (respuesta.id === null || respuesta.id === undefined) {
+                console.error('[PYTHON WORKER]: Respuesta sin id, se descarta:', linea);
+                return;
+            }
+
+            const trabajo = this.sacarPendiente(respuesta.id);
+            if (!trabajo) return;
+
+            if (respuesta.metrics) {
+                console.log(`[PYTHON METRICS] ${trabajo.pdfPath}:`, JSON.stringify(respuesta.metrics));
+            }
+
+            if (!respuesta.success) {
+                return trabajo.reject({
+                    error: 'Python retornó error',
+                    details: respuesta.error
+                });
+            }
+
+            trabajo.resolve(respuesta.data);
+        });
+
+        // Capturar stderr
+        python.stderr.on('data', (data) => {
+            console.log("[PYTHON LOG]:", data.toString().trim()); // Muestra logs en consola Node
+        });
+
+        // Si el worker termina, se rechazan los trabajos pendientes y se reinicia en la próxima llamada
+        python.on('close', (code) => {
+            this.worker = null;
+            this.rechazarPendientes({
+                error: 'Error en el script Python',
+                details: 'El worker de extracción terminó inesperadamente',
+                code: code
+            });
+        });
+
+        // Error al lanzar el proceso
+        python.on('error', (error) => {
+            this.worker = null;
+            this.rechazarPendientes({
+                error: 'No se pudo ejecutar Python',
+                details: error.message
+            });
+        });
+
+        this.worker = python;
+        return python;
+    }
+
+    /**
+     * Quita un trabajo de los pendientes y cancela su timeout
+     * @param {number} id - Id del trabajo
+     * @returns {Object|undefined} - { resolve, reject, pdfPath } o undefined si ya no estaba
+     */
+    static sacarPendiente(id) {
+        const trabajo = this.pendientes.get(id);
+        if (!trabajo) return undefined;
+        this.pendientes.delete(id);
+        clearTimeout(trabajo.timeout);
+        return trabajo;
+    }
+
+    /**
+     * Rechaza con el mismo error todos los trabajos pendientes
+     * @param {Object} error - { error, details, code? }
+     */
+    static rechazarPendientes(error) {
+        for (const id of [...this.pendientes.keys()]) {
+            this.sacarPendiente(id).reject(error);
+        }
+    }
+
+    /**
+     * Envía el PDF al worker Python y retorna el resultado
      * @param {string} pdfPath - Ruta absoluta al PDF
      * @param {string} tipo - 'programa', 'competencias', 'proyecto', 'todo'
+     * @param {Object} opciones - { porRap: true } para recibir los RAPs de cada unidad ya estructurados
      * @returns {Promise<Object>} - Resultado parseado
      */
-    static ejecutarScript(pdfPath, tipo = 'todo') {
+    static ejecutarScript(pdfPath, tipo = 'todo', opciones = {}) {
         return new Promise((resolve, reject) => {
-            const scriptPath = path.join(__dirname, '../../python/main.py');
+            const python = this.obtenerWorker();
+            const id = this.siguienteId++;
+
+            // Si el worker nunca responde, el trabajo se rechaza en lugar de quedar colgado
+            const timeout = TIMEOUT_TRABAJO_MS > 0 ? setTimeout(() => {
+                const trabajo = this.sacarPendiente(id);
+                if (!trabajo) return;
+                trabajo.reject({
+                    error: 'Tiempo de espera agotado',
+                    details: `El worker no respondió en ${TIMEOUT_TRABAJO_MS} ms (${pdfPath})`
+                });
+            }, TIMEOUT_TRABAJO_MS) : null;
 
-            // Spawn del proceso Python
-            const pythonPath = path.join(__dirname, '../../.venv/Scripts/python.exe');
-            const python = spawn(pythonPath, [scriptPath, pdfPath, tipo]);
+            this.pendientes.set(id, { resolve, reject, pdfPath, timeout });
+            python.stdin.write(JSON.stringify({ id, pdf_path: pdfPath, tipo, metricas: METRICAS_PYTHON, por_rap: Boolean(opciones.porRap) }) + '\n');
+        });
+    }
+
+    /**
+     * Ejecuta main.py en modo --stream y entrega cada registro apenas Python lo emite,
+     * sin esperar a que termine todo el PDF
+     * @param {string} pdfPath - Ruta absoluta al PDF
+     * @param {string} tipo - 'programa', 'competencias', 'proyecto', 'todo'
+     * @param {Function} alRegistro - (tipo, data) => Promise|void, se llama en orden por cada registro
+     * @returns {Promise<void>} - Se resuelve cuando Python termina y se procesaron todos los registros
+     */
+    static ejecutarStream(pdfPath, tipo = 'todo', alRegistro) {
+        return new Promise((resolve, reject) => {
+            const python = spawn(pythonPath, [scriptPath, pdfPath, tipo, '--stream']);
+            const lector = readline.createInterface({ input: python.stdout });
 
-            let dataString = '';
+            // Los registros se entregan uno tras otro para respetar el orden del PDF
+            let cola = Promise.resolve();
+            let terminado = false;
             let errorString = '';
 
-            // Capturar stdout
-            python.stdout.on('data', (data) => {
-                dataString += data.toString();
+            lector.on('line', (linea) => {
+                let registro;
+                try {
+                    registro = JSON.parse(linea);
+                } catch (parseError) {
+                    return;
+                }
+
+                if (registro.tipo === 'fin') {
+                    terminado = true;
+                    cola.then(resolve, reject);
+                } else if (registro.tipo === 'error') {
+                    terminado = true;
+                    reject({
+                        error: 'Python retornó error',
+                        details: registro.error
+                    });
+                } else {
+                    cola = cola.then(() => alRegistro(registro.tipo, registro.data));
+                }
             });
 
             // Capturar stderr
             python.stderr.on('data', (data) => {
                 const msg = data.toString();
                 console.log("[PYTHON LOG]:", msg.trim()); // Muestra logs en consola Node
-                errorString += msg;
+                // Solo se conserva el final de stderr para el mensaje de error
+                errorString = (errorString + msg).slice(-MAX_STDERR_ERROR);
             });
 
-
-            // Cuando el proceso termine
             python.on('close', (code) => {
-                if (code !== 0) {
-                    return reject({
+                if (!terminado) {
+                    reject({
                         error: 'Error en el script Python',
                         details: errorString,
                         code: code
                     });
                 }
-
-                try {
-                    const resultado = JSON.parse(dataString);
-                    
-                    if (!resultado.success) {
-                        return reject({
-                            error: 'Python retornó error',
-                            details: resultado.error
-                        });
-                    }
-
-                    resolve(resultado.data);
-                } catch (parseError) {
-                    reject({
-                        error: 'Error al parsear JSON de Python',
-                        details: parseError.message,
-                        raw: dataString
-                    });
-                }
             });
 
             // Error al lanzar el proceso
@@ -73,4 +212,4 @@ class PythonService {
     }
 }
 
-module.exports = PythonService;
\ No newline at end of file
+module.exports = PythonService;